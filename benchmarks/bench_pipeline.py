@@ -0,0 +1,202 @@
+"""End-to-end benchmark of ``RipperService.rip_playlist`` with offline stand-ins.
+
+The real ``yt-dlp`` and ``ffmpeg`` are replaced by the scripts in
+``benchmarks/fakes`` (put first on ``PATH``) and album art comes from a local
+``FakeItunesServer``.  Every (playlist size, concurrency) scenario runs in a
+fresh interpreter so peak RSS is measured per scenario.
+
+Example::
+
+    python benchmarks/bench_pipeline.py --sizes 1,50,500 --concurrency 4,16,adaptive \\
+        --output results.json --baseline previous.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+FAKES = HERE / "fakes"
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_one(size: int, concurrency: str) -> dict:
+    """Run one scenario in this process and return its measurements."""
+    sys.path.insert(0, str(ROOT / "src"))
+    sys.path.insert(0, str(HERE))
+    if not os.environ.get("FAKE_AUDIO_TEMPLATE"):
+        # Filler bytes are not valid MP4 files, so keep mutagen from tagging them.
+        sys.modules["mutagen.easymp4"] = None  # type: ignore[assignment]
+        sys.modules["mutagen.mp4"] = None  # type: ignore[assignment]
+
+    from fake_itunes import UrllibRequests
+    from songripper.services.concurrency import AIMDLimiter
+    from songripper.services.ripper_service import RipperService
+
+    with tempfile.TemporaryDirectory(prefix="songripper-bench-") as tmp:
+        service = RipperService(data_dir=Path(tmp), nas_path=Path(tmp) / "nas")
+        service.retry_base_delay = 0.05
+        service.retry_max_delay = 0.5
+        if concurrency != "adaptive":
+            n = int(concurrency)
+            service.download_limiter = AIMDLimiter(n, n, n)
+        mp3_func = partial(
+            service.mp3_from_url,
+            fetch_cover=partial(service.fetch_cover, requests_mod=UrllibRequests),
+            fetch_thumbnail=partial(service.fetch_thumbnail, requests_mod=UrllibRequests),
+        )
+        start = time.perf_counter()
+        status = service.rip_playlist(f"fake://playlist/{size}", mp3_func=mp3_func)
+        elapsed = time.perf_counter() - start
+        job = service.jobs.list()[0]
+
+    latencies = [
+        i.finished - i.started for i in job.items if i.status == "done" and i.finished
+    ]
+    done = len(job.succeeded)
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "size": size,
+        "concurrency": concurrency,
+        "status": status,
+        "tracks_done": done,
+        "tracks_failed": len(job.failed),
+        "elapsed_s": elapsed,
+        "tracks_per_minute": done / elapsed * 60 if elapsed else None,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p99_s": percentile(latencies, 99),
+        "latency_mean_s": statistics.fmean(latencies) if latencies else None,
+        "peak_rss_kb": self_usage.ru_maxrss,
+        "peak_child_rss_kb": child_usage.ru_maxrss,
+        "final_limit": service.download_limiter.limit,
+    }
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> int:
+    """Print changes against ``baseline_path``; return the number of regressions."""
+    baseline = json.loads(baseline_path.read_text())
+    old = {(r["size"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        prev = old.get((r["size"], r["concurrency"]))
+        if prev is None:
+            continue
+        for key, higher_is_better in (
+            ("tracks_per_minute", True),
+            ("latency_p99_s", False),
+            ("peak_rss_kb", False),
+        ):
+            a, b = prev.get(key), r.get(key)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            worse = change < -threshold if higher_is_better else change > threshold
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(
+                f"  size={r['size']:<5} conc={r['concurrency']:<8} "
+                f"{key:<18} {a:>12.2f} -> {b:>12.2f} ({change:+.1%}){flag}"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,50,500,5000")
+    parser.add_argument("--concurrency", default="1,4,16,adaptive")
+    parser.add_argument("--output", type=Path, default=Path("pipeline_results.json"))
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change reported as a regression")
+    parser.add_argument("--ytdlp-latency", type=float, default=0.05)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    parser.add_argument("--ffmpeg-latency", type=float, default=0.05)
+    parser.add_argument("--output-bytes", type=int, default=4_000_000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--itunes-latency", type=float, default=0.02)
+    parser.add_argument("--itunes-failure-rate", type=float, default=0.0)
+    parser.add_argument("--cover-bytes", type=int, default=60_000)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    opts = parser.parse_args(argv)
+
+    if opts.run_one:
+        print(json.dumps(run_one(int(opts.sizes), opts.concurrency)))
+        return 0
+
+    sys.path.insert(0, str(HERE))
+    from fake_itunes import FakeItunesServer
+
+    server = FakeItunesServer(
+        opts.itunes_latency, opts.cover_bytes, opts.itunes_failure_rate
+    ).start()
+    env = dict(
+        os.environ,
+        PATH=f"{FAKES}{os.pathsep}{os.environ.get('PATH', '')}",
+        ITUNES_SEARCH_URL=f"{server.url}/search",
+        FAKE_ITUNES_URL=server.url,
+        FAKE_YTDLP_LATENCY=str(opts.ytdlp_latency),
+        FAKE_DOWNLOAD_LATENCY=str(opts.download_latency),
+        FAKE_FFMPEG_LATENCY=str(opts.ffmpeg_latency),
+        FAKE_OUTPUT_BYTES=str(opts.output_bytes),
+        FAKE_FAILURE_RATE=str(opts.failure_rate),
+    )
+    results = []
+    try:
+        for size in [int(s) for s in opts.sizes.split(",")]:
+            for conc in opts.concurrency.split(","):
+                cmd = [sys.executable, __file__, "--run-one",
+                       "--sizes", str(size), "--concurrency", conc]
+                proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(proc.stderr, file=sys.stderr)
+                    return proc.returncode
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(
+                    f"size={size:<5} conc={conc:<8} {result['tracks_per_minute']:>9.1f} tracks/min "
+                    f"p50={result['latency_p50_s'] or 0:.2f}s p99={result['latency_p99_s'] or 0:.2f}s "
+                    f"rss={result['peak_rss_kb'] / 1024:.0f}MiB failed={result['tracks_failed']}"
+                )
+    finally:
+        server.stop()
+
+    report = {
+        "benchmark": "pipeline",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(opts).items() if k not in {"run_one", "output", "baseline"}},
+        "results": results,
+    }
+    opts.output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"Wrote {opts.output}")
+    if opts.baseline:
+        return 1 if compare(results, opts.baseline, opts.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
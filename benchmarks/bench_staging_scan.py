@@ -0,0 +1,149 @@
+"""Cold and warm staging listing benchmark.
+
+Builds a synthetic staging tree (see ``load_staging.generate_tree``) and
+times ``RipperService.iter_staged_tracks`` for each worker count: time to
+the first track, total time for a cold listing (empty tag cache) and for a
+warm one.  ``--latency`` simulates network storage by sleeping before every
+directory scan and every tag parse.
+
+Example::
+
+    python benchmarks/bench_staging_scan.py --tracks 10000 --workers 1,4,16,32 \\
+        --latency 0,0.005 --template sample.m4a --output staging_scan.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+
+
+def simulate_latency(latency: float) -> None:
+    """Delay directory scans and tag parses by ``latency`` seconds each."""
+    from songripper.services import tagcache
+
+    real_scandir = os.scandir
+    real_parse = tagcache.parse_track
+
+    def slow_scandir(path="."):
+        time.sleep(latency)
+        return real_scandir(path)
+
+    def slow_parse(path, mtime_ns=0):
+        time.sleep(latency)
+        return real_parse(path, mtime_ns)
+
+    # Each configuration runs in its own interpreter, so patching globally is fine.
+    os.scandir = slow_scandir
+    tagcache.parse_track = slow_parse
+
+
+def time_listing(service) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in service.iter_staged_tracks():
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return first or 0.0, time.perf_counter() - start, count
+
+
+def run_one(data_dir: Path, workers: int, latency: float) -> dict:
+    """Time one configuration in this process."""
+    sys.path.insert(0, str(ROOT / "src"))
+    if latency:
+        simulate_latency(latency)
+    from songripper.services.ripper_service import RipperService
+
+    service = RipperService(data_dir=data_dir, nas_path=data_dir / "nas")
+    service.scan_workers = workers
+    cold_first, cold_total, count = time_listing(service)
+    warm_first, warm_total, _ = time_listing(service)
+    return {
+        "workers": workers,
+        "latency_s": latency,
+        "tracks": count,
+        "cold_first_s": cold_first,
+        "cold_total_s": cold_total,
+        "cold_tracks_per_s": count / cold_total if cold_total else None,
+        "warm_first_s": warm_first,
+        "warm_total_s": warm_total,
+        "cache_hits": service.tag_cache.hits,
+        "cache_misses": service.tag_cache.misses,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10_000)
+    parser.add_argument("--workers", default="1,4,16,32")
+    parser.add_argument("--latency", default="0,0.005",
+                        help="comma separated simulated per-operation latency in seconds")
+    parser.add_argument("--template", type=Path, help="real .m4a file to copy and tag")
+    parser.add_argument("--cover-bytes", type=int, default=80_000)
+    parser.add_argument("--output", type=Path, default=Path("staging_scan.json"))
+    parser.add_argument("--data-dir", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    opts = parser.parse_args(argv)
+
+    if opts.run_one:
+        result = run_one(opts.data_dir, int(opts.workers), float(opts.latency))
+        print(json.dumps(result))
+        return 0
+
+    sys.path.insert(0, str(HERE))
+    from load_staging import generate_tree
+
+    data_dir = Path(tempfile.mkdtemp(prefix="songripper-scan-"))
+    results = []
+    try:
+        t0 = time.perf_counter()
+        generate_tree(data_dir / "staging", opts.tracks, opts.template, opts.cover_bytes)
+        print(f"generated {opts.tracks} tracks in {time.perf_counter() - t0:.1f}s")
+        for latency in opts.latency.split(","):
+            for workers in opts.workers.split(","):
+                # A fresh interpreter per run keeps the page cache the only shared state.
+                cmd = [sys.executable, __file__, "--run-one", "--data-dir", str(data_dir),
+                       "--workers", workers, "--latency", latency]
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(proc.stderr, file=sys.stderr)
+                    return proc.returncode
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(r)
+                print(
+                    f"latency={float(latency) * 1000:>5.1f}ms workers={workers:<3} "
+                    f"first={r['cold_first_s']:.3f}s cold={r['cold_total_s']:.2f}s "
+                    f"({r['cold_tracks_per_s'] or 0:.0f} tracks/s) warm={r['warm_total_s']:.2f}s"
+                )
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    opts.output.write_text(json.dumps({
+        "benchmark": "staging-scan",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: str(v) for k, v in vars(opts).items()
+                   if k not in {"output", "run_one", "data_dir"}},
+        "results": results,
+    }, indent=2))
+    print(f"Wrote {opts.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
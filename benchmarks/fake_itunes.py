@@ -0,0 +1,119 @@
+"""Local stand-in for the iTunes search API and artwork CDN.
+
+``FakeItunesServer`` answers ``/search`` with a single result whose artwork
+URL points back at itself and serves ``/art/...`` and ``/thumb/...`` images
+of a configurable size.  Latency and failure rate are configurable too.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeItunesServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        image_bytes: int = 60_000,
+        failure_rate: float = 0.0,
+        port: int = 0,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.image = b"\xff\xd8\xff\xe0" + b"\0" * max(image_bytes - 4, 0)
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeItunesServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeItunesServer
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        if random.random() < self.server.failure_rate:
+            self.send_error(503)
+            return
+        path = urllib.parse.urlparse(self.path).path
+        if path == "/search":
+            body = json.dumps(
+                {"results": [{"artworkUrl100": f"{self.server.url}/art/100x100bb.jpg"}]}
+            ).encode()
+            ctype = "application/json"
+        elif path.startswith(("/art/", "/thumb/")):
+            body = self.server.image
+            ctype = "image/jpeg"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class UrllibRequests:
+    """Just enough of the ``requests`` API for ``RipperService.fetch_cover``."""
+
+    class _Response:
+        def __init__(self, status: int, content: bytes) -> None:
+            self.status_code = status
+            self.content = content
+
+        def raise_for_status(self) -> None:
+            if self.status_code >= 400:
+                raise RuntimeError(f"HTTP {self.status_code}")
+
+        def json(self):
+            return json.loads(self.content)
+
+    @classmethod
+    def get(cls, url: str, params: dict | None = None, timeout: float | None = None):
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as res:
+                return cls._Response(res.status, res.read())
+        except urllib.error.HTTPError as exc:
+            return cls._Response(exc.code, b"")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--image-bytes", type=int, default=60_000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    opts = parser.parse_args()
+    server = FakeItunesServer(opts.latency, opts.image_bytes, opts.failure_rate, opts.port)
+    print(f"Serving fake iTunes on {server.url}")
+    server.serve_forever()
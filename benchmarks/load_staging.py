@@ -0,0 +1,264 @@
+"""HTTP load test for the staging UI endpoints.
+
+For each requested tree size a synthetic staging area is generated under a
+temporary ``DATA_DIR`` (artists / albums / tagged ``.m4a`` files with cover
+art), the FastAPI app is served by uvicorn in a background thread and a pool
+of keep-alive clients hammers ``/``, ``/staging``, ``/edit`` and ``/check``.
+Throughput, latency percentiles and response sizes per endpoint are printed
+and written as JSON.
+
+Every staged file is a copy of a real ``.m4a`` (``--template``), tagged and
+given a cover with mutagen.  Without ``--template`` ffmpeg encodes a few
+seconds of tone to use instead.  The subscription scheduler, content hasher
+and library indexer started by the app are stopped before any load is
+timed, so they do not compete with the requests.
+
+Example::
+
+    python benchmarks/load_staging.py --tracks 100,2000,20000 --clients 8 \\
+        --duration 20 --template sample.m4a --output staging_load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 5
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+def make_template(path: Path) -> Path:
+    """Encode five seconds of tone with ffmpeg as the file every track copies."""
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=5",
+         "-c:a", "aac", "-b:a", "128k", str(path)],
+        check=True,
+    )
+    return path
+
+
+def generate_tree(staging: Path, tracks: int, template: Path, cover_bytes: int) -> list[Path]:
+    """Create ``tracks`` tagged copies of ``template`` and return their paths."""
+    from mutagen.easymp4 import EasyMP4
+    from mutagen.mp4 import MP4, MP4Cover
+
+    cover = b"\xff\xd8\xff\xe0" + os.urandom(max(cover_bytes - 4, 0))
+    paths = []
+    for n in range(tracks):
+        album_no = n // TRACKS_PER_ALBUM
+        artist = f"Load Artist {album_no // ALBUMS_PER_ARTIST:04d}"
+        album = f"Load Album {album_no:05d}"
+        title = f"Load Track {n:06d}"
+        album_dir = staging / artist / album
+        album_dir.mkdir(parents=True, exist_ok=True)
+        path = album_dir / f"{n % TRACKS_PER_ALBUM + 1:02d} {title}.m4a"
+        shutil.copyfile(template, path)
+        audio = EasyMP4(path)
+        audio["artist"], audio["album"], audio["title"] = [artist], [album], [title]
+        audio.save()
+        tags = MP4(path)
+        tags["covr"] = [MP4Cover(cover, imageformat=MP4Cover.FORMAT_JPEG)]
+        tags.save()
+        paths.append(path)
+    return paths
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Serve the app with uvicorn in a daemon thread and wait until it is up.
+
+    The background threads the app starts are stopped again once it is up.
+    """
+    import uvicorn
+    from songripper import worker
+    from songripper.api import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    worker.stop_scheduler()
+    worker.stop_hasher()
+    worker.stop_library_indexer()
+    return server, thread
+
+
+def endpoint_url(name: str, tracks: list[Path]) -> str:
+    if name == "/":
+        return "/"
+    if name == "/staging":
+        return "/staging"
+    track = urllib.parse.quote(str(random.choice(tracks)))
+    if name == "/edit":
+        return f"/edit?filepath={track}&field=title"
+    return f"/check?filepath={track}"
+
+
+def client_loop(port, endpoints, tracks, deadline, max_requests, stats, lock) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    local: dict[str, dict] = {e: {"lat": [], "bytes": [], "errors": 0} for e in endpoints}
+    sent = 0
+    while time.time() < deadline and (not max_requests or sent < max_requests):
+        name = endpoints[sent % len(endpoints)]
+        sent += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", endpoint_url(name, tracks))
+            res = conn.getresponse()
+            body = res.read()
+            elapsed = time.perf_counter() - start
+            if res.status >= 400:
+                local[name]["errors"] += 1
+                continue
+            local[name]["lat"].append(elapsed)
+            local[name]["bytes"].append(len(body))
+        except (OSError, http.client.HTTPException):
+            local[name]["errors"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.close()
+    with lock:
+        for name, s in local.items():
+            stats[name]["lat"].extend(s["lat"])
+            stats[name]["bytes"].extend(s["bytes"])
+            stats[name]["errors"] += s["errors"]
+
+
+def run_load(port, endpoints, tracks, clients, duration, max_requests) -> dict:
+    stats = {e: {"lat": [], "bytes": [], "errors": 0} for e in endpoints}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = time.time() + duration
+    threads = [
+        threading.Thread(
+            target=client_loop,
+            args=(port, endpoints, tracks, deadline, max_requests, stats, lock),
+        )
+        for _ in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    report = {}
+    for name, s in stats.items():
+        lat = s["lat"]
+        report[name] = {
+            "requests": len(lat),
+            "errors": s["errors"],
+            "throughput_rps": len(lat) / wall if wall else None,
+            "latency_p50_s": percentile(lat, 50),
+            "latency_p90_s": percentile(lat, 90),
+            "latency_p99_s": percentile(lat, 99),
+            "latency_max_s": max(lat) if lat else None,
+            "response_bytes_mean": sum(s["bytes"]) / len(s["bytes"]) if s["bytes"] else None,
+            "response_bytes_max": max(s["bytes"]) if s["bytes"] else None,
+        }
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", default="100,1000,5000,20000",
+                        help="comma separated staging tree sizes")
+    parser.add_argument("--endpoints", default="/,/staging,/edit,/check")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0,
+                        help="seconds of load per tree size")
+    parser.add_argument("--requests", type=int, default=0,
+                        help="stop each client after this many requests (0 = no limit)")
+    parser.add_argument("--template", type=Path,
+                        help="real .m4a file to copy and tag (default: generated with ffmpeg)")
+    parser.add_argument("--cover-bytes", type=int, default=80_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=Path("staging_load.json"))
+    opts = parser.parse_args(argv)
+    random.seed(opts.seed)
+    opts.output = opts.output.resolve()
+    if opts.template is None and shutil.which("ffmpeg") is None:
+        parser.error("ffmpeg not found; install it or pass --template with a real .m4a")
+
+    data_dir = Path(tempfile.mkdtemp(prefix="songripper-load-"))
+    if opts.template is None:
+        opts.template = make_template(data_dir / "template.m4a")
+    opts.template = opts.template.resolve()
+    # settings are read at import time, so configure them first.
+    os.environ["DATA_DIR"] = str(data_dir)
+    os.environ["NAS_PATH"] = str(data_dir / "nas")
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT / "src"))
+
+    port = free_port()
+    server, thread = start_server(port)
+    endpoints = opts.endpoints.split(",")
+    results = []
+    try:
+        for size in [int(s) for s in opts.tracks.split(",")]:
+            staging = data_dir / "staging"
+            shutil.rmtree(staging, ignore_errors=True)
+            t0 = time.perf_counter()
+            tracks = generate_tree(staging, size, opts.template, opts.cover_bytes)
+            generated = time.perf_counter() - t0
+            report = run_load(port, endpoints, tracks, opts.clients, opts.duration, opts.requests)
+            results.append({"tracks": size, "generate_s": generated, "endpoints": report})
+            for name, r in report.items():
+                print(
+                    f"tracks={size:<6} {name:<9} {r['requests']:>6} req "
+                    f"{r['throughput_rps'] or 0:>8.1f} req/s "
+                    f"p50={r['latency_p50_s'] or 0:.3f}s p99={r['latency_p99_s'] or 0:.3f}s "
+                    f"size={(r['response_bytes_mean'] or 0) / 1024:.0f}KiB errors={r['errors']}"
+                )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    opts.output.write_text(json.dumps({
+        "benchmark": "staging-load",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: str(v) for k, v in vars(opts).items() if k != "output"},
+        "results": results,
+    }, indent=2))
+    print(f"Wrote {opts.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
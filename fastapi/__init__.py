@@ -1,3 +1,4 @@
+import asyncio
 import types
 import inspect
 
@@ -10,6 +11,12 @@ class FastAPI:
         return deco
     def mount(self, *a, **kw):
         pass
+    def add_middleware(self, *a, **kw):
+        pass
+    def on_event(self, *a, **kw):
+        def deco(fn):
+            return fn
+        return deco
     def get(self, path, **kw):
         def deco(fn):
             self.routes["GET"][path] = fn
@@ -56,6 +63,39 @@ class HTMLResponse:
         self.status_code = status_code
         self.headers = headers or {}
 
+class Response(HTMLResponse):
+    def __init__(self, content=b"", status_code=200, headers=None, media_type=None):
+        super().__init__(content, status_code, headers)
+        self.body = content
+        self.media_type = media_type
+
+class StreamingResponse(HTMLResponse):
+    def __init__(self, content, status_code=200, headers=None, media_type=None):
+        super().__init__("", status_code, headers)
+        self.body_iterator = content
+        self.media_type = media_type
+        self._consumed = None
+    @property
+    def text(self):
+        if self._consumed is None:
+            chunks = self.body_iterator
+            if hasattr(chunks, "__aiter__"):
+                async def collect():
+                    return [c async for c in self.body_iterator]
+                chunks = asyncio.run(collect())
+            self._consumed = "".join(
+                c.decode() if isinstance(c, bytes) else c for c in chunks
+            )
+        return self._consumed
+    @text.setter
+    def text(self, value):
+        pass
+
+class FileResponse(Response):
+    def __init__(self, path, status_code=200, headers=None, media_type=None, stat_result=None):
+        super().__init__(b"", status_code, headers, media_type)
+        self.path = path
+
 class RedirectResponse(HTMLResponse):
     def __init__(self, url, status_code=307):
         super().__init__("", status_code)
@@ -64,12 +104,19 @@ class RedirectResponse(HTMLResponse):
 class Jinja2Templates:
     def __init__(self, directory):
         self.directory = directory
+        try:
+            import jinja2
+            self.env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(directory), autoescape=True
+            )
+        except ImportError:
+            self.env = None
     def TemplateResponse(self, name, context, status_code=200):
         return HTMLResponse(context.get("message", ""), status_code=status_code)
 
 class StaticFiles:
     def __init__(self, directory, name=None):
-        pass
+        self.directory = directory
 
 class TestClient:
     def __init__(self, app):
@@ -115,8 +162,12 @@ class TestClient:
                 elif not isinstance(val, list):
                     kwargs[name] = [val]
         if sig.parameters and list(sig.parameters.keys())[0] == "request":
-            return func(Request(headers), **kwargs)
-        return func(**kwargs)
+            result = func(Request(headers), **kwargs)
+        else:
+            result = func(**kwargs)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        return result
     def post(self, path, data=None, headers=None, files=None):
         return self._call("POST", path, data, headers, files)
     def put(self, path, data=None, headers=None, files=None):
@@ -130,6 +181,9 @@ TestClient.__test__ = False
 responses = types.ModuleType("fastapi.responses")
 responses.HTMLResponse = HTMLResponse
 responses.RedirectResponse = RedirectResponse
+responses.Response = Response
+responses.StreamingResponse = StreamingResponse
+responses.FileResponse = FileResponse
 
 templating = types.ModuleType("fastapi.templating")
 templating.Jinja2Templates = Jinja2Templates
@@ -137,6 +191,18 @@ templating.Jinja2Templates = Jinja2Templates
 staticfiles = types.ModuleType("fastapi.staticfiles")
 staticfiles.StaticFiles = StaticFiles
 
+class GZipMiddleware:
+    def __init__(self, app, minimum_size=500, compresslevel=9):
+        self.app = app
+        self.minimum_size = minimum_size
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+middleware = types.ModuleType("fastapi.middleware")
+gzip_middleware = types.ModuleType("fastapi.middleware.gzip")
+gzip_middleware.GZipMiddleware = GZipMiddleware
+middleware.gzip = gzip_middleware
+
 testclient = types.ModuleType("fastapi.testclient")
 testclient.TestClient = TestClient
 
@@ -159,3 +225,5 @@ sys.modules.setdefault("fastapi.responses", responses)
 sys.modules.setdefault("fastapi.templating", templating)
 sys.modules.setdefault("fastapi.staticfiles", staticfiles)
 sys.modules.setdefault("fastapi.testclient", testclient)
+sys.modules.setdefault("fastapi.middleware", middleware)
+sys.modules.setdefault("fastapi.middleware.gzip", gzip_middleware)
@@ -0,0 +1,4 @@
+# src/songripper/__main__.py
+from .cli import main
+
+raise SystemExit(main())
@@ -1,46 +1,113 @@
 # src/songripper/api.py
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
 from pathlib import Path
-from datetime import datetime
-from fastapi.responses import HTMLResponse, RedirectResponse
+import asyncio
+import json
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 import traceback
+from urllib.parse import parse_qs
 from .worker import (
-    rip_playlist,
+    rip_playlist_async,
     approve_all,
     approve_selected as worker_approve_selected,
     delete_staging,
     staging_has_files,
-    list_staged_tracks,
     TrackUpdateError,
 )
-from .settings import CACHE_BUSTER, DATA_DIR
+from .assets import DynamicGZipMiddleware, PrecompressedStaticFiles
+from .settings import (
+    CACHE_BUSTER,
+    DATA_DIR,
+    ERROR_LOG_BACKUPS,
+    ERROR_LOG_MAX_BYTES,
+    GZIP_MIN_SIZE,
+    LIBRARY_PAGE_SIZE,
+)
+from .services import errorlog
+from .services.metrics import REGISTRY as METRICS
 from . import PACKAGE_TIME
 from . import worker
 app = FastAPI()
 
 ERROR_LOG_PATH = DATA_DIR / "logs" / "errors.log"
+ERROR_LOG = errorlog.ErrorLog(ERROR_LOG_PATH, ERROR_LOG_MAX_BYTES, ERROR_LOG_BACKUPS)
+
+
+def log_error(message: str, **fields) -> None:
+    """Queue a JSON error record (``route``, ``job_id``, ...) for the shared log file."""
+    ERROR_LOG.write(message, ERROR_LOG_PATH, **fields)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_STORE = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+
+def cache_headers(path: str, versioned: bool) -> dict[str, str]:
+    """Return the caching headers for a response to ``path``.
+
+    Static assets and covers requested with a ``v`` query parameter change
+    URL whenever their content does (``CACHE_BUSTER``, cover hash), so they
+    can be cached forever.
+    """
+    if versioned and (path.startswith("/static/") or path == "/cover"):
+        return {"Cache-Control": IMMUTABLE}
+    if path.startswith("/static/"):
+        return {"Cache-Control": "no-cache"}
+    return NO_STORE
+
+
+class CacheHeadersMiddleware:
+    """Set ``cache_headers`` on every HTTP response.
+
+    A plain ASGI middleware rather than ``@app.middleware("http")``: that
+    re-streams each body as several chunks, which makes the gzip middleware
+    compress even responses below ``GZIP_MIN_SIZE``.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        extra = cache_headers(scope["path"], "v" in query)
+        names = {name.lower().encode("latin-1") for name in extra}
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in names]
+                headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in extra.items()]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
-def log_error(message: str) -> None:
-    """Append an error message to the shared log file."""
+@app.on_event("startup")
+def start_background_tasks():
+    worker.start_scheduler()
+    worker.start_hasher()
+    worker.start_library_indexer()
+    worker.start_fingerprint_indexer()
 
-    ERROR_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().isoformat(timespec="seconds")
-    entry = f"[{timestamp}]\n{message.rstrip()}\n\n"
-    with ERROR_LOG_PATH.open("a", encoding="utf-8") as fh:
-        fh.write(entry)
 
-@app.middleware("http")
-async def add_no_cache_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    return response
+@app.on_event("shutdown")
+def stop_background_tasks():
+    worker.stop_scheduler()
+    worker.stop_hasher()
+    worker.stop_library_indexer()
+    worker.stop_fingerprint_indexer()
 
-app.mount("/static", StaticFiles(directory="src/songripper/static"), name="static")
+# Middleware added last runs first: gzip sees each response as its route sent it.
+app.add_middleware(DynamicGZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+app.add_middleware(CacheHeadersMiddleware)
+app.mount("/static", PrecompressedStaticFiles(directory="src/songripper/static"), name="static")
 templates = Jinja2Templates(directory="src/songripper/templates")
 
 @app.get("/", response_class=HTMLResponse)
@@ -57,34 +124,183 @@ def home(request: Request, msg: str | None = None):
 
 
 @app.get("/logs/error")
-def get_error_log():
-    if not ERROR_LOG_PATH.exists():
+def get_error_log(
+    request: Request,
+    tail: int | None = None,
+    job_id: int | None = None,
+    route: str | None = None,
+):
+    """Stream the error log; ``tail`` keeps the last N records after filtering.
+
+    A ``Range: bytes=...`` request returns that slice of the raw file.
+    """
+    if tail is not None and tail < 0:
+        raise HTTPException(status_code=400, detail="tail must not be negative")
+    path = ERROR_LOG_PATH
+    if not path.exists():
         raise HTTPException(status_code=404, detail="No error log available")
-    content = ERROR_LOG_PATH.read_text(encoding="utf-8")
-    headers = {"Content-Type": "text/plain; charset=utf-8"}
-    return HTMLResponse(content, headers=headers)
+    media_type = "text/plain; charset=utf-8"
+    filters = {k: v for k, v in (("job_id", job_id), ("route", route)) if v is not None}
+    range_header = request.headers.get("Range")
+    if range_header and not filters and tail is None:
+        size = path.stat().st_size
+        span = errorlog.parse_range(range_header, size)
+        if span is None:
+            headers = {"Content-Range": f"bytes */{size}"}
+            return HTMLResponse("", status_code=416, headers=headers)
+        start, end = span
+        headers = {"Content-Range": f"bytes {start}-{end}/{size}", "Accept-Ranges": "bytes"}
+        return StreamingResponse(
+            errorlog.read_bytes(path, start, end),
+            status_code=206,
+            headers=headers,
+            media_type=media_type,
+        )
+    if filters:
+        body = errorlog.filter_lines(path, filters, tail)
+    elif tail is not None:
+        body = iter(errorlog.tail_lines(path, tail))
+    else:
+        body = errorlog.read_bytes(path)
+    return StreamingResponse(body, headers={"Accept-Ranges": "bytes"}, media_type=media_type)
 
 @app.post("/rip")
-def rip(request: Request, youtube_url: str = Form(...)):
+async def rip(request: Request, youtube_url: str = Form(...), job_id: int | None = Form(None)):
+    # A job created by POST /jobs is followed live over /jobs/events, which
+    # adds the new rows itself, so the staging list is not refreshed.
+    job = worker.get_job(int(job_id)) if job_id is not None else None
+    streamed = job is not None
+    job = job or worker.create_job(youtube_url)
     try:
-        rip_playlist(youtube_url)
+        status = await rip_playlist_async(youtube_url, job=job)
     except Exception:
         stack = traceback.format_exc()
-        log_error(f"/rip failed for {youtube_url}\n{stack}")
+        log_error(f"/rip failed for {youtube_url}\n{stack}", route="/rip", job_id=job.id)
         if request.headers.get("Hx-Request"):
             context = {"request": request, "message": stack}
             return templates.TemplateResponse("message.html", context, status_code=500)
         raise HTTPException(status_code=500, detail=stack)
+    if status != "done":
+        report = job.report()
+        log_error(
+            f"/rip finished with failures for {youtube_url}\n{report}",
+            route="/rip",
+            job_id=job.id,
+        )
+        status_code = 500 if status == "failed" else 200
+        if request.headers.get("Hx-Request"):
+            context = {"request": request, "message": report}
+            response = templates.TemplateResponse("message.html", context, status_code=status_code)
+            response.headers["HX-Retarget"] = "#alerts"
+            response.headers["HX-Reswap"] = "innerHTML"
+            if not streamed:
+                response.headers["HX-Trigger"] = "refreshStaging"
+            return response
+        if status == "failed":
+            raise HTTPException(status_code=500, detail=report)
+        msg = f"{len(job.succeeded)} of {len(job.items)} tracks ripped"
+        return RedirectResponse(f"/?msg={msg.replace(' ', '+')}", status_code=303)
     if request.headers.get("Hx-Request"):
-        return HTMLResponse("", status_code=204, headers={"HX-Trigger": "refreshStaging"})
+        headers = {} if streamed else {"HX-Trigger": "refreshStaging"}
+        return HTMLResponse("", status_code=204, headers=headers)
     return RedirectResponse("/", status_code=303)
 
+
+@app.post("/jobs")
+def new_job(youtube_url: str = Form(...)):
+    """Create a job up front so its events can be watched before /rip starts."""
+    return {"id": worker.create_job(youtube_url).id}
+
+
+@app.get("/jobs")
+def jobs(request: Request, job_id: int | None = None):
+    if job_id is None:
+        recent = worker.list_jobs()
+        if request.headers.get("Hx-Request"):
+            context = {"request": request, "jobs": recent}
+            return templates.TemplateResponse("jobs.html", context)
+        return [
+            {k: v for k, v in job.to_dict().items() if k != "items"}
+            for job in recent
+        ]
+    return _get_job(job_id).to_dict()
+
+
+def _get_job(job_id):
+    job = worker.get_job(int(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+def _render_track_row(filepath: str) -> str:
+    """Render one staging table row with the ``track_row`` macro of staging.html."""
+    module = templates.env.get_template("staging.html").module
+    return str(module.track_row(worker.staged_track(filepath)))
+
+
+async def _job_event_stream(job_id: int):
+    async for event in worker.job_events(job_id):
+        if event is None:
+            yield b": keepalive\n\n"
+            continue
+        data = event.data
+        if event.kind == "track" and templates.env is not None:
+            html = await asyncio.to_thread(_render_track_row, data["path"])
+            data = {**data, "html": html}
+        yield f"id: {event.seq}\nevent: {event.kind}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+@app.get("/jobs/events")
+def job_events(job_id: int):
+    job = _get_job(job_id)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(
+        _job_event_stream(job.id), media_type="text/event-stream", headers=headers
+    )
+
+
+@app.get("/jobs/trace")
+def job_trace(job_id: int):
+    job = _get_job(job_id)
+    if job.trace is None:
+        raise HTTPException(status_code=404, detail="Tracing was disabled for this job")
+    return job.trace.to_chrome()
+
+
+@app.get("/jobs/timeline", response_class=HTMLResponse)
+def job_timeline(request: Request, job_id: int):
+    job = _get_job(job_id)
+    spans = job.trace.waterfall() if job.trace is not None else []
+    context = {"request": request, "job": job, "spans": spans, "v": CACHE_BUSTER}
+    return templates.TemplateResponse("timeline.html", context)
+
+
+@app.get("/jobs/resources")
+def job_resources(job_id: int):
+    usage = worker.job_resources(int(job_id))
+    if usage is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return usage
+
+
+@app.get("/metrics")
+def metrics():
+    headers = {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    return HTMLResponse(METRICS.render(), headers=headers)
+
+
+@app.get("/concurrency")
+def concurrency():
+    return worker.download_concurrency()
+
+
 @app.post("/approve")
 def approve(request: Request):
     try:
         approve_all()
     except Exception as exc:
-        log_error(f"/approve failed\n{exc}")
+        log_error(f"/approve failed\n{exc}", route="/approve")
         if request.headers.get("Hx-Request"):
             context = {"request": request, "message": str(exc)}
             return templates.TemplateResponse("message.html", context, status_code=500)
@@ -99,7 +315,7 @@ def approve_selected(request: Request, track: list[str] = Form([])):
     try:
         worker_approve_selected(track)
     except Exception as exc:
-        log_error(f"/approve-selected failed\nTracks: {track}\n{exc}")
+        log_error(f"/approve-selected failed\nTracks: {track}\n{exc}", route="/approve-selected")
         if request.headers.get("Hx-Request"):
             context = {"request": request, "message": str(exc)}
             return templates.TemplateResponse("message.html", context, status_code=500)
@@ -124,11 +340,32 @@ def delete(request: Request):
     return RedirectResponse(f"/?msg={msg.replace(' ', '+')}", status_code=303)
 
 
+def _buffered(parts, size: int = 16384):
+    """Join the many small strings from ``Template.generate`` into larger chunks."""
+    buf: list[str] = []
+    length = 0
+    for part in parts:
+        buf.append(part)
+        length += len(part)
+        if length >= size:
+            yield "".join(buf).encode("utf-8")
+            buf, length = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def stream_template(name: str, context: dict) -> StreamingResponse:
+    """Render ``name`` incrementally; ``context`` may contain generators."""
+    template = templates.env.get_template(name)
+    return StreamingResponse(
+        _buffered(template.generate(context)), media_type="text/html; charset=utf-8"
+    )
+
+
 @app.get("/staging", response_class=HTMLResponse)
-def staging(req: Request):
-    tracks = list_staged_tracks()
-    context = {"request": req, "tracks": tracks}
-    return templates.TemplateResponse("staging.html", context)
+def staging(request: Request):
+    context = {"request": request, "tracks": worker.iter_staged_tracks()}
+    return stream_template("staging.html", context)
 
 @app.get("/edit", response_class=HTMLResponse)
 def edit_form(filepath: str, field: str):
@@ -144,6 +381,18 @@ def edit_form(filepath: str, field: str):
     return HTMLResponse(html)
 
 
+@app.get("/cover")
+def cover(filepath: str):
+    try:
+        art = worker.track_cover(filepath)
+    except TrackUpdateError:
+        art = None
+    if art is None:
+        raise HTTPException(status_code=404, detail="No cover art")
+    data, mime = art
+    return Response(data, media_type=mime)
+
+
 @app.put("/edit")
 def edit(filepath: str = Form(...), field: str = Form(...), value: str = Form(...)):
     try:
@@ -178,28 +427,18 @@ def edit_multiple(
     if art_enable and art_file is not None and art_file.filename:
         art_bytes = art_file.file.read()
         art_mime = art_file.content_type or "image/jpeg"
-    for path in track:
-        p = path
-        if artist_enable:
-            try:
-                p = str(worker.update_track(p, "artist", artist_value))
-            except TrackUpdateError as exc:
-                return HTMLResponse(str(exc), status_code=400)
-        if album_enable:
-            try:
-                p = str(worker.update_track(p, "album", album_value))
-            except TrackUpdateError as exc:
-                return HTMLResponse(str(exc), status_code=400)
-        if title_enable:
-            try:
-                p = str(worker.update_track(p, "title", title_value))
-            except TrackUpdateError as exc:
-                return HTMLResponse(str(exc), status_code=400)
-        if art_enable and art_bytes is not None:
-            try:
-                worker.update_album_art(p, art_bytes, art_mime)
-            except TrackUpdateError as exc:
-                return HTMLResponse(str(exc), status_code=400)
+    changes = {}
+    if artist_enable:
+        changes["artist"] = artist_value
+    if album_enable:
+        changes["album"] = album_value
+    if title_enable:
+        changes["title"] = title_value
+    if track and (changes or art_bytes is not None):
+        try:
+            worker.update_tracks(track, changes, art_bytes, art_mime)
+        except TrackUpdateError as exc:
+            return HTMLResponse(str(exc), status_code=400)
     if request.headers.get("Hx-Request"):
         resp = HTMLResponse("", status_code=204)
         resp.headers["HX-Trigger"] = "refreshStaging"
@@ -207,6 +446,76 @@ def edit_multiple(
     return RedirectResponse("/", status_code=303)
 
 
+MAX_LIBRARY_PAGE = 500
+
+
+def _library_page(
+    request: Request, route: str, view: str, fetch, page: int, per_page: int | None, **query
+):
+    """Return a page of the library index as JSON, or as library.html for htmx."""
+    per_page = min(max(1, per_page or LIBRARY_PAGE_SIZE), MAX_LIBRARY_PAGE)
+    result = fetch(page=max(1, page), per_page=per_page)
+    if request.headers.get("Hx-Request"):
+        context = {
+            "request": request,
+            "route": route,
+            "view": view,
+            "page": result,
+            "query": {**query, "per_page": per_page},
+        }
+        return templates.TemplateResponse("library.html", context)
+    return result.to_dict()
+
+
+@app.get("/library/artists")
+def library_artists(request: Request, page: int = 1, per_page: int | None = None):
+    return _library_page(
+        request, "/library/artists", "artists", worker.library_artists, page, per_page
+    )
+
+
+@app.get("/library/albums")
+def library_albums(request: Request, artist: str, page: int = 1, per_page: int | None = None):
+    def fetch(**kw):
+        return worker.library_albums(artist, **kw)
+
+    return _library_page(
+        request, "/library/albums", "albums", fetch, page, per_page, artist=artist
+    )
+
+
+@app.get("/library/tracks")
+def library_tracks(
+    request: Request, artist: str, album: str, page: int = 1, per_page: int | None = None
+):
+    def fetch(**kw):
+        return worker.library_tracks(artist, album, **kw)
+
+    return _library_page(
+        request, "/library/tracks", "tracks", fetch, page, per_page, artist=artist, album=album
+    )
+
+
+@app.get("/library/search")
+def library_search(
+    request: Request,
+    q: str = "",
+    field: str = "any",
+    page: int = 1,
+    per_page: int | None = None,
+):
+    """Tracks whose artist, album or title starts with ``q``, or matching its words (``any``)."""
+    if field not in ("any", "artist", "album", "title"):
+        raise HTTPException(status_code=400, detail=f"Unknown search field {field}")
+
+    def fetch(**kw):
+        return worker.search_library(q, field, **kw)
+
+    return _library_page(
+        request, "/library/search", "tracks", fetch, page, per_page, q=q, field=field
+    )
+
+
 @app.post("/update-ytdlp")
 def update_ytdlp_endpoint(request: Request):
     try:
@@ -214,7 +523,7 @@ def update_ytdlp_endpoint(request: Request):
         msg = f"yt-dlp updated successfully:\n{output}"
     except Exception as exc:
         msg = f"Failed to update yt-dlp:\n{exc}"
-        log_error(msg)
+        log_error(msg, route="/update-ytdlp")
         if request.headers.get("Hx-Request"):
             context = {"request": request, "message": msg}
             return templates.TemplateResponse("message.html", context, status_code=500)
@@ -238,3 +547,61 @@ def check_duplicates(request: Request, filepath: str):
         context = {"request": request, "message": msg}
         return templates.TemplateResponse("message.html", context)
     return RedirectResponse(f"/?msg={msg.replace(' ', '+')}", status_code=303)
+
+
+@app.get("/subscriptions", response_class=HTMLResponse)
+def subscriptions(req: Request):
+    context = {"request": req, "subscriptions": worker.list_subscriptions()}
+    return templates.TemplateResponse("subscriptions.html", context)
+
+
+@app.post("/subscriptions")
+def add_subscription(
+    request: Request,
+    playlist_url: str = Form(...),
+    interval_hours: float = Form(168),
+    rip_existing: str | None = Form(None),
+):
+    try:
+        worker.add_subscription(
+            playlist_url, float(interval_hours) * 3600, bool(rip_existing)
+        )
+    except Exception as exc:
+        log_error(f"/subscriptions failed for {playlist_url}\n{exc}", route="/subscriptions")
+        if request.headers.get("Hx-Request"):
+            context = {"request": request, "message": str(exc)}
+            return templates.TemplateResponse("message.html", context, status_code=500)
+        raise HTTPException(status_code=500, detail=str(exc))
+    if request.headers.get("Hx-Request"):
+        return HTMLResponse("", status_code=204, headers={"HX-Trigger": "refreshSubscriptions"})
+    return RedirectResponse("/", status_code=303)
+
+
+@app.post("/subscriptions/delete")
+def delete_subscription(request: Request, sub_id: str = Form(...)):
+    worker.remove_subscription(sub_id)
+    if request.headers.get("Hx-Request"):
+        return HTMLResponse("", status_code=204, headers={"HX-Trigger": "refreshSubscriptions"})
+    return RedirectResponse("/", status_code=303)
+
+
+@app.post("/subscriptions/sync")
+def sync_subscription(request: Request, sub_id: str = Form(...)):
+    try:
+        count = worker.sync_subscription(sub_id)
+        msg = f"{count} new track(s) found"
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown subscription")
+    except Exception as exc:
+        msg = f"Subscription sync failed:\n{exc}"
+        log_error(msg, route="/subscriptions/sync", subscription=sub_id)
+        if request.headers.get("Hx-Request"):
+            context = {"request": request, "message": msg}
+            return templates.TemplateResponse("message.html", context, status_code=500)
+        raise HTTPException(status_code=500, detail=msg)
+    if request.headers.get("Hx-Request"):
+        context = {"request": request, "message": msg}
+        response = templates.TemplateResponse("message.html", context)
+        response.headers["HX-Trigger-After-Swap"] = "refreshSubscriptions, refreshStaging"
+        return response
+    return RedirectResponse(f"/?msg={msg.replace(' ', '+')}", status_code=303)
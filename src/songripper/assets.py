@@ -0,0 +1,150 @@
+# src/songripper/assets.py
+"""Precompressed static assets.
+
+``python -m songripper.assets [DIR]`` writes ``.gz`` (and, when the
+``brotli`` package is installed, ``.br``) siblings of the text assets in
+``DIR`` at build time.  ``PrecompressedStaticFiles`` serves the best variant
+the client accepts with ``Content-Encoding`` and ``Vary: Accept-Encoding``
+and falls back to the plain file otherwise.  ``DynamicGZipMiddleware``
+compresses everything else on the fly, except event streams and
+range requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import mimetypes
+import stat
+import sys
+from pathlib import Path
+
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+COMPRESSIBLE = {".css", ".js", ".html", ".svg", ".json", ".txt"}
+# Preferred first.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompress(directory: Path) -> list[Path]:
+    """Write compressed variants of the assets in ``directory`` and return them.
+
+    Variants newer than their source are kept, and a variant that would not
+    be smaller than the source is not written.
+    """
+    brotli = _brotli()
+    written = []
+    for src in sorted(Path(directory).rglob("*")):
+        if not src.is_file() or src.suffix not in COMPRESSIBLE:
+            continue
+        data = None
+        for encoding, suffix in ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            dest = src.with_name(src.name + suffix)
+            if dest.exists() and dest.stat().st_mtime >= src.stat().st_mtime:
+                continue
+            if data is None:
+                data = src.read_bytes()
+            if encoding == "br":
+                packed = brotli.compress(data, quality=11)
+            else:
+                # mtime=0 keeps the output reproducible between builds.
+                packed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(packed) >= len(data):
+                dest.unlink(missing_ok=True)
+                continue
+            dest.write_bytes(packed)
+            written.append(dest)
+    return written
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Return the codings allowed by an ``Accept-Encoding`` header (``q=0`` excluded)."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` serving the ``.br``/``.gz`` variants written by ``precompress``."""
+
+    async def get_response(self, path: str, scope):
+        compressible = Path(path).suffix in COMPRESSIBLE
+        if compressible and scope["method"] in ("GET", "HEAD"):
+            header = dict(scope.get("headers") or []).get(b"accept-encoding", b"")
+            accepted = accepted_encodings(header.decode("latin-1"))
+            for encoding, suffix in ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await asyncio.to_thread(
+                    self.lookup_path, path + suffix
+                )
+                if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                    media_type = mimetypes.guess_type(path)[0] or "text/plain"
+                    return FileResponse(
+                        full_path,
+                        stat_result=stat_result,
+                        media_type=media_type,
+                        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                    )
+        response = await super().get_response(path, scope)
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+class DynamicGZipMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` that leaves static files, covers, Server-Sent Events
+    and range requests alone.
+
+    Static files are precompressed, cover images are already compressed and
+    gzip would buffer an event stream until it ends.  A ``206`` answer to a
+    ``Range`` request carries a ``Content-Range`` of the uncompressed bytes,
+    which a compressed body would contradict.
+    """
+
+    SKIP_PREFIXES = ("/static/", "/cover", "/jobs/events")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (
+            scope["path"].startswith(self.SKIP_PREFIXES)
+            or any(name.lower() == b"range" for name, _ in scope.get("headers") or [])
+        ):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    directory = Path(argv[0]) if argv else Path(__file__).parent / "static"
+    for path in precompress(directory):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+# src/songripper/cli.py
+"""Headless batch ripping: ``python -m songripper URLS_FILE``.
+
+URLs are read one per line from a file or stdin (blank lines and ``#``
+comments are skipped) and ripped through ``RipperService`` into staging,
+``--concurrency`` URLs at a time.  The same number also caps the downloads
+in flight across all of them.
+
+After every URL a JSON report is rewritten with its status, timings,
+per-item results and the staged (or approved) paths.  ``--resume`` reads
+an existing report and only runs the URLs that did not finish; for a
+partially ripped playlist only its failed items are retried.
+``--approve`` moves the ripped tracks into the library once the rips are
+done, and ``--dry-run`` only lists what each URL would rip.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, TextIO
+
+from .services.concurrency import AIMDLimiter
+from .services.ripper_service import RipperService
+from .settings import RIP_CONCURRENCY_INITIAL, RIP_CONCURRENCY_MAX, RIP_CONCURRENCY_MIN
+
+REPORT_VERSION = 1
+# URL statuses that need no further work in a resumed run.
+FINISHED = {"done", "planned"}
+
+
+def read_urls(lines: Iterable[str]) -> list[str]:
+    """Return the URLs of ``lines`` in order, without blanks, comments or repeats."""
+    urls: list[str] = []
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith("#") and url not in urls:
+            urls.append(url)
+    return urls
+
+
+class Report:
+    """Per-URL results of a batch, saved atomically as JSON after each change."""
+
+    def __init__(self, path: Path, mode: str) -> None:
+        self.path = Path(path)
+        self.mode = mode
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, mode: str) -> "Report":
+        report = cls(path, mode)
+        data = json.loads(Path(path).read_text())
+        if data.get("version") != REPORT_VERSION:
+            raise ValueError(f"Unsupported report version in {path}")
+        report.started = data.get("started", report.started)
+        for entry in data.get("urls", []):
+            if entry.get("status") == "running":
+                entry["status"] = "pending"  # interrupted mid-rip
+            if entry.get("status") == "planned" and mode != "dry-run":
+                entry["status"] = "pending"
+            report.entries[entry["url"]] = entry
+        return report
+
+    def entry(self, url: str) -> dict:
+        with self._lock:
+            return self.entries.setdefault(url, {"url": url, "status": "pending"})
+
+    def update(self, url: str, **fields) -> None:
+        with self._lock:
+            self.entries[url].update(fields)
+        self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "version": REPORT_VERSION,
+                "mode": self.mode,
+                "started": self.started,
+                "finished": self.finished,
+                "urls": list(self.entries.values()),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, indent=2))
+            os.replace(tmp, self.path)
+
+    def summary(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        with self._lock:
+            for entry in self.entries.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+def _retry_entries(entry: dict) -> Optional[list[dict]]:
+    """Playlist entries of the failed items of a partial rip, or ``None`` to rerun the URL."""
+    if entry.get("status") != "partial":
+        return None
+    failed = [i["url"] for i in entry.get("items", []) if i.get("status") != "done"]
+    prefix = "https://youtu.be/"
+    if not failed or not all(u.startswith(prefix) for u in failed):
+        return None
+    return [{"id": u[len(prefix):]} for u in failed]
+
+
+def _plan(service: RipperService, url: str, report: Report) -> None:
+    started = time.time()
+    report.update(url, status="running", started=started, error=None)
+    try:
+        info = service.enumerate_playlist(url)
+    except Exception as exc:
+        report.update(url, status="failed", error=str(exc), finished=time.time())
+        return
+    entries = info.get("entries")
+    items = [service._entry_url(e) for e in entries] if entries else [url]
+    finished = time.time()
+    report.update(
+        url,
+        status="planned",
+        title=info.get("title"),
+        items=[{"url": u, "status": "planned"} for u in items],
+        finished=finished,
+        seconds=round(finished - started, 3),
+    )
+
+
+def _rip(service: RipperService, url: str, report: Report) -> None:
+    previous = report.entry(url)
+    retry = _retry_entries(previous)
+    kept = [i for i in previous.get("items", []) if i.get("status") == "done"] if retry else []
+    started = time.time()
+    report.update(url, status="running", started=started, error=None)
+    job = service.jobs.create(url)
+    try:
+        service.rip_playlist(url, entries=retry, job=job)
+        error = None
+    except Exception as exc:
+        error = str(exc)
+    items = kept + [
+        {
+            "url": i.url,
+            "status": i.status,
+            "attempts": i.attempts,
+            "error": i.error,
+            "tracks": i.tracks,
+            "seconds": round(i.finished - i.started, 3) if i.started and i.finished else None,
+        }
+        for i in job.items
+    ]
+    if error is not None or not items:
+        status = "failed"
+    elif all(i["status"] == "done" for i in items):
+        status = "done"
+    elif any(i["status"] == "done" for i in items):
+        status = "partial"
+    else:
+        status = "failed"
+    finished = time.time()
+    report.update(
+        url,
+        status=status,
+        error=error,
+        items=items,
+        tracks=[t for i in items for t in i.get("tracks") or []],
+        finished=finished,
+        seconds=round(finished - started, 3),
+    )
+
+
+def _approve(service: RipperService, report: Report) -> None:
+    """Move the staged tracks of every ripped URL into the library."""
+    for url, entry in list(report.entries.items()):
+        staged = [t for t in entry.get("tracks", []) if Path(t).exists()]
+        if not staged:
+            continue
+        approved = service.approve_selected(staged)
+        report.update(
+            url,
+            approved=sorted(set(entry.get("approved", [])) | {str(p) for p in approved}),
+        )
+
+
+def run_batch(
+    urls: list[str],
+    service: RipperService,
+    report: Report,
+    *,
+    concurrency: int = RIP_CONCURRENCY_MAX,
+    dry_run: bool = False,
+    approve: bool = False,
+    log: Optional[TextIO] = None,
+) -> Report:
+    """Rip (or with ``dry_run`` plan) ``urls`` into ``report`` and return it."""
+    log = log or sys.stderr
+    concurrency = max(1, concurrency)
+    service.download_limiter = AIMDLimiter(
+        min(RIP_CONCURRENCY_INITIAL, concurrency),
+        min(RIP_CONCURRENCY_MIN, concurrency),
+        concurrency,
+    )
+    todo = [u for u in urls if report.entry(u)["status"] not in FINISHED]
+    report.save()
+    done = len(urls) - len(todo)
+    if done:
+        print(f"Skipping {done} finished URL(s) from {report.path}", file=log)
+    work = _plan if dry_run else _rip
+    count = [done]
+    lock = threading.Lock()
+
+    def run(url: str) -> None:
+        work(service, url, report)
+        entry = report.entry(url)
+        with lock:
+            count[0] += 1
+            position = count[0]
+        print(
+            f"[{position}/{len(urls)}] {entry['status']:<7} {url} "
+            f"({entry.get('seconds', 0):.1f}s, {len(entry.get('items', []))} item(s))",
+            file=log,
+        )
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for future in concurrent.futures.as_completed([pool.submit(run, u) for u in todo]):
+            future.result()
+    except KeyboardInterrupt:
+        # Rips already running still finish and record their result.
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    if approve and not dry_run:
+        _approve(service, report)
+    report.finished = time.time()
+    report.save()
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m songripper",
+        description="Rip a batch of YouTube playlist or video URLs into staging.",
+    )
+    parser.add_argument(
+        "urls", nargs="?", default="-", help="file with one URL per line (default: stdin)"
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=RIP_CONCURRENCY_MAX,
+        help="URLs ripped, and downloads run, at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-r", "--report", type=Path, default=Path("songripper-report.json"),
+        help="JSON report written after every URL (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip URLs the report lists as done and retry the failed items of the rest",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--approve", action="store_true", help="move the ripped tracks into the library"
+    )
+    mode.add_argument(
+        "--dry-run", action="store_true", help="only list the items each URL would rip"
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None, *, service: Optional[RipperService] = None) -> int:
+    """Run the CLI and return the exit status: 0 when every URL finished, else 1."""
+    args = build_parser().parse_args(argv)
+    if args.urls == "-":
+        urls = read_urls(sys.stdin)
+    else:
+        with open(args.urls, encoding="utf-8") as fh:
+            urls = read_urls(fh)
+    mode = "dry-run" if args.dry_run else "approve" if args.approve else "rip"
+    if args.resume and args.report.exists():
+        report = Report.load(args.report, mode)
+    else:
+        report = Report(args.report, mode)
+    service = service or RipperService()
+    try:
+        run_batch(
+            urls,
+            service,
+            report,
+            concurrency=args.concurrency,
+            dry_run=args.dry_run,
+            approve=args.approve,
+        )
+    except KeyboardInterrupt:
+        report.save()
+        print(f"Interrupted; rerun with --resume to continue from {report.path}", file=sys.stderr)
+        return 130
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(report.summary().items()))
+    print(f"{len(urls)} URL(s): {summary}. Report: {report.path}", file=sys.stderr)
+    return 0 if all(report.entry(u)["status"] in FINISHED for u in urls) else 1
@@ -45,7 +45,11 @@ class Track(SQLModel, table=True):
     filepath: str
     id: Optional[int] = Field(default=None, primary_key=True)
     approved: bool = False
-    # base64 encoded album art from the MP3's ID3 tag.  May be ``None`` when
+    # URL of the album art (``/cover?filepath=...``).  May be ``None`` when
     # no cover image is found or when tag parsing dependencies are missing.
     cover: Optional[str] = None
+    # Length in seconds, when the audio could be parsed.
+    duration: Optional[float] = None
+    # A staged or library file with byte-identical audio, once both are hashed.
+    duplicate: Optional[str] = None
 
@@ -0,0 +1,221 @@
+# src/songripper/services/accounting.py
+"""CPU, wall time and memory accounting for external commands."""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+@dataclass
+class CommandUsage:
+    """Resources used by one child process."""
+
+    command: str
+    stage: str
+    job_id: Optional[int]
+    track: Optional[str]
+    wall: float
+    user: float
+    sys: float
+    # Peak resident set size of the child in KiB.  Linux counts it from the
+    # spawning process's RSS, so it is never below the server's own.
+    max_rss_kb: Optional[int]
+    # ``False`` when the child's own usage was not available (no ``os.wait4``).
+    exact: bool
+
+
+# A context variable rather than a thread-local so that asyncio tasks
+# sharing the event loop thread are attributed separately.
+_context: contextvars.ContextVar[tuple] = contextvars.ContextVar(
+    "usage_context", default=(None, None)
+)
+
+
+@contextmanager
+def usage_context(job=None, track: Optional[str] = None) -> Iterator[None]:
+    """Attribute commands run by this thread or task to ``job`` and ``track``."""
+    token = _context.set((job, track))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def reap(proc: subprocess.Popen):
+    """Wait for ``proc`` with ``os.wait4`` and return its own ``rusage``.
+
+    Returns ``None`` when ``os.wait4`` is unavailable or the child was
+    already reaped by ``proc`` itself; ``proc.returncode`` is set either
+    way.  A child reaped elsewhere before its status reached ``proc``
+    raises ``ChildProcessError``: its exit status is lost and must not be
+    reported as success.
+    """
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        return None
+    while True:
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+            break
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            # ``proc.wait()`` would claim exit status 0 here.
+            if proc.returncode is None:
+                raise ChildProcessError(f"exit status of pid {proc.pid} was lost")
+            return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return usage
+
+
+def run_process(
+    cmd: list[str],
+    *,
+    input=None,
+    capture_output: bool = False,
+    check: bool = False,
+    text: bool = False,
+    stdout=None,
+    stderr=None,
+    **popen_kwargs,
+) -> subprocess.CompletedProcess:
+    """``subprocess.run`` that reaps the child itself to learn its exact usage.
+
+    ``subprocess.run`` waits with ``waitpid``, which discards the child's
+    resource usage; this waits with ``os.wait4`` instead and stores the
+    child's ``rusage`` (or ``None``) on the result as ``rusage``.
+    """
+    if capture_output:
+        stdout = stderr = subprocess.PIPE
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if input is not None else None,
+        stdout=stdout,
+        stderr=stderr,
+        text=text,
+        **popen_kwargs,
+    )
+    err: list = [None]
+
+    def drain_stderr() -> None:
+        with proc.stderr:
+            err[0] = proc.stderr.read()
+
+    try:
+        reader = None
+        if proc.stderr is not None:
+            reader = threading.Thread(target=drain_stderr, daemon=True)
+            reader.start()
+        if proc.stdin is not None:
+            try:
+                proc.stdin.write(input)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        out = None
+        if proc.stdout is not None:
+            with proc.stdout:
+                out = proc.stdout.read()
+        if reader is not None:
+            reader.join()
+    except BaseException:
+        proc.kill()
+        with suppress(ChildProcessError):
+            reap(proc)
+        raise
+    usage = reap(proc)
+    result = subprocess.CompletedProcess(cmd, proc.returncode, out, err[0])
+    result.rusage = usage
+    if check:
+        result.check_returncode()
+    return result
+
+
+def _max_rss_kb(usage) -> int:
+    # ru_maxrss is in KiB on Linux but in bytes on macOS.
+    return int(usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss)
+
+
+class ResourceAccountant:
+    """Record the wall time, CPU and peak memory of each child process.
+
+    Children are reaped with ``os.wait4`` (see ``run_process``), so every
+    record holds that child's own usage even while other commands run.
+    Records are appended to the job in the current ``usage_context`` (its
+    ``usage`` list) or to ``recent`` when no job is active.
+    """
+
+    def __init__(self, keep: int = 500) -> None:
+        self.lock = threading.Lock()
+        self.recent: deque[CommandUsage] = deque(maxlen=keep)
+
+    def run(self, cmd: list[str], stage: str, **kwargs) -> subprocess.CompletedProcess:
+        """Run ``cmd`` like ``subprocess.run`` and record its usage under ``stage``."""
+        start = time.perf_counter()
+        result = run_process(cmd, **kwargs)
+        self.record(cmd, stage, time.perf_counter() - start, getattr(result, "rusage", None))
+        return result
+
+    def record(self, cmd: list[str], stage: str, wall: float, usage=None) -> None:
+        """Record a finished child; ``usage`` is its ``rusage`` from ``os.wait4``."""
+        job, track = _context.get()
+        usage_record = CommandUsage(
+            command=Path(cmd[0]).name,
+            stage=stage,
+            job_id=getattr(job, "id", None),
+            track=track,
+            wall=wall,
+            user=usage.ru_utime if usage is not None else 0.0,
+            sys=usage.ru_stime if usage is not None else 0.0,
+            max_rss_kb=_max_rss_kb(usage) if usage is not None else None,
+            exact=usage is not None,
+        )
+        if job is not None:
+            with job.lock:
+                job.usage.append(usage_record)
+        else:
+            with self.lock:
+                self.recent.append(usage_record)
+
+
+def summarize(usages: list[CommandUsage]) -> dict:
+    """Return per-stage and overall totals for ``usages``.
+
+    Records without the child's own usage (``exact=False``) are counted
+    under ``inexact`` only, so the totals never mix in guessed figures.
+    """
+
+    def empty() -> dict:
+        return {"commands": 0, "wall": 0.0, "user": 0.0, "sys": 0.0, "max_rss_kb": None}
+
+    totals = empty()
+    inexact = empty()
+    by_stage: dict[str, dict] = {}
+    for usage in usages:
+        if usage.exact:
+            buckets = (totals, by_stage.setdefault(usage.stage, empty()))
+        else:
+            buckets = (inexact,)
+        for bucket in buckets:
+            bucket["commands"] += 1
+            bucket["wall"] += usage.wall
+            bucket["user"] += usage.user
+            bucket["sys"] += usage.sys
+            if usage.max_rss_kb is not None:
+                bucket["max_rss_kb"] = max(bucket["max_rss_kb"] or 0, usage.max_rss_kb)
+    return {
+        "totals": totals,
+        "by_stage": by_stage,
+        "inexact": inexact,
+        "commands": [asdict(u) for u in usages],
+    }
@@ -0,0 +1,93 @@
+# src/songripper/services/artwork.py
+"""Normalise cover art before it is stored or embedded.
+
+iTunes covers, YouTube thumbnails (often WebP, 16:9) and user uploads are
+decoded, center-cropped to a square, scaled down to ``max_size`` and
+re-encoded as JPEG.  Results are cached by the SHA-256 of the source bytes
+so an image is processed once and every track embeds the same blob.
+Without Pillow, or for data Pillow cannot decode, images pass through
+unchanged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+
+def sniff_mime(data: bytes, default: str = "image/jpeg") -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+
+class CoverProcessor:
+    """Crop, resize and recompress cover images with a bounded result cache."""
+
+    def __init__(self, max_size: int = 600, quality: int = 90, cache_size: int = 128) -> None:
+        self.max_size = max_size
+        self.quality = quality
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, tuple[bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def process(self, data: bytes, mime: str = "image/jpeg") -> tuple[bytes, str]:
+        """Return the normalised image and its MIME type."""
+        if self.max_size <= 0:
+            return data, sniff_mime(data, mime)
+        key = hashlib.sha256(data).digest()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        result = self._convert(data, mime)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _convert(self, data: bytes, mime: str) -> tuple[bytes, str]:
+        try:
+            from PIL import Image, ImageOps
+        except Exception:
+            return data, sniff_mime(data, mime)
+        try:
+            img = Image.open(io.BytesIO(data))
+            # Let the JPEG decoder downscale while decoding large images.
+            img.draft("RGB", (self.max_size, self.max_size))
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.getchannel("A"))
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            width, height = img.size
+            side = min(width, height)
+            if width != height:
+                left, top = (width - side) // 2, (height - side) // 2
+                img = img.crop((left, top, left + side, top + side))
+            if side > self.max_size:
+                img = img.resize((self.max_size, self.max_size), Image.LANCZOS)
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=self.quality, optimize=True)
+        except Exception:
+            return data, sniff_mime(data, mime)
+        result = out.getvalue()
+        if (
+            sniff_mime(data) == "image/jpeg"
+            and width == height
+            and side <= self.max_size
+            and len(data) <= len(result)
+        ):
+            # Already a small square JPEG; re-encoding would only lose quality.
+            return data, "image/jpeg"
+        return result, "image/jpeg"
@@ -0,0 +1,374 @@
+# src/songripper/services/async_ripper.py
+"""Asyncio variant of the ripping pipeline.
+
+``AsyncRipperService`` drives yt-dlp and ffmpeg as subprocesses whose
+output is read on the event loop and fetches album art with ``httpx``
+when it is installed, so one event loop can supervise many concurrent
+downloads.  Blocking work (mutagen, file moves, image processing) runs on a
+small dedicated thread pool.  Jobs, the download limiter, caches and
+metrics are shared with the wrapped ``RipperService``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import json
+import subprocess
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..settings import ITUNES_SEARCH_URL, RIP_ASYNC_MAX_TRACKS, RIPPER_IO_THREADS
+from .accounting import reap
+from .events import download_progress, report, reporting
+from .jobs import ItemResult, RipJob
+from .metrics import COMMAND_SECONDS, COVER_CACHE, stage_timer
+from .retry import call_with_retry_async
+from .ripper_service import RipperError, RipperService
+from .tracing import span
+
+
+class AsyncRipperService:
+    """Coroutine-based ``rip_playlist`` / ``mp3_from_url`` on top of a ``RipperService``."""
+
+    def __init__(
+        self,
+        service: RipperService,
+        *,
+        io_threads: int = RIPPER_IO_THREADS,
+        max_tracks: int = RIP_ASYNC_MAX_TRACKS,
+        http_client=None,
+    ) -> None:
+        self.service = service
+        self.max_tracks = max_tracks
+        self.http_client = http_client
+        self.io = concurrent.futures.ThreadPoolExecutor(
+            max_workers=io_threads, thread_name_prefix="ripper-io"
+        )
+
+    async def _io(self, func, *args, **kwargs):
+        """Run blocking ``func`` on the I/O pool, keeping job and trace context."""
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.io, call)
+
+    @staticmethod
+    async def _read_lines(stream, on_line: Optional[Callable[[str], None]]) -> bytes:
+        if on_line is None:
+            return await stream.read()
+        chunks = []
+        async for raw in stream:
+            chunks.append(raw)
+            on_line(raw.decode("utf-8", "replace"))
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _reader(pipe) -> asyncio.StreamReader:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        return reader
+
+    async def _run_command(
+        self,
+        cmd: list[str],
+        stage: str = "command",
+        on_line: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Run ``cmd`` as a subprocess without blocking the loop and return stdout.
+
+        ``on_line`` is called with every line the command writes to stdout
+        or stderr while it runs.  The child is started with ``Popen`` rather
+        than ``asyncio.create_subprocess_exec`` so that the loop's child
+        watcher does not reap it: it is reaped with ``os.wait4`` on the I/O
+        pool once its pipes close, which yields its exact resource usage.
+        """
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as exc:
+            COMMAND_SECONDS.observe(time.perf_counter() - start, Path(cmd[0]).name)
+            raise RipperError(f"Failed to execute command '{' '.join(cmd)}': {exc}")
+        try:
+            out, err = await asyncio.gather(
+                self._read_lines(await self._reader(proc.stdout), on_line),
+                self._read_lines(await self._reader(proc.stderr), on_line),
+            )
+            usage = await self._io(reap, proc)
+        except BaseException:
+            proc.kill()
+            with suppress(ChildProcessError):
+                await self._io(reap, proc)
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            COMMAND_SECONDS.observe(wall, Path(cmd[0]).name)
+        self.service.accountant.record(cmd, stage, wall, usage)
+        stdout = out.decode("utf-8", "replace")
+        if proc.returncode != 0:
+            error_msg = err.decode("utf-8", "replace") or stdout or "No error output"
+            raise RipperError(
+                f"Command '{' '.join(cmd)}' failed with exit code {proc.returncode}:\n{error_msg}"
+            )
+        return stdout
+
+    def _client(self):
+        if self.http_client is None:
+            try:
+                import httpx
+            except Exception:
+                return None
+            self.http_client = httpx.AsyncClient(timeout=10, follow_redirects=True)
+        return self.http_client
+
+    async def fetch_cover(self, artist: str, title: str) -> Optional[bytes]:
+        """Return album art from iTunes if available."""
+        client = self._client()
+        if client is None:
+            return await self._io(self.service.fetch_cover, artist, title)
+        with span("itunes lookup"):
+            try:
+                res = await client.get(
+                    ITUNES_SEARCH_URL,
+                    params={"term": f"{artist} {title}", "entity": "song", "limit": 1},
+                )
+                res.raise_for_status()
+                url = res.json()["results"][0]["artworkUrl100"].replace(
+                    "100x100bb", "600x600bb"
+                )
+                cover = await client.get(url)
+                cover.raise_for_status()
+                return cover.content
+            except Exception:
+                return None
+
+    async def fetch_thumbnail(self, url: str) -> Optional[bytes]:
+        """Return thumbnail image bytes from ``url`` if possible."""
+        client = self._client()
+        if client is None:
+            return await self._io(self.service.fetch_thumbnail, url)
+        with span("thumbnail fetch"):
+            try:
+                res = await client.get(url)
+                res.raise_for_status()
+                return res.content
+            except Exception:
+                return None
+
+    async def _fetch_source(self, url: str, staging_dir: Path, source_stem: str) -> Path:
+        """Async ``RipperService._fetch_source``, reporting yt-dlp progress when a job listens."""
+        svc = self.service
+        live = reporting()
+        outtmpl = str(staging_dir / f"{source_stem}.%(ext)s")
+        report("stage", stage="download")
+        with await svc.download_limiter.slot_async() as slot:
+            with stage_timer("download"):
+                await self._run_command(
+                    svc._download_cmd(url, outtmpl, progress=live),
+                    stage="download",
+                    on_line=download_progress() if live else None,
+                )
+                source = svc._downloaded(staging_dir, source_stem)
+                slot.nbytes = source.stat().st_size
+        return source
+
+    async def _fetch_encoded(
+        self, url: str, staging_dir: Path, stem: str, trim: bool = True
+    ) -> list[Path]:
+        """Async ``RipperService._fetch_encoded``: one download, one multi-output encode."""
+        svc = self.service
+        source_stem, outputs = svc._encoded_outputs(staging_dir, stem)
+        source = await self._fetch_source(url, staging_dir, source_stem)
+        report("stage", stage="encode")
+        try:
+            with stage_timer("encode"):
+                await self._run_command(svc._encode_cmd(source, outputs, trim), stage="encode")
+        except BaseException:
+            for path in outputs:
+                path.unlink(missing_ok=True)
+            raise
+        finally:
+            source.unlink(missing_ok=True)
+        return outputs
+
+    async def _fetch_trimmed(self, url: str, staging_dir: Path, stem: str) -> Path:
+        """Async ``RipperService._fetch_trimmed``."""
+        svc = self.service
+        source_stem, (path,) = svc._encoded_outputs(staging_dir, stem)
+        source = await self._fetch_source(url, staging_dir, source_stem)
+        report("stage", stage="trim")
+        try:
+            try:
+                with stage_timer("trim"):
+                    await self._run_command(svc._trim_cmd(source, path), stage="trim")
+            except Exception:
+                path.unlink(missing_ok=True)
+                with stage_timer("encode"):
+                    await self._run_command(
+                        svc._encode_cmd(source, [path], trim=False), stage="encode"
+                    )
+        finally:
+            source.unlink(missing_ok=True)
+        return path
+
+    async def _album_cover(
+        self, artist: str, album: str, term: str, meta: dict
+    ) -> Optional[bytes]:
+        """Async ``RipperService._album_cover``."""
+        svc = self.service
+        key = (artist, album)
+        with svc.album_lock:
+            cover = svc.album_art_cache.get(key)
+        COVER_CACHE.inc("miss" if cover is None else "hit")
+        if cover is None:
+            with stage_timer("cover"):
+                cover = await self.fetch_cover(artist, term)
+                if cover is None:
+                    thumb_url = svc._thumbnail_url(meta)
+                    if thumb_url:
+                        cover = await self.fetch_thumbnail(thumb_url)
+                if cover:
+                    cover, _ = await self._io(svc.cover_processor.process, cover)
+            with svc.album_lock:
+                svc.album_art_cache[key] = cover
+        return cover
+
+    async def mp3_from_url(
+        self, url: str, staging_dir: Path
+    ) -> tuple[str, str, Path] | list[tuple[str, str, Path]]:
+        """Download ``url`` to ``staging_dir`` and tag the resulting audio.
+
+        Like ``RipperService.mp3_from_url``, videos with chapters are split
+        into a list of tracks when ``split_chapters`` is enabled.
+        """
+        svc = self.service
+        with span("track", url=url):
+            report("stage", stage="metadata")
+            with stage_timer("metadata"):
+                meta = json.loads(
+                    await self._run_command(
+                        svc.YT_BASE + ["-J", "--no-playlist", url], stage="metadata"
+                    )
+                )
+            artist, title, album, prefix = svc._describe(meta)
+            plan = svc._chapter_plan(meta) if svc.split_chapters else []
+            if len(plan) > 1:
+                return await self._rip_chapters(url, meta, staging_dir, plan)
+
+            if len(svc.profiles) > 1:
+                outputs = await self._fetch_encoded(url, staging_dir, f"{prefix}{title}")
+            else:
+                outputs = [await self._fetch_trimmed(url, staging_dir, f"{prefix}{title}")]
+
+            report("stage", stage="tag")
+            tagged = [
+                await self._io(
+                    svc._write_tags, path, artist, title, album, prefix, svc.tag_lock
+                )
+                for path in outputs
+            ]
+            if any(tagged):
+                cover = await self._album_cover(artist, album, title, meta)
+                if cover:
+                    for path, ok in zip(outputs, tagged):
+                        if ok:
+                            await self._io(svc._write_ripped_cover, path, cover, svc.tag_lock)
+            svc.tag_cache.invalidate(*outputs)
+        return artist, album, outputs[0]
+
+    async def _rip_chapters(
+        self, url: str, meta: dict, staging_dir: Path, plan: list
+    ) -> list[tuple[str, str, Path]]:
+        """Async ``RipperService._rip_chapters``: one download, concurrent stream-copy cuts."""
+        svc = self.service
+        artist, _, album, _ = svc._describe(meta)
+        sources = await self._fetch_encoded(url, staging_dir, f".{album}.chapters", trim=False)
+
+        cuts = svc._chapter_cuts(staging_dir, plan, sources)
+        gate = asyncio.Semaphore(max(1, svc.split_workers))
+
+        async def cut(source: Path, path: Path, start: float, end: Optional[float]) -> None:
+            async with gate:
+                await self._run_command(svc._split_cmd(source, path, start, end), stage="split")
+
+        report("stage", stage="split", tracks=len(plan))
+        try:
+            with stage_timer("split"):
+                await asyncio.gather(
+                    *(cut(source, path, start, end) for source, path, (_, _, start, end) in cuts)
+                )
+        except BaseException:
+            for _, path, _ in cuts:
+                path.unlink(missing_ok=True)
+            raise
+        finally:
+            for source in sources:
+                source.unlink(missing_ok=True)
+
+        report("stage", stage="tag")
+        tagged = [
+            await self._io(
+                svc._write_tags, path, artist, title, album, prefix, svc.tag_lock
+            )
+            for _, path, (title, prefix, _, _) in cuts
+        ]
+        if any(tagged):
+            cover = await self._album_cover(artist, album, album, meta)
+            if cover:
+                for (_, path, _), ok in zip(cuts, tagged):
+                    if ok:
+                        await self._io(svc._write_ripped_cover, path, cover, svc.tag_lock)
+        svc.tag_cache.invalidate(*(path for _, path, _ in cuts))
+        return [
+            (artist, album, path) for _, path, _ in cuts if path.suffix == svc.AUDIO_EXT
+        ]
+
+    async def enumerate_playlist(self, pl_url: str, *, items: str | None = None) -> dict:
+        cmd = self.service.YT_BASE + ["--flat-playlist", "-J"]
+        if items:
+            cmd += ["--playlist-items", items]
+        with stage_timer("enumerate"):
+            return json.loads(await self._run_command(cmd + [pl_url], stage="enumerate"))
+
+    async def rip_playlist(
+        self,
+        pl_url: str,
+        *,
+        entries: list | None = None,
+        job: RipJob | None = None,
+        mp3_func=None,
+        sleep=asyncio.sleep,
+    ) -> str:
+        """Rip a playlist or single video URL into staging; see ``RipperService.rip_playlist``.
+
+        Up to ``max_tracks`` items are in progress at once, and their
+        downloads are additionally gated by the shared adaptive limiter.
+        """
+        svc = self.service
+        job, staging = svc._start_job(pl_url, job)
+        items = entries
+        if entries is None:
+            with svc._enumerating(job):
+                items = (await self.enumerate_playlist(pl_url)).get("entries")
+        mp3_func = mp3_func or self.mp3_from_url
+        gate = asyncio.Semaphore(max(1, self.max_tracks))
+
+        async def rip_once(item: ItemResult) -> None:
+            with svc._work_dir() as work:
+                result = await mp3_func(item.url, work)
+                await self._io(svc._stage_ripped, item, result, staging)
+
+        async def rip_item(index: int, item: ItemResult) -> None:
+            async with gate:
+                with svc._ripping_item(job, index, item) as retry:
+                    await call_with_retry_async(lambda: rip_once(item), sleep=sleep, **retry)
+
+        tracked = svc._track_items(job, pl_url, items, entries)
+        if tracked:
+            with svc._item_workers(tracked, min(len(tracked), self.max_tracks)):
+                await asyncio.gather(*(rip_item(i, it) for i, it in enumerate(tracked)))
+        return svc._finish_job(job)
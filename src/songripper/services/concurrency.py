@@ -0,0 +1,170 @@
+# src/songripper/services/concurrency.py
+"""Adaptive (AIMD) concurrency limit for parallel downloads."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .retry import is_throttled
+
+
+class DownloadSlot:
+    """Handle for one admitted download; set ``nbytes`` once it is known."""
+
+    def __init__(self, limiter: "AIMDLimiter") -> None:
+        self.limiter = limiter
+        self.started = limiter.clock()
+        self.nbytes: Optional[int] = None
+
+    def __enter__(self) -> "DownloadSlot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = self.limiter.clock() - self.started
+        if exc is None:
+            self.limiter.release(self, duration=duration, nbytes=self.nbytes)
+        else:
+            self.limiter.release(self, throttled=is_throttled(exc))
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AIMDLimiter:
+    """Limit parallel work with additive increase / multiplicative decrease.
+
+    Each healthy completion raises the limit by ``increase / limit`` (about
+    ``increase`` per full window of downloads).  A throttling error, or a
+    download whose throughput falls below ``1 / spike_factor`` of the
+    running average, multiplies the limit by ``decrease``; throughput is
+    only measured for slots that set ``nbytes``.  Completions of downloads
+    that started before the last decrease are ignored so a single burst of
+    429s only cuts the limit once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 16,
+        *,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        spike_factor: float = 3.0,
+        smoothing: float = 0.2,
+        history_size: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.smoothing = smoothing
+        self.clock = clock
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._throughput: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        # Futures of coroutines waiting in ``slot_async``, with their loops.
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.history: deque[tuple[float, int, str]] = deque(maxlen=history_size)
+        self.history.append((time.time(), self.limit, "initial"))
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def slot(self) -> DownloadSlot:
+        """Block until a download may start and return its slot."""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+        return DownloadSlot(self)
+
+    async def slot_async(self) -> DownloadSlot:
+        """Wait without blocking the event loop until a download may start."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return DownloadSlot(self)
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def try_slot(self) -> Optional[DownloadSlot]:
+        """Return a slot if one is free right now, otherwise ``None``."""
+        with self._cond:
+            if self._in_flight >= self.limit:
+                return None
+            self._in_flight += 1
+        return DownloadSlot(self)
+
+    def release(
+        self,
+        slot: DownloadSlot,
+        *,
+        duration: Optional[float] = None,
+        nbytes: Optional[int] = None,
+        throttled: bool = False,
+    ) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if slot.started >= self._last_decrease:
+                if throttled:
+                    self._cut("throttled")
+                elif duration is not None:
+                    self._observe(duration, nbytes)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _observe(self, duration: float, nbytes: Optional[int]) -> None:
+        # Without a size the completion still counts, but not its throughput.
+        if nbytes is not None:
+            rate = nbytes / max(duration, 1e-6)
+            if self._throughput is not None and rate * self.spike_factor < self._throughput:
+                self._cut("slow")
+                return
+            if self._throughput is None:
+                self._throughput = rate
+            else:
+                self._throughput += self.smoothing * (rate - self._throughput)
+        before = self.limit
+        self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+        if self.limit != before:
+            self.history.append((time.time(), self.limit, "increase"))
+
+    def _cut(self, reason: str) -> None:
+        self._limit = max(self.minimum, self._limit * self.decrease)
+        self._last_decrease = self.clock()
+        self.history.append((time.time(), self.limit, reason))
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "throughput": self._throughput,
+                "history": [
+                    {"time": t, "limit": limit, "reason": reason}
+                    for t, limit, reason in self.history
+                ],
+            }
@@ -0,0 +1,317 @@
+# src/songripper/services/contenthash.py
+"""Exact duplicate detection by hashing the audio payload of files.
+
+Only the audio is hashed: the ``mdat`` boxes of MP4 files and the pages
+after the header packets of Ogg files, so a re-tagged copy or one with a
+different cover hashes the same.  Other files are hashed whole.
+
+``HashIndex`` stores the digests in SQLite, validated by ``st_mtime_ns``
+and ``st_size``.  ``BackgroundHasher`` fills it from a daemon thread,
+reading at most ``rate`` bytes per second and pausing while rips run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+CHUNK = 1 << 20
+
+
+# ----------------------------------------------------------------------
+# Audio payload
+# ----------------------------------------------------------------------
+def _mp4_ranges(fh, size: int) -> Optional[list[tuple[int, int]]]:
+    ranges = []
+    pos = 0
+    while pos + 8 <= size:
+        fh.seek(pos)
+        box_size, box_type = struct.unpack(">I4s", fh.read(8))
+        header = 8
+        if box_size == 1:
+            (box_size,) = struct.unpack(">Q", fh.read(8))
+            header = 16
+        elif box_size == 0:
+            box_size = size - pos
+        if box_size < header:
+            return None  # not a valid box structure
+        if box_type == b"mdat":
+            ranges.append((pos + header, min(box_size, size - pos) - header))
+        pos += box_size
+    return ranges or None
+
+
+def _ogg_ranges(fh, size: int) -> Optional[list[tuple[int, int]]]:
+    ranges = []
+    headers = None
+    packets = 0
+    pos = 0
+    while pos + 27 <= size:
+        fh.seek(pos)
+        page = fh.read(27)
+        if page[:4] != b"OggS":
+            return None
+        lacing = fh.read(page[26])
+        body = pos + 27 + len(lacing)
+        length = sum(lacing)
+        if headers is None:
+            # Opus streams have two header packets, Vorbis streams three.
+            headers = 2 if fh.read(8) == b"OpusHead" else 3
+        if packets >= headers:
+            ranges.append((body, length))
+        packets += sum(1 for value in lacing if value < 255)
+        pos = body + length
+    return ranges or None
+
+
+def payload_ranges(path: Path) -> list[tuple[int, int]]:
+    """Return ``(offset, length)`` of the audio data of ``path``."""
+    size = path.stat().st_size
+    with path.open("rb") as fh:
+        magic = fh.read(8)
+        ranges = None
+        if magic[:4] == b"OggS":
+            ranges = _ogg_ranges(fh, size)
+        elif magic[4:8] == b"ftyp":
+            ranges = _mp4_ranges(fh, size)
+    return ranges or [(0, size)]
+
+
+class Throttle:
+    """Limit reads to ``rate`` bytes per second (``0`` disables the limit)."""
+
+    def __init__(self, rate: float, sleep: Callable[[float], None] = time.sleep) -> None:
+        self.rate = rate
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + nbytes / self.rate
+        if start > now:
+            self.sleep(start - now)
+
+
+def _read_ranges(path: Path, ranges, throttle: Optional[Throttle]) -> Iterator[bytes]:
+    with path.open("rb") as fh:
+        for offset, length in ranges:
+            fh.seek(offset)
+            while length > 0:
+                size = min(CHUNK, length)
+                if throttle is not None:
+                    throttle.consume(size)
+                chunk = fh.read(size)
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+
+def content_hash(path: Path, throttle: Optional[Throttle] = None) -> str:
+    """Return the SHA-256 of the audio payload of ``path``."""
+    digest = hashlib.sha256()
+    for chunk in _read_ranges(path, payload_ranges(path), throttle):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+class HashIndex:
+    """Audio payload digests of files keyed by path, stored in SQLite."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS hashes_digest ON hashes (digest)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int]:
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def cached(self, path: Path | str) -> Optional[str]:
+        """Return the stored digest of ``path`` if the file is unchanged."""
+        path = Path(path)
+        try:
+            sig = self._signature(path)
+        except OSError:
+            return None
+        if self._conn is None and not self.path.exists():
+            return None  # nothing hashed yet; do not create the database
+        with self._lock:
+            row = self._db().execute(
+                "SELECT mtime_ns, size, digest FROM hashes WHERE path = ?", (os.fspath(path),)
+            ).fetchone()
+        if row is None or (row[0], row[1]) != sig:
+            return None
+        return row[2]
+
+    def hash(self, path: Path | str, throttle: Optional[Throttle] = None) -> str:
+        """Return the digest of ``path``, hashing it only if it changed."""
+        path = Path(path)
+        digest = self.cached(path)
+        if digest is None:
+            sig = self._signature(path)
+            digest = content_hash(path, throttle)
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)",
+                    (os.fspath(path), *sig, digest),
+                )
+                db.commit()
+        return digest
+
+    def matches(self, digest: str, *, exclude: Path | str | None = None) -> list[Path]:
+        """Return existing indexed files with ``digest``, except ``exclude``."""
+        if self._conn is None and not self.path.exists():
+            return []
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT path FROM hashes WHERE digest = ? ORDER BY path", (digest,)
+            ).fetchall()
+        skip = os.fspath(exclude) if exclude is not None else None
+        return [Path(p) for (p,) in rows if p != skip and os.path.exists(p)]
+
+    def duplicates(self, path: Path | str) -> list[Path]:
+        """Other indexed files whose audio is identical to ``path``, from the index only."""
+        digest = self.cached(path)
+        return self.matches(digest, exclude=path) if digest else []
+
+    def rename(self, src: Path | str, dst: Path | str) -> None:
+        """Keep the digest of a file moved (and possibly re-tagged) from ``src`` to ``dst``."""
+        try:
+            sig = self._signature(Path(dst))
+        except OSError:
+            return
+        if self._conn is None and not self.path.exists():
+            return
+        with self._lock:
+            db = self._db()
+            cur = db.execute(
+                "UPDATE OR REPLACE hashes SET path = ?, mtime_ns = ?, size = ? WHERE path = ?",
+                (os.fspath(dst), *sig, os.fspath(src)),
+            )
+            if cur.rowcount:
+                db.commit()
+
+    def paths(self, root: Path) -> list[str]:
+        if self._conn is None and not self.path.exists():
+            return []
+        prefix = os.fspath(root) + os.sep
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT path FROM hashes WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        return [p for (p,) in rows]
+
+    def forget(self, paths: Iterable[str]) -> None:
+        paths = [(os.fspath(p),) for p in paths]
+        if not paths or (self._conn is None and not self.path.exists()):
+            return
+        with self._lock:
+            db = self._db()
+            db.executemany("DELETE FROM hashes WHERE path = ?", paths)
+            db.commit()
+
+
+class BackgroundHasher:
+    """Daemon thread hashing new files below ``roots()`` every ``interval`` seconds.
+
+    Reads are capped at ``rate`` bytes per second and the scan waits while
+    ``busy()`` is true, so hashing does not compete with active rips.
+    """
+
+    def __init__(
+        self,
+        index: Callable[[], HashIndex],
+        roots: Callable[[], list[tuple[Path, str]]],
+        *,
+        rate: float = 0,
+        interval: float = 600.0,
+        busy: Callable[[], bool] = lambda: False,
+    ) -> None:
+        self.index = index
+        self.roots = roots
+        self.throttle = Throttle(rate)
+        self.interval = interval
+        self.busy = busy
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="content-hasher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def scan(self) -> int:
+        """Hash new or changed files, forget deleted ones and return how many were hashed."""
+        index = self.index()
+        hashed = 0
+        for root, suffix in self.roots():
+            seen = set()
+            for path in root.rglob(f"*{suffix}") if root.exists() else ():
+                while self.busy():
+                    if self._stop.wait(1.0):
+                        return hashed
+                if self._stop.is_set():
+                    return hashed
+                seen.add(os.fspath(path))
+                if index.cached(path) is not None:
+                    continue
+                try:
+                    index.hash(path, self.throttle)
+                    hashed += 1
+                except OSError:
+                    continue  # vanished or unreadable; picked up next scan
+            index.forget(p for p in index.paths(root) if p not in seen)
+        return hashed
@@ -0,0 +1,137 @@
+# src/songripper/services/covers.py
+"""Album art held once per staged album until approval.
+
+Each album directory in staging may contain a hidden sidecar
+(``.cover.jpg`` or ``.cover.png``).  A JSON manifest next to the staging
+tree records the MIME type, size and hash of every sidecar so the UI can
+build cache-busting URLs without reading the images.  The sidecar is the
+source of truth: manifest entries whose file disappeared are ignored and
+sidecars missing from the manifest are picked up on lookup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+SIDECARS = {"image/jpeg": ".cover.jpg", "image/png": ".cover.png"}
+FOLDER_ART = {"image/jpeg": "folder.jpg", "image/png": "folder.png"}
+
+
+@dataclass
+class AlbumCover:
+    path: Path
+    mime: str
+    sha256: str
+    size: int
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+
+def _mime_for(data: bytes, mime: str) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    return "image/png" if mime == "image/png" else "image/jpeg"
+
+
+class CoverStore:
+    """Sidecar cover files for staged albums plus their manifest."""
+
+    def __init__(self, staging_root: Path, manifest_path: Path) -> None:
+        self.staging_root = staging_root
+        self.manifest_path = manifest_path
+        self.lock = threading.Lock()
+
+    def _key(self, album_dir: Path) -> str:
+        try:
+            return album_dir.relative_to(self.staging_root).as_posix()
+        except ValueError:
+            return album_dir.as_posix()
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, manifest: dict[str, dict]) -> None:
+        if not manifest and not self.manifest_path.exists():
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
+
+    def set(self, album_dir: Path, data: bytes, mime: str = "image/jpeg") -> AlbumCover:
+        """Store ``data`` as the cover of ``album_dir``, replacing any previous one."""
+        mime = _mime_for(data, mime)
+        path = album_dir / SIDECARS[mime]
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        for other in SIDECARS.values():
+            if other != path.name:
+                (album_dir / other).unlink(missing_ok=True)
+        cover = AlbumCover(path, mime, hashlib.sha256(data).hexdigest(), len(data))
+        with self.lock:
+            manifest = self._load()
+            entry = asdict(cover)
+            entry["path"] = path.name
+            manifest[self._key(album_dir)] = entry
+            self._save(manifest)
+        return cover
+
+    def get(self, album_dir: Path) -> Optional[AlbumCover]:
+        """Return the cover stored for ``album_dir`` or ``None``."""
+        key = self._key(album_dir)
+        with self.lock:
+            entry = self._load().get(key)
+        if entry is not None:
+            path = album_dir / entry["path"]
+            if path.exists():
+                return AlbumCover(path, entry["mime"], entry["sha256"], entry["size"])
+        for mime, name in SIDECARS.items():
+            path = album_dir / name
+            if path.exists():
+                # Not in the manifest (or stale), e.g. after a directory rename.
+                data = path.read_bytes()
+                cover = AlbumCover(path, mime, hashlib.sha256(data).hexdigest(), len(data))
+                with self.lock:
+                    manifest = self._load()
+                    entry = asdict(cover)
+                    entry["path"] = path.name
+                    manifest[key] = entry
+                    self._save(manifest)
+                return cover
+        return None
+
+    def discard(self, album_dir: Path) -> None:
+        """Delete the sidecar of ``album_dir`` and its manifest entry."""
+        for name in SIDECARS.values():
+            (album_dir / name).unlink(missing_ok=True)
+        self.forget(album_dir)
+
+    def forget(self, album_dir: Path) -> None:
+        with self.lock:
+            manifest = self._load()
+            if manifest.pop(self._key(album_dir), None) is not None:
+                self._save(manifest)
+
+    def copy(self, src_dir: Path, dest_dir: Path) -> None:
+        """Give ``dest_dir`` the cover of ``src_dir`` unless it has its own."""
+        cover = self.get(src_dir)
+        if cover is None or self.get(dest_dir) is not None or not dest_dir.is_dir():
+            return
+        self.set(dest_dir, cover.read(), cover.mime)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.manifest_path.unlink(missing_ok=True)
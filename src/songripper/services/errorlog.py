@@ -0,0 +1,186 @@
+# src/songripper/services/errorlog.py
+"""JSON-lines error log with size-based rotation and a background writer.
+
+``ErrorLog.write`` only enqueues the record, so request threads never wait
+for the disk; a daemon thread appends batches of records and rotates the
+file to ``errors.log.1`` … ``errors.log.N`` before it would exceed
+``max_bytes``.
+The read helpers stream from disk, so a large log is never loaded whole.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+CHUNK = 64 * 1024
+
+
+class ErrorLog:
+    """Append structured error records to ``path`` from a background thread."""
+
+    def __init__(
+        self, path: Path, max_bytes: int = 10 * 2**20, backups: int = 5, maxsize: int = 10000
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def write(self, message: str, path: Optional[Path] = None, **fields) -> None:
+        """Queue a record with a timestamp, ``message`` and extra ``fields``."""
+        record = {"ts": datetime.now().isoformat(timespec="seconds"), **fields}
+        record["message"] = message.rstrip()
+        self._start()
+        try:
+            self._queue.put_nowait((Path(path or self.path), record))
+        except queue.Full:
+            # Never block a request on a stalled disk; count what was lost.
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait until every queued record has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="error-log", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._append(batch)
+            except Exception:
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, batch: list[tuple[Path, dict]]) -> None:
+        by_path: dict[Path, list[str]] = {}
+        for path, record in batch:
+            by_path.setdefault(path, []).append(json.dumps(record, default=str) + "\n")
+        for path, lines in by_path.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fh = path.open("ab")
+            try:
+                for line in lines:
+                    data = line.encode("utf-8")
+                    size = fh.tell()
+                    if self.max_bytes > 0 and size and size + len(data) > self.max_bytes:
+                        fh.close()
+                        self._rotate(path)
+                        fh = path.open("ab")
+                    fh.write(data)
+            finally:
+                fh.close()
+
+    def _rotate(self, path: Path) -> None:
+        if self.backups <= 0:
+            path.unlink(missing_ok=True)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            src = path.with_name(f"{path.name}.{n}")
+            if src.exists():
+                os.replace(src, path.with_name(f"{path.name}.{n + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Return the inclusive ``(start, end)`` of a single ``bytes=`` range, or ``None``."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+def read_bytes(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Yield bytes ``start``..``end`` (inclusive) of ``path`` in chunks."""
+    with path.open("rb") as fh:
+        fh.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = fh.read(CHUNK if remaining is None else min(CHUNK, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def tail_lines(path: Path, count: int) -> list[bytes]:
+    """Return the last ``count`` lines of ``path``, reading backwards from the end."""
+    if count <= 0:
+        return []
+    with path.open("rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(CHUNK, pos)
+            pos -= step
+            fh.seek(pos)
+            data = fh.read(step) + data
+    return [line + b"\n" for line in data.splitlines()[-count:]]
+
+
+def matches(line: bytes, filters: dict) -> bool:
+    if not filters:
+        return True
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(record, dict) and all(
+        str(record.get(key)) == str(value) for key, value in filters.items()
+    )
+
+
+def filter_lines(path: Path, filters: dict, tail: Optional[int] = None) -> Iterator[bytes]:
+    """Yield the records of ``path`` matching ``filters``; only the last ``tail`` if given.
+
+    Like ``tail_lines``, a ``tail`` of zero or less yields nothing.
+    """
+    if tail is not None and tail <= 0:
+        return
+    kept: deque[bytes] | None = deque(maxlen=tail) if tail is not None else None
+    with path.open("rb") as fh:
+        for line in fh:
+            if matches(line, filters):
+                if kept is None:
+                    yield line
+                else:
+                    kept.append(line)
+    if kept is not None:
+        yield from kept
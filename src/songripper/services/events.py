@@ -0,0 +1,182 @@
+# src/songripper/services/events.py
+"""Live per-job progress events.
+
+The rip pipelines publish item status changes, stage transitions, parsed
+``yt-dlp --newline`` download progress and finished tracks to a
+``JobEvents`` bus; the ``/jobs/events`` endpoint subscribes and forwards
+them to the browser as Server-Sent Events.  Each job keeps a bounded
+backlog (plus the latest progress per item) so a subscriber that connects
+after the rip started still sees the current state.  A job's stream ends
+with its ``job`` event.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+_PROGRESS_RE = re.compile(
+    r"^\[download\]\s+(?P<percent>\d+(?:\.\d+)?)%"
+    r"(?:\s+of\s+~?\s*(?P<size>\S+))?"
+    r"(?:\s+in\s+\S+)?"
+    r"(?:\s+at\s+(?P<speed>Unknown speed|\S+))?"
+    r"(?:\s+ETA\s+(?P<eta>Unknown|\S+))?"
+)
+
+
+def parse_progress(line: str) -> Optional[dict]:
+    """Return percent, size, speed and ETA of a yt-dlp progress line, or ``None``."""
+    match = _PROGRESS_RE.match(line.strip())
+    if match is None:
+        return None
+    speed, eta = match["speed"], match["eta"]
+    return {
+        "percent": float(match["percent"]),
+        "size": match["size"],
+        "speed": None if speed is None or speed.startswith("Unknown") else speed,
+        "eta": None if eta is None or eta == "Unknown" else eta,
+    }
+
+
+# The reporter of the item being ripped by this thread or task, if any.
+_reporter: contextvars.ContextVar[Optional[Callable[[str, dict], None]]] = (
+    contextvars.ContextVar("progress_reporter", default=None)
+)
+
+
+@contextmanager
+def progress_context(reporter: Callable[[str, dict], None]) -> Iterator[None]:
+    """Send ``report`` calls made by this thread or task to ``reporter``."""
+    token = _reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+def reporting() -> bool:
+    return _reporter.get() is not None
+
+
+def report(kind: str, **data) -> None:
+    """Report a ``stage`` transition or download ``progress`` of the current item."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(kind, data)
+
+
+def download_progress(interval: float = 0.5) -> Callable[[str], None]:
+    """Return a yt-dlp output line handler reporting progress at most every ``interval`` s."""
+    last = 0.0
+
+    def on_line(line: str) -> None:
+        nonlocal last
+        info = parse_progress(line)
+        if info is None:
+            return
+        now = time.monotonic()
+        if info["percent"] < 100 and now - last < interval:
+            return
+        last = now
+        report("progress", **info)
+
+    return on_line
+
+
+@dataclass
+class Event:
+    seq: int
+    kind: str
+    data: dict
+
+
+@dataclass
+class _Stream:
+    backlog: deque = field(default_factory=lambda: deque(maxlen=500))
+    # Only the latest progress event of each item is worth replaying.
+    progress: dict = field(default_factory=dict)
+    subscribers: list = field(default_factory=list)
+    closed: bool = False
+
+
+class JobEvents:
+    """Fan out events of the most recent ``keep`` jobs to asyncio subscribers.
+
+    ``publish`` may be called from any thread; events are handed to each
+    subscriber's event loop with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, keep: int = 50) -> None:
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._streams: OrderedDict[int, _Stream] = OrderedDict()
+        self._seq = itertools.count(1)
+
+    def _stream(self, job_id: int) -> _Stream:
+        stream = self._streams.get(job_id)
+        if stream is None:
+            stream = self._streams[job_id] = _Stream()
+            while len(self._streams) > self.keep:
+                self._streams.popitem(last=False)
+        return stream
+
+    def publish(self, job_id: int, kind: str, data: dict) -> None:
+        with self._lock:
+            stream = self._stream(job_id)
+            event = Event(next(self._seq), kind, data)
+            if kind == "progress":
+                stream.progress[data.get("item")] = event
+            else:
+                stream.backlog.append(event)
+            if kind == "job":
+                stream.closed = True
+            for loop, queue in stream.subscribers:
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+                except RuntimeError:  # the subscriber's loop has closed
+                    pass
+
+    async def subscribe(
+        self, job_id: int, keepalive: float = 15.0
+    ) -> AsyncIterator[Optional[Event]]:
+        """Yield the backlog and then live events of ``job_id`` until the job ends.
+
+        ``None`` is yielded after ``keepalive`` seconds without events so the
+        caller can keep idle connections open.
+        """
+        queue: asyncio.Queue[Event] = asyncio.Queue()
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            stream = self._stream(job_id)
+            replay = sorted(
+                [*stream.backlog, *stream.progress.values()], key=lambda e: e.seq
+            )
+            closed = stream.closed
+            if not closed:
+                stream.subscribers.append(entry)
+        try:
+            for event in replay:
+                yield event
+            if closed:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.kind == "job":
+                    return
+        finally:
+            with self._lock:
+                if entry in stream.subscribers:
+                    stream.subscribers.remove(entry)
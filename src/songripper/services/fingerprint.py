@@ -0,0 +1,408 @@
+# src/songripper/services/fingerprint.py
+"""Acoustic fingerprints for duplicate detection.
+
+A short excerpt of each track is decoded by ffmpeg to 8 kHz mono PCM.  The
+strongest peaks of its spectrogram are paired with the peaks that follow
+them, and each pair becomes a landmark: a hash of the two frequencies and
+their time gap, with the time of the first peak.  Two files are the same
+recording when many landmarks match at one consistent time offset, so the
+score survives volume changes, noise, re-encoding and an excerpt starting
+at a different point, while different songs, even played on the same
+instruments, only share scattered landmarks at random offsets.
+
+``FingerprintIndex`` keeps the landmarks of every file in one array sorted
+by hash, so a lookup against the whole library is a binary search per
+query landmark and a vote over ``(file, offset)``.  Entries are validated by
+``st_mtime_ns`` and ``st_size``, so a file is decoded once, and the index
+is persisted to an ``.npz`` file.  ``FingerprintIndexer`` fingerprints the
+library from a daemon thread, so requests only decode the file they check.  NumPy is optional: without it
+``available()`` is false and callers fall back to name matching.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+SAMPLE_RATE = 8000
+FRAME = 1024
+HOP = 256
+# Peaks are local maxima over this many frames / bins either side, at most
+# 40 dB below the loudest, keeping the strongest PEAKS_PER_SECOND.
+PEAK_FRAMES = 7
+PEAK_BINS = 15
+PEAKS_PER_SECOND = 6
+# Each peak is paired with the next FAN_OUT peaks up to MAX_GAP frames later.
+FAN_OUT = 4
+MAX_GAP = 32
+MIN_LANDMARKS = 8
+# Excerpt decoded per track, and where it starts in tracks long enough.
+EXCERPT_SECONDS = 30.0
+EXCERPT_OFFSET = 30.0
+# Lookups pack ``(row, offset)`` into one key; offsets stay well within it.
+_SPAN = 1 << 15
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def available() -> bool:
+    return _numpy() is not None
+
+
+def excerpt_cmd(path: Path, duration: Optional[float] = None) -> list[str]:
+    """ffmpeg command writing a mono ``SAMPLE_RATE`` s16le excerpt of ``path`` to stdout."""
+    offset = EXCERPT_OFFSET if duration and duration >= EXCERPT_OFFSET + EXCERPT_SECONDS else 0.0
+    return [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{offset:.3f}", "-t", f"{EXCERPT_SECONDS:.3f}", "-i", str(path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-",
+    ]
+
+
+def _max_filter(np, a, radius: int, axis: int):
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    padded = np.pad(a, pad, constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=axis)
+    return windows.max(axis=-1)
+
+
+def fingerprint(pcm: bytes):
+    """Return the landmarks ``(hashes, frames)`` of s16le mono PCM, or ``None`` if too few."""
+    np = _numpy()
+    if np is None:
+        raise RuntimeError("numpy is required for fingerprints")
+    samples = np.frombuffer(pcm[: len(pcm) // 2 * 2], dtype="<i2").astype(np.float32)
+    if samples.size < FRAME * 4:
+        return None
+    frames = np.lib.stride_tricks.sliding_window_view(samples / 32768.0, FRAME)[::HOP]
+    power = np.abs(np.fft.rfft(frames * np.hanning(FRAME).astype(np.float32), axis=1)) ** 2
+    level = np.log10(power + power.max() * 1e-8 + 1e-20)
+    local = _max_filter(np, _max_filter(np, level, PEAK_BINS, 1), PEAK_FRAMES, 0)
+    t, f = np.nonzero((level == local) & (level > level.max() - 4))
+    keep = int(PEAKS_PER_SECOND * len(frames) * HOP / SAMPLE_RATE) + 1
+    strongest = np.sort(np.argsort(-level[t, f], kind="stable")[:keep])
+    t, f = t[strongest], f[strongest]  # still in time order
+    hashes, times = [], []
+    for i in range(len(t)):
+        paired = 0
+        for j in range(i + 1, len(t)):
+            gap = int(t[j] - t[i])
+            if gap > MAX_GAP or paired == FAN_OUT:
+                break
+            if gap:
+                hashes.append(int(f[i]) << 16 | int(f[j]) << 6 | gap)
+                times.append(int(t[i]))
+                paired += 1
+    if len(hashes) < MIN_LANDMARKS:
+        return None
+    return np.array(hashes, dtype=np.uint32), np.array(times, dtype=np.int32)
+
+
+def _scores(np, query, hashes, owners, times, counts) -> dict[int, float]:
+    """Best aligned match of ``query`` against each owner of the sorted landmarks.
+
+    A landmark matches when its hash is equal; matches vote for the time
+    offset between the two files, neighbouring offsets (a frame of jitter)
+    count together, and the best offset's votes are divided by the smaller
+    landmark count of the two.
+    """
+    q_hashes, q_times = query
+    lo = np.searchsorted(hashes, q_hashes, "left")
+    hits = np.searchsorted(hashes, q_hashes, "right") - lo
+    total = int(hits.sum())
+    if not total:
+        return {}
+    starts = np.repeat(lo - (np.cumsum(hits) - hits), hits)
+    idx = starts + np.arange(total)
+    offset = times[idx] - np.repeat(q_times, hits)
+    keys = owners[idx].astype(np.int64) * (2 * _SPAN) + offset + _SPAN
+    keys, votes = np.unique(keys, return_counts=True)
+    smoothed = votes.copy()
+    for step in (-1, 1):
+        pos = np.minimum(np.searchsorted(keys, keys + step), len(keys) - 1)
+        smoothed += np.where(keys[pos] == keys + step, votes[pos], 0)
+    owner = keys // (2 * _SPAN)
+    firsts = np.nonzero(np.r_[True, owner[1:] != owner[:-1]])[0]
+    best = np.maximum.reduceat(smoothed, firsts)
+    rows = owner[firsts]
+    score = best / np.minimum(len(q_hashes), counts[rows])
+    return {int(r): min(1.0, float(s)) for r, s in zip(rows, score)}
+
+
+def similarity(a, b) -> float:
+    """Score in ``[0, 1]`` of how much of ``a`` and ``b`` is the same recording."""
+    np = _numpy()
+    if a is None or b is None:
+        return 0.0
+    order = np.argsort(b[0], kind="stable")
+    owners = np.zeros(len(order), dtype=np.int32)
+    counts = np.array([len(b[0])])
+    return _scores(np, a, b[0][order], owners, b[1][order], counts).get(0, 0.0)
+
+
+class FingerprintIndex:
+    """Fingerprints of audio files keyed by path, with nearest-neighbour lookup.
+
+    ``extract`` returns the PCM excerpt of a file (see ``excerpt_cmd``).
+    """
+
+    def __init__(self, path: Path, extract: Callable[[Path], bytes]) -> None:
+        self.path = Path(path)
+        self.extract = extract
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = {}
+        self._sigs: list[tuple[int, int]] = []
+        self._paths: list[str] = []
+        self._prints: list = []
+        # ``_prints`` merged and sorted by hash, rebuilt after changes.
+        self._lookup = None
+        self._dirty = False
+        self._loaded = False
+        # Files that could not be fingerprinted, so they are not decoded again.
+        self._failed: dict[str, tuple[int, int]] = {}
+
+    # -- persistence ---------------------------------------------------
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        np = _numpy()
+        if np is None or not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                paths = [str(p) for p in data["paths"]]
+                sigs = [tuple(int(v) for v in s) for s in data["sigs"]]
+                counts = data["counts"].astype(np.int64)
+                hashes = data["hashes"].astype(np.uint32)
+                times = data["times"].astype(np.int32)
+        except Exception:
+            return  # a damaged or outdated cache is rebuilt
+        if len(paths) == len(sigs) == len(counts) and int(counts.sum()) == len(hashes):
+            cuts = np.cumsum(counts)[:-1]
+            self._prints = list(zip(np.split(hashes, cuts), np.split(times, cuts)))
+            self._paths, self._sigs = paths, sigs
+            self._rows = {p: i for i, p in enumerate(paths)}
+
+    def _stacked(self):
+        if self._lookup is None and self._prints:
+            np = _numpy()
+            counts = np.array([len(h) for h, _ in self._prints])
+            hashes = np.concatenate([h for h, _ in self._prints])
+            order = np.argsort(hashes, kind="stable")
+            owners = np.repeat(np.arange(len(self._prints), dtype=np.int32), counts)
+            times = np.concatenate([t for _, t in self._prints])
+            self._lookup = (hashes[order], owners[order], times[order], counts)
+        return self._lookup
+
+    def save(self) -> None:
+        np = _numpy()
+        with self._lock:
+            if np is None or not self._dirty:
+                return
+            if not self._prints:
+                self.path.unlink(missing_ok=True)
+                self._dirty = False
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp.npz")
+            np.savez(
+                tmp,
+                paths=np.array(self._paths, dtype=str),
+                sigs=np.array(self._sigs, dtype=np.int64).reshape(-1, 2),
+                counts=np.array([len(h) for h, _ in self._prints], dtype=np.int64),
+                hashes=np.concatenate([h for h, _ in self._prints]),
+                times=np.concatenate([t for _, t in self._prints]),
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    # -- entries -------------------------------------------------------
+    def _put(self, key: str, sig: tuple[int, int], landmarks) -> None:
+        row = self._rows.get(key)
+        if row is not None:
+            self._sigs[row] = sig
+            self._prints[row] = landmarks
+        else:
+            self._rows[key] = len(self._paths)
+            self._paths.append(key)
+            self._sigs.append(sig)
+            self._prints.append(landmarks)
+        self._lookup = None
+        self._dirty = True
+
+    def _drop(self, keys: Iterable[str]) -> None:
+        gone = {self._rows[k] for k in keys if k in self._rows}
+        if not gone:
+            return
+        keep = [i for i in range(len(self._paths)) if i not in gone]
+        self._paths = [self._paths[i] for i in keep]
+        self._sigs = [self._sigs[i] for i in keep]
+        self._prints = [self._prints[i] for i in keep]
+        self._lookup = None
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+        self._dirty = True
+
+    def get(self, path: Path | str):
+        """Return the fingerprint of ``path``, decoding it only if it changed."""
+        path = Path(path)
+        key = os.fspath(path)
+        st = path.stat()
+        sig = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            self._load()
+            row = self._rows.get(key)
+            if row is not None and self._sigs[row] == sig:
+                return self._prints[row]
+            if self._failed.get(key) == sig:
+                return None
+        try:
+            landmarks = fingerprint(self.extract(path))
+        except Exception:
+            landmarks = None
+        if landmarks is None:
+            with self._lock:
+                self._failed[key] = sig
+            return None
+        with self._lock:
+            self._put(key, sig, landmarks)
+        return landmarks
+
+    def refresh(
+        self, root: Path, suffix: str, interrupted: Callable[[], bool] = lambda: False
+    ) -> bool:
+        """Fingerprint new or changed ``suffix`` files below ``root`` and forget deleted files.
+
+        ``interrupted`` is checked before each file; when it returns true the
+        progress so far is saved and ``False`` returned.
+        """
+        root = Path(root)
+        seen = set()
+        for path in root.rglob(f"*{suffix}") if root.exists() else ():
+            if interrupted():
+                self.save()
+                return False
+            seen.add(os.fspath(path))
+            try:
+                self.get(path)
+            except OSError:
+                continue  # vanished while scanning
+        prefix = os.fspath(root) + os.sep
+        with self._lock:
+            self._load()
+            self._drop([
+                p for p in self._paths
+                if (p not in seen if p.startswith(prefix) else not os.path.exists(p))
+            ])
+        self.save()
+        return True
+
+    def rename(self, src: Path | str, dst: Path | str) -> None:
+        """Keep the fingerprint of a file moved from ``src`` to ``dst``."""
+        src, dst = os.fspath(src), os.fspath(dst)
+        with self._lock:
+            self._load()
+            row = self._rows.get(src)
+            if row is None:
+                return
+            try:
+                st = os.stat(dst)
+            except OSError:
+                return
+            landmarks = self._prints[row]
+            self._drop([src, dst])
+            self._put(dst, (st.st_mtime_ns, st.st_size), landmarks)
+
+    def nearest(
+        self, landmarks, threshold: float, *, limit: int = 10, within: Optional[Path] = None
+    ) -> list[tuple[str, float]]:
+        """Return up to ``limit`` ``(path, similarity)`` at or above ``threshold``, best first.
+
+        With ``within`` only files below that directory are considered.
+        """
+        np = _numpy()
+        prefix = os.fspath(within) + os.sep if within is not None else ""
+        with self._lock:
+            self._load()
+            lookup = self._stacked()
+            if lookup is None or landmarks is None:
+                return []
+            scores = _scores(np, landmarks, *lookup)
+            found = sorted(
+                (
+                    (self._paths[row], score)
+                    for row, score in scores.items()
+                    if score >= threshold and self._paths[row].startswith(prefix)
+                ),
+                key=lambda hit: -hit[1],
+            )
+        return found[:limit]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._paths)
+
+
+class FingerprintIndexer:
+    """Daemon thread fingerprinting new files below ``root()`` every ``interval`` seconds.
+
+    The scan waits while ``busy()`` is true, so decoding does not compete
+    with active rips.
+    """
+
+    def __init__(
+        self,
+        index: Callable[[], FingerprintIndex],
+        root: Callable[[], tuple[Path, str]],
+        *,
+        interval: float = 300.0,
+        busy: Callable[[], bool] = lambda: False,
+    ) -> None:
+        self.index = index
+        self.root = root
+        self.interval = interval
+        self.busy = busy
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not available() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fingerprint-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def _interrupted(self) -> bool:
+        while self.busy():
+            if self._stop.wait(1.0):
+                return True
+        return self._stop.is_set()
+
+    def scan(self) -> bool:
+        """Bring the index up to date with the library; ``False`` if stopped part way."""
+        root, suffix = self.root()
+        return self.index().refresh(root, suffix, self._interrupted)
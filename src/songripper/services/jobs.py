@@ -0,0 +1,129 @@
+# src/songripper/services/jobs.py
+"""In-memory tracking of rip jobs and their individual playlist items."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+
+@dataclass
+class ItemResult:
+    """Outcome of ripping a single playlist entry."""
+
+    url: str
+    status: str = "pending"  # pending, running, done or failed
+    attempts: int = 0
+    error: Optional[str] = None
+    retryable: Optional[bool] = None
+    artist: Optional[str] = None
+    album: Optional[str] = None
+    path: Optional[str] = None
+    # Every staged file; several when a video was split into chapters.
+    tracks: list[str] = field(default_factory=list)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+
+@dataclass
+class RipJob:
+    """A playlist (or single video) rip and the results of its items."""
+
+    id: int
+    playlist: str
+    status: str = "queued"  # queued, running, done, partial or failed
+    items: list[ItemResult] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    # ``accounting.CommandUsage`` records of the external commands run.
+    usage: list = field(default_factory=list)
+    # ``tracing.Trace`` of the job when tracing is enabled.
+    trace: Optional[object] = field(default=None, repr=False, compare=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add_item(self, url: str) -> ItemResult:
+        item = ItemResult(url=url)
+        with self.lock:
+            self.items.append(item)
+        return item
+
+    @property
+    def succeeded(self) -> list[ItemResult]:
+        return [i for i in self.items if i.status == "done"]
+
+    @property
+    def failed(self) -> list[ItemResult]:
+        return [i for i in self.items if i.status == "failed"]
+
+    def finish(self) -> str:
+        """Set the final status from the item outcomes and return it."""
+        if not self.failed:
+            self.status = "done"
+        elif self.succeeded:
+            self.status = "partial"
+        else:
+            self.status = "failed"
+        self.finished = time.time()
+        return self.status
+
+    def report(self) -> str:
+        """Return a human readable per-item success/failure report."""
+        lines = [
+            f"{len(self.succeeded)} of {len(self.items)} track(s) ripped from {self.playlist}"
+        ]
+        for item in self.items:
+            if item.status == "done" and len(item.tracks) > 1:
+                lines.append(f"OK     {item.url} -> {len(item.tracks)} tracks from {item.path}")
+            elif item.status == "done":
+                lines.append(f"OK     {item.url} -> {item.path}")
+            elif item.status == "failed":
+                error = (item.error or "").strip().splitlines()
+                reason = error[-1] if error else "unknown error"
+                lines.append(
+                    f"FAILED {item.url} after {item.attempts} attempt(s): {reason}"
+                )
+            else:
+                lines.append(f"{item.status.upper():<6} {item.url}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            items = [asdict(i) for i in self.items]
+        return {
+            "id": self.id,
+            "playlist": self.playlist,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+            "items": items,
+        }
+
+
+class JobRegistry:
+    """Keep the most recent ``keep`` jobs addressable by id."""
+
+    def __init__(self, keep: int = 50) -> None:
+        self.keep = keep
+        self.lock = threading.Lock()
+        self._jobs: OrderedDict[int, RipJob] = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def create(self, playlist: str) -> RipJob:
+        with self.lock:
+            job = RipJob(id=next(self._ids), playlist=playlist)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: int) -> Optional[RipJob]:
+        with self.lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[RipJob]:
+        with self.lock:
+            return list(reversed(self._jobs.values()))
@@ -0,0 +1,458 @@
+# src/songripper/services/library.py
+"""Persistent index of the music library for browsing and search.
+
+``LibraryIndex`` mirrors the tracks below ``NAS_PATH`` into SQLite so the
+browse and search endpoints never touch the (often network mounted)
+filesystem.  A refresh walks the library but only lists directories
+whose ``st_mtime_ns`` changed, and only parses tags of files whose
+modification time or size changed.  Artist and album summaries are kept
+in their own tables, updated only for the albums a change touches, so
+every browse page is an index range scan.
+Searches match normalised (case and accent folded) prefixes of one field,
+or any words of artist, album and title through FTS5.  A word search that
+finds nothing is retried with misspelt words replaced by the closest words
+of the library, so "beatels" still finds the Beatles.
+
+``LibraryIndexer`` refreshes the index from a daemon thread, every
+``interval`` seconds or when woken after an approval.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .tagcache import parse_track
+
+FIELDS = ("artist", "album", "title")
+# Similarity (difflib ratio) a library word needs to replace a misspelt one.
+FUZZY_CUTOFF = 0.75
+# Sorts after every character a key can contain.
+_KEY_END = "\U0010ffff"
+
+
+def normalise(text: str) -> str:
+    """Case and accent folded form of ``text`` used for sorting and prefix search."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+@dataclass
+class Page:
+    """One page of results and the total number of matches."""
+
+    items: list[dict]
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.per_page))
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "total": self.total,
+            "page": self.page,
+            "per_page": self.per_page,
+            "pages": self.pages,
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    artist TEXT, album TEXT, title TEXT, duration REAL,
+    mtime_ns INTEGER, size INTEGER,
+    artist_key TEXT, album_key TEXT, title_key TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_dir ON tracks (dir);
+CREATE INDEX IF NOT EXISTS tracks_browse ON tracks (artist_key, album_key, path);
+CREATE INDEX IF NOT EXISTS tracks_album ON tracks (album_key, path);
+CREATE INDEX IF NOT EXISTS tracks_title ON tracks (title_key, path);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS artists (
+    artist_key TEXT PRIMARY KEY, artist TEXT, albums INTEGER, tracks INTEGER
+);
+CREATE TABLE IF NOT EXISTS albums (
+    artist_key TEXT, album_key TEXT, artist TEXT, album TEXT, tracks INTEGER,
+    PRIMARY KEY (artist_key, album_key)
+);
+"""
+
+# External content table kept in sync by triggers, so edits never rebuild it.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    artist, album, title, content='tracks', content_rowid='rowid'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_vocab USING fts5vocab(tracks_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS tracks_fts_insert AFTER INSERT ON tracks BEGIN
+    INSERT INTO tracks_fts (rowid, artist, album, title)
+    VALUES (new.rowid, new.artist, new.album, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS tracks_fts_delete AFTER DELETE ON tracks BEGIN
+    INSERT INTO tracks_fts (tracks_fts, rowid, artist, album, title)
+    VALUES ('delete', old.rowid, old.artist, old.album, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS tracks_fts_update AFTER UPDATE ON tracks BEGIN
+    INSERT INTO tracks_fts (tracks_fts, rowid, artist, album, title)
+    VALUES ('delete', old.rowid, old.artist, old.album, old.title);
+    INSERT INTO tracks_fts (rowid, artist, album, title)
+    VALUES (new.rowid, new.artist, new.album, new.title);
+END;
+"""
+
+_UPSERT = (
+    "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (path) DO UPDATE SET "
+    "dir = excluded.dir, artist = excluded.artist, album = excluded.album, "
+    "title = excluded.title, duration = excluded.duration, mtime_ns = excluded.mtime_ns, "
+    "size = excluded.size, artist_key = excluded.artist_key, album_key = excluded.album_key, "
+    "title_key = excluded.title_key"
+)
+
+
+def _row(path: str, st: os.stat_result) -> tuple:
+    info = parse_track(Path(path), st.st_mtime_ns)
+    return (
+        path, os.path.dirname(path), info.artist, info.album, info.title, info.duration,
+        st.st_mtime_ns, st.st_size,
+        normalise(info.artist), normalise(info.album), normalise(info.title),
+    )
+
+
+class LibraryIndex:
+    """SQLite index of the ``suffix`` files below ``root``."""
+
+    def __init__(self, path: Path, root: Path, suffix: str = ".m4a") -> None:
+        self.path = Path(path)
+        self.root = Path(root)
+        self.suffix = suffix
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.fts = False
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5: LIKE fallback
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def refresh(self, full: bool = False) -> int:
+        """Bring the index in line with the library and return the number of changes.
+
+        Directories whose modification time is unchanged are skipped unless
+        ``full`` is set, so files edited in place outside ``reindex`` only
+        show up in a full refresh.
+        """
+        with self._lock:
+            known = dict(self._db().execute("SELECT path, mtime_ns FROM dirs"))
+        seen: set[str] = set()
+        changes = 0
+        walk = os.walk(self.root) if self.root.is_dir() else ()
+        for dirpath, _, filenames in walk:
+            seen.add(dirpath)
+            try:
+                mtime = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            if not full and known.get(dirpath) == mtime:
+                continue
+            changes += self._refresh_dir(dirpath, filenames, mtime)
+        gone = [d for d in known if d not in seen]
+        if gone:
+            with self._lock:
+                db = self._db()
+                marks = ",".join("?" * len(gone))
+                removed = [p for (p,) in db.execute(
+                    f"SELECT path FROM tracks WHERE dir IN ({marks})", gone
+                )]
+                changes += self._apply([], removed)
+                db.executemany("DELETE FROM dirs WHERE path = ?", [(d,) for d in gone])
+                db.commit()
+        return changes
+
+    def _refresh_dir(self, dirpath: str, filenames: list[str], mtime: int) -> int:
+        with self._lock:
+            indexed = {
+                p: (m, s)
+                for p, m, s in self._db().execute(
+                    "SELECT path, mtime_ns, size FROM tracks WHERE dir = ?", (dirpath,)
+                )
+            }
+        rows = []
+        present = set()
+        for name in filenames:
+            if not name.endswith(self.suffix) or name.startswith("."):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            present.add(path)
+            if indexed.get(path) != (st.st_mtime_ns, st.st_size):
+                rows.append(_row(path, st))
+        with self._lock:
+            changes = self._apply(rows, [p for p in indexed if p not in present])
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (dirpath, mtime))
+            db.commit()
+        return changes
+
+    def reindex(self, paths: Iterable[Path | str]) -> int:
+        """Re-read the tags of ``paths`` now, e.g. after they were edited or renamed."""
+        rows, removed = [], []
+        for path in map(os.fspath, paths):
+            if not path.startswith(os.fspath(self.root) + os.sep):
+                continue
+            try:
+                rows.append(_row(path, os.stat(path)))
+            except OSError:
+                removed.append(path)
+        if not rows and not removed:
+            return 0
+        if self._conn is None and not self.path.exists():
+            return 0  # never refreshed; the first refresh picks them up
+        with self._lock:
+            changes = self._apply(rows, removed)
+            self._db().commit()
+        return changes
+
+    def _apply(self, rows: list[tuple], removed: list[str]) -> int:
+        """Write ``rows``, delete ``removed`` and update the affected summaries."""
+        if not rows and not removed:
+            return 0
+        db = self._db()
+        touched = {(r[8], r[9]) for r in rows}
+        for path in [r[0] for r in rows] + removed:
+            old = db.execute(
+                "SELECT artist_key, album_key FROM tracks WHERE path = ?", (path,)
+            ).fetchone()
+            if old is not None:
+                touched.add(old)
+        db.executemany(_UPSERT, rows)
+        db.executemany("DELETE FROM tracks WHERE path = ?", [(p,) for p in removed])
+        for artist_key, album_key in touched:
+            db.execute(
+                "DELETE FROM albums WHERE artist_key = ? AND album_key = ?",
+                (artist_key, album_key),
+            )
+            db.execute(
+                "INSERT INTO albums SELECT artist_key, album_key, MIN(artist), MIN(album), "
+                "COUNT(*) FROM tracks WHERE artist_key = ? AND album_key = ? "
+                "GROUP BY artist_key, album_key",
+                (artist_key, album_key),
+            )
+        for artist_key in {a for a, _ in touched}:
+            db.execute("DELETE FROM artists WHERE artist_key = ?", (artist_key,))
+            db.execute(
+                "INSERT INTO artists SELECT artist_key, MIN(artist), COUNT(*), SUM(tracks) "
+                "FROM albums WHERE artist_key = ? GROUP BY artist_key",
+                (artist_key,),
+            )
+        return len(rows) + len(removed)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _page(self, sql: str, count_sql: str, args: tuple, page: int, per_page: int) -> Page:
+        page, per_page = max(1, page), max(1, per_page)
+        with self._lock:
+            db = self._db()
+            total = db.execute(count_sql, args).fetchone()[0]
+            cur = db.execute(f"{sql} LIMIT ? OFFSET ?", (*args, per_page, (page - 1) * per_page))
+            names = [c[0] for c in cur.description]
+            items = [dict(zip(names, row)) for row in cur.fetchall()]
+        return Page(items, total, page, per_page)
+
+    def artists(self, page: int = 1, per_page: int = 50) -> Page:
+        return self._page(
+            "SELECT artist, albums, tracks FROM artists ORDER BY artist_key",
+            "SELECT COUNT(*) FROM artists",
+            (),
+            page,
+            per_page,
+        )
+
+    def albums(self, artist: str, page: int = 1, per_page: int = 50) -> Page:
+        return self._page(
+            "SELECT artist, album, tracks FROM albums WHERE artist_key = ? ORDER BY album_key",
+            "SELECT COUNT(*) FROM albums WHERE artist_key = ?",
+            (normalise(artist),),
+            page,
+            per_page,
+        )
+
+    _TRACK_COLUMNS = "SELECT path, artist, album, title, duration FROM tracks"
+
+    def tracks(self, artist: str, album: str, page: int = 1, per_page: int = 100) -> Page:
+        where = "WHERE artist_key = ? AND album_key = ?"
+        return self._page(
+            f"{self._TRACK_COLUMNS} {where} ORDER BY path",
+            f"SELECT COUNT(*) FROM tracks {where}",
+            (normalise(artist), normalise(album)),
+            page,
+            per_page,
+        )
+
+    def search(self, query: str, field: str = "any", page: int = 1, per_page: int = 50) -> Page:
+        """Tracks whose ``field`` starts with ``query``, or that contain its words for ``any``.
+
+        Field searches are prefix-only.  When an ``any`` search finds
+        nothing, words no library word starts with are replaced by their
+        closest library words (see ``FUZZY_CUTOFF``) and the search is retried.
+        """
+        key = normalise(query)
+        if field in FIELDS:
+            where = f"WHERE {field}_key >= ? AND {field}_key < ?"
+            order = {
+                "artist": "artist_key, album_key, path",
+                "album": "album_key, path",
+                "title": "title_key, path",
+            }[field]
+            return self._page(
+                f"{self._TRACK_COLUMNS} {where} ORDER BY {order}",
+                f"SELECT COUNT(*) FROM tracks {where}",
+                (key, key + _KEY_END),
+                page,
+                per_page,
+            )
+        if field != "any":
+            raise ValueError(f"Unknown search field {field!r}")
+        words = re.findall(r"\w+", key)
+        if not words:
+            return Page([], 0, max(1, page), max(1, per_page))
+        found = self._word_search([[w] for w in words], page, per_page)
+        if not found.total:
+            corrected = self._corrections(words)
+            if corrected is not None:
+                return self._word_search(corrected, page, per_page)
+        return found
+
+    def _word_search(self, groups: list[list[str]], page: int, per_page: int) -> Page:
+        """Tracks containing, for every group, a word starting with one of its words."""
+        self._db()
+        if self.fts:
+            match = " AND ".join(
+                "(" + " OR ".join(f'"{w}"*' for w in group) + ")" for group in groups
+            )
+            return self._page(
+                "SELECT t.path, t.artist, t.album, t.title, t.duration FROM tracks_fts "
+                "JOIN tracks t ON t.rowid = tracks_fts.rowid WHERE tracks_fts MATCH ? "
+                "ORDER BY bm25(tracks_fts)",
+                "SELECT COUNT(*) FROM tracks_fts WHERE tracks_fts MATCH ?",
+                (match,),
+                page,
+                per_page,
+            )
+        haystack = "(artist_key || ' ' || album_key || ' ' || title_key)"
+        where = " AND ".join(
+            "(" + " OR ".join(f"{haystack} LIKE ?" for _ in group) + ")" for group in groups
+        )
+        return self._page(
+            f"{self._TRACK_COLUMNS} WHERE {where} ORDER BY artist_key, album_key, path",
+            f"SELECT COUNT(*) FROM tracks WHERE {where}",
+            tuple(f"%{w}%" for group in groups for w in group),
+            page,
+            per_page,
+        )
+
+    def _vocabulary(self) -> list[str]:
+        """Sorted distinct words of the indexed artists, albums and titles."""
+        with self._lock:
+            db = self._db()
+            if self.fts:
+                return [t for (t,) in db.execute("SELECT term FROM tracks_vocab ORDER BY term")]
+            rows = db.execute("SELECT artist_key, album_key, title_key FROM tracks").fetchall()
+        return sorted({w for row in rows for k in row for w in re.findall(r"\w+", k or "")})
+
+    def _corrections(self, words: list[str]) -> Optional[list[list[str]]]:
+        """Close library words for each of ``words`` that no library word starts with.
+
+        ``None`` when every word is known or one has no close match.
+        """
+        vocabulary = self._vocabulary()
+        groups, changed = [], False
+        for word in words:
+            i = bisect.bisect_left(vocabulary, word)
+            if i < len(vocabulary) and vocabulary[i].startswith(word):
+                groups.append([word])
+                continue
+            close = difflib.get_close_matches(word, vocabulary, n=3, cutoff=FUZZY_CUTOFF)
+            if not close:
+                return None
+            groups.append(close)
+            changed = True
+        return groups if changed else None
+
+
+class LibraryIndexer:
+    """Daemon thread refreshing a ``LibraryIndex`` every ``interval`` seconds or on ``wake``.
+
+    The first refresh after ``start`` is a full one.
+    """
+
+    def __init__(self, index: Callable[[], LibraryIndex], interval: float = 3600.0) -> None:
+        self.index = index
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="library-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wake(self) -> None:
+        """Refresh soon, e.g. after tracks were approved into the library."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        full = True
+        while not self._stop.is_set():
+            try:
+                self.index().refresh(full=full)
+                full = False
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,121 @@
+# src/songripper/services/profiles.py
+"""Output profiles: which encodings a rip produces and where they are filed.
+
+The first profile is the primary one: its files are listed, edited and
+checked in staging.  Every other profile produces a rendition with the same
+name and its own extension next to the primary file, which follows the
+primary file through edits and approval into the profile's library root.
+
+``OUTPUT_PROFILES`` is a comma separated list of ``name[@bitrate][:library]``
+entries, e.g. ``alac:/music,opus@128k:/music-mobile``.  MP4 profiles are
+tagged with mutagen's MP4 support, Opus files with Vorbis comments.
+"""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    name: str
+    # ffmpeg encoder; ``None`` leaves the choice to ffmpeg (AAC for .m4a).
+    codec: Optional[str]
+    ext: str
+    bitrate: Optional[str] = None
+    # Library root for approved files; ``None`` means ``NAS_PATH``.
+    library: Optional[Path] = None
+
+    @property
+    def audio_format(self) -> str:
+        return self.ext.lstrip(".")
+
+    def encode_args(self) -> list[str]:
+        args = ["-c:a", self.codec] if self.codec else []
+        if self.bitrate:
+            args += ["-b:a", self.bitrate]
+        return args
+
+
+PRESETS = {
+    "m4a": OutputProfile("m4a", None, ".m4a"),
+    "aac": OutputProfile("aac", "aac", ".m4a", "256k"),
+    "alac": OutputProfile("alac", "alac", ".m4a"),
+    "opus": OutputProfile("opus", "libopus", ".opus", "96k"),
+}
+
+
+def parse_profiles(spec: str) -> list[OutputProfile]:
+    """Parse an ``OUTPUT_PROFILES`` value; an empty value means plain ``m4a``."""
+    profiles = []
+    for entry in (e.strip() for e in spec.split(",")):
+        if not entry:
+            continue
+        name, _, library = entry.partition(":")
+        name, _, bitrate = name.partition("@")
+        preset = PRESETS.get(name.strip().lower())
+        if preset is None:
+            raise ValueError(f"Unknown output profile {name!r}; choose from {', '.join(PRESETS)}")
+        profiles.append(
+            replace(
+                preset,
+                bitrate=bitrate.strip() or preset.bitrate,
+                library=Path(library.strip()) if library.strip() else None,
+            )
+        )
+    if not profiles:
+        profiles = [PRESETS["m4a"]]
+    exts = [p.ext for p in profiles]
+    if len(set(exts)) != len(exts):
+        raise ValueError("Output profiles must use different file extensions")
+    return profiles
+
+
+# ----------------------------------------------------------------------
+# Vorbis comments (Opus)
+# ----------------------------------------------------------------------
+def write_vorbis_tags(path: Path, tags: dict[str, str]) -> bool:
+    """Set ``tags`` on an Ogg Opus file; ``False`` when mutagen is unavailable."""
+    try:
+        from mutagen.oggopus import OggOpus
+    except Exception:
+        return False
+    audio = OggOpus(path)
+    for key, value in tags.items():
+        audio[key] = [value]
+    audio.save()
+    return True
+
+
+def write_vorbis_cover(path: Path, data: bytes, mime: str) -> bool:
+    """Embed ``data`` as the front cover of an Ogg Opus file."""
+    try:
+        from mutagen.flac import Picture
+        from mutagen.oggopus import OggOpus
+    except Exception:
+        return False
+    picture = Picture()
+    picture.type = 3  # front cover
+    picture.mime = mime
+    picture.data = data
+    audio = OggOpus(path)
+    audio["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+    audio.save()
+    return True
+
+
+def read_vorbis_cover(path: Path) -> Optional[tuple[bytes, str]]:
+    try:
+        from mutagen.flac import Picture
+        from mutagen.oggopus import OggOpus
+
+        blocks = OggOpus(path).get("metadata_block_picture") or []
+        if not blocks:
+            return None
+        picture = Picture(base64.b64decode(blocks[0]))
+    except Exception:
+        return None
+    return bytes(picture.data), picture.mime or "image/jpeg"
@@ -0,0 +1,114 @@
+# src/songripper/services/retry.py
+"""Retry helpers with error classification and jittered exponential backoff."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Errors that say the video itself cannot be fetched; retrying will not help.
+PERMANENT_ERRORS = re.compile(
+    r"Video unavailable|Private video|This video (?:is|has been) (?:not available|unavailable|removed)"
+    r"|has been removed|copyright|confirm your age|members-only|HTTP Error 404",
+    re.IGNORECASE,
+)
+
+# Transient network or rate-limit conditions reported by yt-dlp and ffmpeg.
+RETRYABLE_ERRORS = re.compile(
+    r"HTTP Error 429|Too Many Requests|HTTP Error 5\d\d|timed out|timeout"
+    r"|Connection (?:reset|refused|aborted)|Temporary failure|Remote end closed"
+    r"|IncompleteRead|urlopen error|Unable to download (?:webpage|API page)",
+    re.IGNORECASE,
+)
+
+# Signals that the remote side wants us to slow down.
+THROTTLE_ERRORS = re.compile(
+    r"HTTP Error 429|Too Many Requests|rate.?limit", re.IGNORECASE
+)
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """Return ``True`` when ``exc`` reports rate limiting (HTTP 429)."""
+
+    return bool(THROTTLE_ERRORS.search(str(exc)))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return ``True`` when ``exc`` looks transient (network, HTTP 429/5xx)."""
+
+    text = str(exc)
+    if PERMANENT_ERRORS.search(text):
+        return False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return bool(RETRYABLE_ERRORS.search(text))
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 60.0,
+    rand: Callable[[], float] = random.random,
+) -> float:
+    """Return a "full jitter" delay for the ``attempt``-th retry (0-based)."""
+
+    return rand() * min(cap, base * (2 ** attempt))
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    *,
+    attempts: int = 4,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    classify: Callable[[BaseException], bool] = is_retryable,
+    sleep: Callable[[float], None] = time.sleep,
+    on_attempt: Optional[Callable[[int], None]] = None,
+) -> T:
+    """Call ``func`` until it succeeds, fails permanently or runs out of attempts.
+
+    ``on_attempt`` is called with the 1-based attempt number before each call.
+    The last exception is re-raised unchanged.
+    """
+
+    attempts = max(attempts, 1)
+    for attempt in range(attempts):
+        if on_attempt is not None:
+            on_attempt(attempt + 1)
+        try:
+            return func()
+        except Exception as exc:
+            if attempt + 1 >= attempts or not classify(exc):
+                raise
+            sleep(backoff_delay(attempt, base_delay, max_delay))
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+async def call_with_retry_async(
+    func: Callable[[], Awaitable[T]],
+    *,
+    attempts: int = 4,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    classify: Callable[[BaseException], bool] = is_retryable,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    on_attempt: Optional[Callable[[int], None]] = None,
+) -> T:
+    """Awaitable counterpart of ``call_with_retry`` for coroutine functions."""
+
+    attempts = max(attempts, 1)
+    for attempt in range(attempts):
+        if on_attempt is not None:
+            on_attempt(attempt + 1)
+        try:
+            return await func()
+        except Exception as exc:
+            if attempt + 1 >= attempts or not classify(exc):
+                raise
+            await sleep(backoff_delay(attempt, base_delay, max_delay))
+    raise AssertionError("unreachable")  # pragma: no cover
@@ -4,16 +4,75 @@
 from __future__ import annotations
 
 import concurrent.futures
+import contextvars
+import glob
 import json
+import os
 import re
 import shutil
-import subprocess
+import tempfile
 import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
+from urllib.parse import quote
 
 from ..models import Track
-from ..settings import DATA_DIR, NAS_PATH
+from ..settings import (
+    COVER_FOLDER_ART,
+    COVER_MAX_SIZE,
+    COVER_QUALITY,
+    DATA_DIR,
+    FINGERPRINT_RESCAN,
+    FINGERPRINT_THRESHOLD,
+    HASH_INTERVAL,
+    HASH_RATE_MB,
+    ITUNES_SEARCH_URL,
+    LIBRARY_INDEX_INTERVAL,
+    NAS_PATH,
+    OUTPUT_PROFILES,
+    RIP_RETRY_ATTEMPTS,
+    RIP_RETRY_BASE_DELAY,
+    RIP_RETRY_MAX_DELAY,
+    RIP_CONCURRENCY_INITIAL,
+    RIP_CONCURRENCY_MAX,
+    RIP_CONCURRENCY_MIN,
+    RIP_SPLIT_CHAPTERS,
+    RIP_SPLIT_WORKERS,
+    STAGING_SCAN_WORKERS,
+    TAG_CACHE_SIZE,
+    TRACE_JOBS,
+)
+from .accounting import ResourceAccountant, usage_context
+from .artwork import CoverProcessor
+from .concurrency import AIMDLimiter
+from .contenthash import BackgroundHasher, HashIndex
+from .covers import FOLDER_ART, SIDECARS, AlbumCover, CoverStore
+from . import fingerprint
+from .events import JobEvents, progress_context, report
+from .jobs import ItemResult, JobRegistry, RipJob
+from .library import LibraryIndex, LibraryIndexer
+from .metrics import (
+    COMMAND_SECONDS,
+    COVER_CACHE,
+    QUEUE_DEPTH,
+    TRACKS,
+    WORKERS_BUSY,
+    WORKERS_TOTAL,
+    stage_timer,
+)
+from .profiles import (
+    OutputProfile,
+    parse_profiles,
+    read_vorbis_cover,
+    write_vorbis_cover,
+    write_vorbis_tags,
+)
+from .retry import call_with_retry, is_retryable
+from .tagcache import TagCache
+from .tracing import Trace, trace_context, traced
 
 
 class TrackUpdateError(Exception):
@@ -37,17 +96,147 @@ class RipperService:
         self.tag_lock = threading.Lock()
         self.album_lock = threading.Lock()
         self.album_art_cache: dict[tuple[str, str], bytes | None] = {}
+        self.jobs = JobRegistry()
+        self.events = JobEvents()
+        self.retry_attempts = RIP_RETRY_ATTEMPTS
+        self.retry_base_delay = RIP_RETRY_BASE_DELAY
+        self.retry_max_delay = RIP_RETRY_MAX_DELAY
+        self.accountant = ResourceAccountant()
+        self.trace_jobs = TRACE_JOBS
+        self.download_limiter = AIMDLimiter(
+            RIP_CONCURRENCY_INITIAL, RIP_CONCURRENCY_MIN, RIP_CONCURRENCY_MAX
+        )
+        self.folder_art = COVER_FOLDER_ART
+        self.cover_processor = CoverProcessor(COVER_MAX_SIZE, COVER_QUALITY)
+        self.tag_cache = TagCache(TAG_CACHE_SIZE)
+        self.scan_workers = STAGING_SCAN_WORKERS
+        self.split_chapters = RIP_SPLIT_CHAPTERS
+        self.split_workers = RIP_SPLIT_WORKERS
+        self.profiles = parse_profiles(OUTPUT_PROFILES)
+        self.fingerprint_threshold = FINGERPRINT_THRESHOLD
+        self._covers: CoverStore | None = None
+        self._fingerprints: fingerprint.FingerprintIndex | None = None
+        self._hashes: HashIndex | None = None
+        # Items being ripped right now; background scans wait while nonzero.
+        self._active_rips = 0
+        self._active_lock = threading.Lock()
+        self.hasher = BackgroundHasher(
+            lambda: self.hashes,
+            self._hash_roots,
+            rate=HASH_RATE_MB * 2**20,
+            interval=HASH_INTERVAL,
+            busy=self._ripping,
+        )
+        self._library: LibraryIndex | None = None
+        self.library_indexer = LibraryIndexer(lambda: self.library, LIBRARY_INDEX_INTERVAL)
+        self.fingerprint_indexer = fingerprint.FingerprintIndexer(
+            lambda: self.fingerprints,
+            lambda: (self.library_root, self.AUDIO_EXT),
+            interval=FINGERPRINT_RESCAN,
+            busy=self._ripping,
+        )
+
+    @property
+    def fingerprints(self) -> fingerprint.FingerprintIndex:
+        """Acoustic fingerprints of staged and library files, following ``data_dir``."""
+        path = self.data_dir / "fingerprints.npz"
+        if self._fingerprints is None or self._fingerprints.path != path:
+            self._fingerprints = fingerprint.FingerprintIndex(path, self._fingerprint_excerpt)
+        return self._fingerprints
+
+    @property
+    def hashes(self) -> HashIndex:
+        """Audio payload digests of staged and library files, following ``data_dir``."""
+        path = self.data_dir / "hashes.sqlite3"
+        if self._hashes is None or self._hashes.path != path:
+            if self._hashes is not None:
+                self._hashes.close()
+            self._hashes = HashIndex(path)
+        return self._hashes
+
+    @property
+    def library(self) -> LibraryIndex:
+        """Browse and search index of ``library_root``, following ``data_dir``."""
+        path = self.data_dir / "library.sqlite3"
+        current = self._library
+        if current is None or (current.path, current.root, current.suffix) != (
+            path,
+            self.library_root,
+            self.AUDIO_EXT,
+        ):
+            if current is not None:
+                current.close()
+            self._library = LibraryIndex(path, self.library_root, self.AUDIO_EXT)
+        return self._library
+
+    def _hash_roots(self) -> list[tuple[Path, str]]:
+        return [(self.data_dir / "staging", self.AUDIO_EXT), (self.library_root, self.AUDIO_EXT)]
+
+    def _ripping(self) -> bool:
+        return self._active_rips > 0
+
+    def _fingerprint_excerpt(self, path: Path) -> bytes:
+        cmd = fingerprint.excerpt_cmd(path, self.tag_cache.get(path).duration)
+        with stage_timer("fingerprint"):
+            return self._run_command(cmd, stage="fingerprint", text=False)
+
+    @property
+    def profiles(self) -> list[OutputProfile]:
+        """Output encodings of a rip; the first one is the primary staged file."""
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, profiles: list[OutputProfile]) -> None:
+        self._profiles = list(profiles)
+        self.AUDIO_FORMAT = self._profiles[0].audio_format
+        self.AUDIO_EXT = self._profiles[0].ext
 
-    def _run_command(self, cmd: list[str], **kwargs) -> str:
-        """Run a command and return stdout, or raise RipperError with stderr."""
+    def _library_root(self, profile: OutputProfile) -> Path:
+        return profile.library or self.nas_path
+
+    @property
+    def library_root(self) -> Path:
+        """Where approved primary files are filed (``NAS_PATH`` by default)."""
+        return self._library_root(self.profiles[0])
+
+    def _renditions(self, path: Path) -> list[tuple[OutputProfile, Path]]:
+        """Return the existing files of the secondary profiles next to ``path``."""
+        found = []
+        for profile in self.profiles[1:]:
+            rendition = path.with_suffix(profile.ext)
+            if rendition.exists():
+                found.append((profile, rendition))
+        return found
+
+    @property
+    def covers(self) -> CoverStore:
+        """Staged album art, following changes to ``data_dir``."""
+        staging = self.data_dir / "staging"
+        if self._covers is None or self._covers.staging_root != staging:
+            self._covers = CoverStore(staging, self.data_dir / "staging_covers.json")
+        return self._covers
+
+    def _run_command(self, cmd: list[str], stage: str = "command", **kwargs) -> str:
+        """Run a command and return stdout, or raise RipperError with stderr.
+
+        The child's wall time, CPU and peak memory are recorded under ``stage``.
+        """
         try:
             # We want to capture both stdout and stderr to provide better error messages.
             # But we also want to support passing other kwargs like 'text', 'check', etc.
             kwargs.setdefault("text", True)
             kwargs.setdefault("capture_output", True)
-            result = subprocess.run(cmd, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = self.accountant.run(cmd, stage, **kwargs)
+            finally:
+                COMMAND_SECONDS.observe(
+                    time.perf_counter() - start, Path(cmd[0]).name
+                )
             if result.returncode != 0:
                 error_msg = result.stderr or result.stdout or "No error output"
+                if isinstance(error_msg, bytes):
+                    error_msg = error_msg.decode("utf-8", "replace")
                 raise RipperError(
                     f"Command '{' '.join(cmd)}' failed with exit code {result.returncode}:\n{error_msg}"
                 )
@@ -63,7 +252,7 @@ class RipperService:
         # Since we might be in a container or venv, we use sys.executable to find the right pip.
         import sys
         cmd = [sys.executable, "-m", "pip", "install", "-U", "yt-dlp"]
-        return self._run_command(cmd)
+        return self._run_command(cmd, stage="update")
 
     # ------------------------------------------------------------------
     # Utility helpers
@@ -90,6 +279,7 @@ class RipperService:
         text = re.sub(r"\s+", " ", text)
         return text.strip()
 
+    @traced("itunes lookup")
     def fetch_cover(
         self, artist: str, title: str, requests_mod: Optional[object] = None
     ) -> Optional[bytes]:
@@ -101,7 +291,7 @@ class RipperService:
                 except Exception:
                     return None
             res = requests_mod.get(
-                "https://itunes.apple.com/search",
+                ITUNES_SEARCH_URL,
                 params={"term": f"{artist} {title}", "entity": "song", "limit": 1},
                 timeout=10,
             )
@@ -114,6 +304,7 @@ class RipperService:
         except Exception:
             return None
 
+    @traced("thumbnail fetch")
     def fetch_thumbnail(
         self, url: str, requests_mod: Optional[object] = None
     ) -> Optional[bytes]:
@@ -133,25 +324,8 @@ class RipperService:
     # ------------------------------------------------------------------
     # Core ripping and file management methods
     # ------------------------------------------------------------------
-    def mp3_from_url(
-        self,
-        url: str,
-        staging_dir: Path,
-        lock: threading.Lock | None = None,
-        *,
-        subprocess_mod=subprocess,
-        fetch_cover=None,
-        fetch_thumbnail=None,
-    ) -> tuple[str, str, Path]:
-        """Download ``url`` to ``staging_dir`` and tag the resulting audio."""
-
-        lock = lock or self.tag_lock
-        fetch_cover = fetch_cover or self.fetch_cover
-        fetch_thumbnail = fetch_thumbnail or self.fetch_thumbnail
-
-        meta = json.loads(
-            self._run_command(self.YT_BASE + ["-J", "--no-playlist", url])
-        )
+    def _describe(self, meta: dict) -> tuple[str, str, str, str]:
+        """Return cleaned ``(artist, title, album, prefix)`` for video metadata."""
         artist = self.clean(meta.get("artist") or meta["uploader"])
         title = self.clean(meta.get("track") or meta["title"])
         album = self.clean(meta.get("album") or meta.get("playlist") or "Singles")
@@ -173,120 +347,578 @@ class RipperService:
                 prefix = f"{num:02d} "
             except ValueError:
                 prefix = ""
+        return artist, title, album, prefix
 
-        outtmpl = str(staging_dir / f"{prefix}{title}.%(ext)s")
-        self._run_command(
-            self.YT_BASE
-            + ["-x", "--audio-format", self.AUDIO_FORMAT, "-o", outtmpl, url]
-        )
-        mp3_path = staging_dir / f"{prefix}{title}{self.AUDIO_EXT}"
-
-        # Trim any long silence (>5s) at the start or end of the track.
-        tmp_trim = mp3_path.with_name(mp3_path.stem + "_trim" + self.AUDIO_EXT)
-        trim_cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(mp3_path),
-            "-af",
-            (
-                "silenceremove="
-                "start_periods=1:start_duration=5:start_threshold=-50dB:"\
-                "stop_periods=1:stop_duration=5:stop_threshold=-50dB"
-            ),
-            str(tmp_trim),
+    def _download_cmd(self, url: str, outtmpl: str, progress: bool = False) -> list[str]:
+        """yt-dlp audio download keeping the source codec; ffmpeg converts it afterwards."""
+        cmd = self.YT_BASE + ["-x", "-o", outtmpl]
+        if progress:
+            # One progress line per update instead of carriage-return redraws.
+            cmd += ["--newline", "--progress"]
+        return cmd + [url]
+
+    SILENCE_FILTER = (
+        "silenceremove="
+        "start_periods=1:start_duration=5:start_threshold=-50dB:"
+        "stop_periods=1:stop_duration=5:stop_threshold=-50dB"
+    )
+
+    def _trim_cmd(self, src: Path, dst: Path) -> list[str]:
+        """ffmpeg command trimming long silence (>5s) at the start or end."""
+        return [
+            "ffmpeg", "-y", "-i", str(src), "-af", self.SILENCE_FILTER,
+            *self.profiles[0].encode_args(), str(dst),
+        ]
+
+    def _encode_cmd(
+        self, src: Path, outputs: list[Path], trim: bool = True
+    ) -> list[str]:
+        """ffmpeg command encoding ``src`` once per profile from a single decode.
+
+        The audio is decoded (and silence trimmed) once; ``asplit`` feeds
+        the result to one encoder per profile, writing ``outputs`` in the
+        order of ``profiles``.
+        """
+        labels = "".join(f"[a{i}]" for i in range(len(outputs)))
+        chain = f"{self.SILENCE_FILTER}," if trim else ""
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner", "-i", str(src),
+            "-filter_complex", f"[0:a]{chain}asplit={len(outputs)}{labels}",
         ]
+        for i, (profile, dst) in enumerate(zip(self.profiles, outputs)):
+            cmd += ["-map", f"[a{i}]", *profile.encode_args(), str(dst)]
+        return cmd
+
+    @staticmethod
+    def _downloaded(staging_dir: Path, stem: str) -> Path:
+        """Return the file yt-dlp wrote for ``-o {stem}.%(ext)s``."""
+        for path in staging_dir.glob(glob.escape(stem) + ".*"):
+            return path
+        raise RipperError(f"yt-dlp did not write {stem}.*")
+
+    def _encoded_outputs(self, staging_dir: Path, stem: str) -> tuple[str, list[Path]]:
+        """Return the download stem and the per-profile outputs of ``stem``."""
+        source = f".{stem.lstrip('.')}.source"
+        return source, [staging_dir / f"{stem}{p.ext}" for p in self.profiles]
+
+    def _fetch_source(self, url: str, staging_dir: Path, source_stem: str) -> Path:
+        """Download ``url`` unconverted as ``source_stem.<ext>`` and return the file.
+
+        Only the transfer holds a download slot; conversion happens after it
+        is released so the limiter's throughput samples measure the network.
+        """
+        report("stage", stage="download")
+        with self.download_limiter.slot() as slot, stage_timer("download"):
+            self._run_command(
+                self._download_cmd(url, str(staging_dir / f"{source_stem}.%(ext)s")),
+                stage="download",
+            )
+            source = self._downloaded(staging_dir, source_stem)
+            slot.nbytes = source.stat().st_size
+        return source
+
+    def _fetch_encoded(
+        self, url: str, staging_dir: Path, stem: str, trim: bool = True
+    ) -> list[Path]:
+        """Download ``url`` unconverted and encode it into every profile at once."""
+        source_stem, outputs = self._encoded_outputs(staging_dir, stem)
+        source = self._fetch_source(url, staging_dir, source_stem)
+        report("stage", stage="encode")
         try:
-            subprocess_mod.run(trim_cmd, check=True)
-            mp3_path.unlink()
-            tmp_trim.rename(mp3_path)
+            with stage_timer("encode"):
+                self._run_command(self._encode_cmd(source, outputs, trim), stage="encode")
         except Exception:
-            if tmp_trim.exists():
-                tmp_trim.unlink()
+            for path in outputs:
+                path.unlink(missing_ok=True)
+            raise
+        finally:
+            source.unlink(missing_ok=True)
+        return outputs
 
+    @staticmethod
+    def _thumbnail_url(meta: dict) -> Optional[str]:
+        thumb_url = meta.get("thumbnail")
+        if thumb_url is None:
+            thumbs = meta.get("thumbnails")
+            if isinstance(thumbs, list) and thumbs:
+                first = thumbs[0]
+                if isinstance(first, dict):
+                    thumb_url = first.get("url")
+                else:
+                    thumb_url = first
+        return thumb_url
+
+    def _write_tags(
+        self, path: Path, artist: str, title: str, album: str, prefix: str, lock
+    ) -> bool:
+        """Tag a freshly ripped file; ``False`` when mutagen is unavailable."""
+        if path.suffix == ".opus":
+            tags = {"artist": artist, "title": title, "album": album}
+            if prefix:
+                tags["tracknumber"] = prefix.strip()
+            with stage_timer("tag"), lock:
+                return write_vorbis_tags(path, tags)
         try:
             from mutagen.easymp4 import EasyMP4
+        except Exception:
+            return False
+        with stage_timer("tag"), lock:
+            audio = EasyMP4(path)
+            audio["artist"], audio["title"], audio["album"] = [artist], [title], [album]
+            if prefix:
+                audio["tracknumber"] = [prefix.strip()]
+            audio.save()
+        return True
+
+    def _write_ripped_cover(self, path: Path, cover: bytes, lock) -> None:
+        if path.suffix == ".opus":
+            mime = "image/png" if cover.startswith(b"\x89PNG") else "image/jpeg"
+            with stage_timer("tag"), lock:
+                write_vorbis_cover(path, cover, mime)
+            return
+        try:
             from mutagen.mp4 import MP4, MP4Cover
         except Exception:
-            EasyMP4 = MP4 = MP4Cover = None  # type: ignore
-
-        cover = None
-        if EasyMP4 is not None:
-            with lock:
-                audio = EasyMP4(mp3_path)
-                audio["artist"], audio["title"], audio["album"] = [artist], [title], [album]
-                if prefix:
-                    audio["tracknumber"] = [prefix.strip()]
-                audio.save()
-            key = (artist, album)
-            with self.album_lock:
-                cover = self.album_art_cache.get(key)
-            if cover is None:
-                cover = fetch_cover(artist, title)
+            return
+        with stage_timer("tag"), lock:
+            tags = MP4(path)
+            fmt = (
+                MP4Cover.FORMAT_PNG
+                if cover.startswith(b"\x89PNG")
+                else MP4Cover.FORMAT_JPEG
+            )
+            tags["covr"] = [MP4Cover(cover, imageformat=fmt)]
+            tags.save()
+
+    @traced("track", arg="url")
+    def mp3_from_url(
+        self,
+        url: str,
+        staging_dir: Path,
+        lock: threading.Lock | None = None,
+        *,
+        fetch_cover=None,
+        fetch_thumbnail=None,
+    ) -> tuple[str, str, Path] | list[tuple[str, str, Path]]:
+        """Download ``url`` to ``staging_dir`` and tag the resulting audio.
+
+        Returns ``(artist, album, path)``.  With ``split_chapters`` enabled a
+        video with several chapters becomes one track per chapter and a list
+        of those tuples is returned instead.
+        """
+
+        lock = lock or self.tag_lock
+        fetch_cover = fetch_cover or self.fetch_cover
+        fetch_thumbnail = fetch_thumbnail or self.fetch_thumbnail
+
+        report("stage", stage="metadata")
+        with stage_timer("metadata"):
+            meta = json.loads(
+                self._run_command(
+                    self.YT_BASE + ["-J", "--no-playlist", url], stage="metadata"
+                )
+            )
+        artist, title, album, prefix = self._describe(meta)
+        plan = self._chapter_plan(meta) if self.split_chapters else []
+        if len(plan) > 1:
+            return self._rip_chapters(
+                url, meta, staging_dir, plan, lock, fetch_cover, fetch_thumbnail
+            )
+
+        if len(self.profiles) > 1:
+            outputs = self._fetch_encoded(url, staging_dir, f"{prefix}{title}")
+        else:
+            outputs = [self._fetch_trimmed(url, staging_dir, f"{prefix}{title}")]
+
+        report("stage", stage="tag")
+        tagged = [
+            self._write_tags(path, artist, title, album, prefix, lock) for path in outputs
+        ]
+        if any(tagged):
+            cover = self._album_cover(
+                artist, album, title, meta, fetch_cover, fetch_thumbnail
+            )
+            if cover:
+                for path, ok in zip(outputs, tagged):
+                    if ok:
+                        self._write_ripped_cover(path, cover, lock)
+        self.tag_cache.invalidate(*outputs)
+        return artist, album, outputs[0]
+
+    def _fetch_trimmed(self, url: str, staging_dir: Path, stem: str) -> Path:
+        """Download ``url`` and encode it as the single profile with silence trimmed.
+
+        Should trimming fail the audio is encoded untrimmed instead.
+        """
+        source_stem, (path,) = self._encoded_outputs(staging_dir, stem)
+        source = self._fetch_source(url, staging_dir, source_stem)
+        report("stage", stage="trim")
+        try:
+            try:
+                with stage_timer("trim"):
+                    self._run_command(self._trim_cmd(source, path), stage="trim")
+            except Exception:
+                path.unlink(missing_ok=True)
+                with stage_timer("encode"):
+                    self._run_command(
+                        self._encode_cmd(source, [path], trim=False), stage="encode"
+                    )
+        finally:
+            source.unlink(missing_ok=True)
+        return path
+
+    def _album_cover(
+        self, artist: str, album: str, term: str, meta: dict, fetch_cover, fetch_thumbnail
+    ) -> Optional[bytes]:
+        """Return the processed cover of ``(artist, album)``, fetching it at most once per rip.
+
+        iTunes is searched for ``artist`` and ``term``; the video thumbnail
+        is the fallback.
+        """
+        key = (artist, album)
+        with self.album_lock:
+            cover = self.album_art_cache.get(key)
+        COVER_CACHE.inc("miss" if cover is None else "hit")
+        if cover is None:
+            with stage_timer("cover"):
+                cover = fetch_cover(artist, term)
                 if cover is None:
-                    thumb_url = meta.get("thumbnail")
-                    if thumb_url is None:
-                        thumbs = meta.get("thumbnails")
-                        if isinstance(thumbs, list) and thumbs:
-                            first = thumbs[0]
-                            if isinstance(first, dict):
-                                thumb_url = first.get("url")
-                            else:
-                                thumb_url = first
+                    thumb_url = self._thumbnail_url(meta)
                     if thumb_url:
                         cover = fetch_thumbnail(thumb_url)
-                with self.album_lock:
-                    self.album_art_cache[key] = cover
-            if cover and MP4 is not None:
-                with lock:
-                    tags = MP4(mp3_path)
-                    tags["covr"] = [MP4Cover(cover, imageformat=MP4Cover.FORMAT_JPEG)]
-                    tags.save()
-        return artist, album, mp3_path
+                if cover:
+                    cover, _ = self.cover_processor.process(cover)
+            with self.album_lock:
+                self.album_art_cache[key] = cover
+        return cover
+
+    def _chapter_plan(self, meta: dict) -> list[tuple[str, str, float, Optional[float]]]:
+        """Return ``(title, prefix, start, end)`` of each chapter of a video, in order."""
+        plan = []
+        chapters = sorted(
+            (c for c in meta.get("chapters") or [] if isinstance(c, dict)),
+            key=lambda c: float(c.get("start_time") or 0),
+        )
+        for n, chapter in enumerate(chapters, 1):
+            start = float(chapter.get("start_time") or 0)
+            end = chapter.get("end_time")
+            title = self.clean(str(chapter.get("title") or "")) or f"Track {n}"
+            plan.append((title, f"{n:02d} ", start, float(end) if end is not None else None))
+        return plan
+
+    @staticmethod
+    def _split_cmd(src: Path, dst: Path, start: float, end: Optional[float]) -> list[str]:
+        """ffmpeg command copying ``start``..``end`` seconds of ``src`` without re-encoding."""
+        cmd = ["ffmpeg", "-y", "-hide_banner", "-ss", f"{start:.3f}", "-i", str(src)]
+        if end is not None:
+            cmd += ["-t", f"{max(0.0, end - start):.3f}"]
+        return cmd + ["-map", "0:a", "-c", "copy", "-map_metadata", "-1", str(dst)]
+
+    def _rip_chapters(
+        self,
+        url: str,
+        meta: dict,
+        staging_dir: Path,
+        plan: list[tuple[str, str, float, Optional[float]]],
+        lock: threading.Lock,
+        fetch_cover,
+        fetch_thumbnail,
+    ) -> list[tuple[str, str, Path]]:
+        """Download ``url`` once and cut it into one tagged track per chapter.
+
+        Chapters are cut in parallel with ffmpeg stream copy, so the audio is
+        not re-encoded; silence trimming is skipped as it would need a decode.
+        The video is encoded into each profile once and every encoding is
+        cut.
+        """
+        artist, _, album, _ = self._describe(meta)
+        sources = self._fetch_encoded(url, staging_dir, f".{album}.chapters", trim=False)
+
+        cuts = self._chapter_cuts(staging_dir, plan, sources)
+        report("stage", stage="split", tracks=len(plan))
+        try:
+            with stage_timer("split"), concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(self.split_workers, len(plan))),
+                thread_name_prefix="chapter-split",
+            ) as ex:
+                futures = [
+                    # A fresh context per task keeps the job attribution of the commands.
+                    ex.submit(
+                        contextvars.copy_context().run,
+                        self._run_command,
+                        self._split_cmd(source, path, start, end),
+                        "split",
+                    )
+                    for source, path, (_, _, start, end) in cuts
+                ]
+                for future in futures:
+                    future.result()
+        except Exception:
+            for _, path, _ in cuts:
+                path.unlink(missing_ok=True)
+            raise
+        finally:
+            for source in sources:
+                source.unlink(missing_ok=True)
+
+        report("stage", stage="tag")
+        tagged = [
+            self._write_tags(path, artist, title, album, prefix, lock)
+            for _, path, (title, prefix, _, _) in cuts
+        ]
+        if any(tagged):
+            cover = self._album_cover(artist, album, album, meta, fetch_cover, fetch_thumbnail)
+            if cover:
+                for (_, path, _), ok in zip(cuts, tagged):
+                    if ok:
+                        self._write_ripped_cover(path, cover, lock)
+        self.tag_cache.invalidate(*(path for _, path, _ in cuts))
+        return [
+            (artist, album, path) for _, path, _ in cuts if path.suffix == self.AUDIO_EXT
+        ]
+
+    def _chapter_cuts(
+        self, staging_dir: Path, plan: list, sources: list[Path]
+    ) -> list[tuple[Path, Path, tuple]]:
+        """Return ``(source, track path, chapter)`` for every chapter of every profile."""
+        return [
+            (source, staging_dir / f"{chapter[1]}{chapter[0]}{profile.ext}", chapter)
+            for chapter in plan
+            for profile, source in zip(self.profiles, sources)
+        ]
+
+    def _item_reporter(self, job: RipJob, index: int) -> Callable[[str, dict], None]:
+        """Return a reporter publishing events of item ``index`` to the job's stream."""
+
+        def publish(kind: str, data: dict) -> None:
+            self.events.publish(job.id, kind, {"item": index, **data})
+
+        return publish
+
+    @staticmethod
+    def _item_event(item: ItemResult) -> dict:
+        return {
+            "url": item.url,
+            "status": item.status,
+            "attempts": item.attempts,
+            "error": item.error,
+        }
+
+    @staticmethod
+    def _track_events(item: ItemResult) -> list[dict]:
+        return [
+            {"path": path, "artist": item.artist, "album": item.album}
+            for path in item.tracks or [item.path]
+        ]
+
+    @staticmethod
+    def _ripped(result) -> list[tuple[str, str, Path]]:
+        """Normalise an ``mp3_from_url`` result to a list of ``(artist, album, path)``."""
+        return result if isinstance(result, list) else [result]
+
+    @staticmethod
+    def _job_event(job: RipJob) -> dict:
+        return {
+            "status": job.status,
+            "succeeded": len(job.succeeded),
+            "total": len(job.items),
+        }
+
+    @contextmanager
+    def _work_dir(self) -> Iterator[Path]:
+        """Yield a fresh directory for the temporary files of one rip attempt.
+
+        Items ripped at once may share a ``NN title`` stem (the same track at
+        the same position of two playlists), so each attempt downloads under
+        ``data_dir/work`` and only its finished tracks are moved to staging.
+        """
+        root = self.data_dir / "work"
+        root.mkdir(parents=True, exist_ok=True)
+        path = Path(tempfile.mkdtemp(prefix="rip-", dir=root))
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _entry_url(entry: object) -> str:
+        """Return the video URL of a flat playlist entry (dict or id)."""
+        vid = entry.get("id") if isinstance(entry, dict) else str(entry)
+        return f"https://youtu.be/{vid}"
+
+    # Job and item bookkeeping shared by ``rip_playlist`` and the asyncio
+    # pipeline, which differ only in how they wait for the work.
+
+    def _start_job(self, pl_url: str, job: RipJob | None) -> tuple[RipJob, Path]:
+        """Mark ``job`` (created for ``pl_url`` if missing) running; return it and staging."""
+        job = job or self.jobs.create(pl_url)
+        job.status = "running"
+        if self.trace_jobs and job.trace is None:
+            job.trace = Trace()
+        staging = self.data_dir / "staging"
+        staging.mkdir(parents=True, exist_ok=True)
+        with self.album_lock:
+            self.album_art_cache.clear()
+        return job, staging
+
+    @contextmanager
+    def _enumerating(self, job: RipJob) -> Iterator[None]:
+        """Attribute the enumeration to ``job`` and fail the job if it raises."""
+        try:
+            with usage_context(job), trace_context(job.trace):
+                yield
+        except Exception:
+            job.status = "failed"
+            self.events.publish(job.id, "job", self._job_event(job))
+            raise
+
+    def _track_items(
+        self, job: RipJob, pl_url: str, items: list | None, entries: list | None
+    ) -> list[ItemResult]:
+        """Add and announce a job item per entry, or one for ``pl_url`` when
+        it enumerated to a single video."""
+        if items:
+            urls = [self._entry_url(it) for it in items]
+        else:
+            urls = [pl_url] if entries is None else []
+        tracked = [job.add_item(url) for url in urls]
+        for index, item in enumerate(tracked):
+            self.events.publish(job.id, "item", {"item": index, **self._item_event(item)})
+        return tracked
+
+    @contextmanager
+    def _item_workers(self, tracked: list[ItemResult], workers: int) -> Iterator[None]:
+        """Count ``tracked`` as queued and ``workers`` as available while they rip."""
+        QUEUE_DEPTH.inc(amount=len(tracked))
+        WORKERS_TOTAL.inc(amount=workers)
+        try:
+            yield
+        finally:
+            WORKERS_TOTAL.dec(amount=workers)
+
+    @contextmanager
+    def _ripping_item(self, job: RipJob, index: int, item: ItemResult) -> Iterator[dict]:
+        """Run the body as the rip of ``item``, yielding the retry options to use.
+
+        Publishes the item's events and keeps its status and metrics; an
+        error from the body fails the item instead of propagating.
+        """
+        QUEUE_DEPTH.dec()
+        WORKERS_BUSY.inc()
+        item.status = "running"
+        item.started = time.time()
+        reporter = self._item_reporter(job, index)
+        reporter("item", self._item_event(item))
+
+        def count_attempt(n: int) -> None:
+            item.attempts = n
+
+        with self._active_lock:
+            self._active_rips += 1
+        try:
+            with usage_context(job, item.url), trace_context(job.trace), \
+                    progress_context(reporter):
+                yield {
+                    "attempts": self.retry_attempts,
+                    "base_delay": self.retry_base_delay,
+                    "max_delay": self.retry_max_delay,
+                    "on_attempt": count_attempt,
+                }
+            item.status = "done"
+            for event in self._track_events(item):
+                reporter("track", event)
+        except Exception as exc:
+            item.status = "failed"
+            item.retryable = is_retryable(exc)
+            item.error = str(exc)
+        finally:
+            item.finished = time.time()
+            WORKERS_BUSY.dec()
+            with self._active_lock:
+                self._active_rips -= 1
+            TRACKS.inc(item.status)
+            reporter("item", self._item_event(item))
+
+    def _stage_ripped(self, item: ItemResult, result, staging: Path, move=shutil.move) -> None:
+        """Move the tracks of an ``mp3_from_url`` result into staging and record them."""
+        tracks = []
+        for artist, album, path in self._ripped(result):
+            dest = staging / artist / album
+            with stage_timer("move"):
+                dest.mkdir(parents=True, exist_ok=True)
+                for _, rendition in self._renditions(path):
+                    move(str(rendition), dest / rendition.name)
+                move(str(path), dest / path.name)
+            tracks.append(str(dest / path.name))
+            item.artist, item.album = artist, album
+        item.path, item.tracks = tracks[0], tracks
+
+    def _finish_job(self, job: RipJob) -> str:
+        status = job.finish()
+        self.events.publish(job.id, "job", self._job_event(job))
+        print(job.report())
+        return status
+
+    def enumerate_playlist(self, pl_url: str, *, items: str | None = None) -> dict:
+        """Return the flat playlist info for ``pl_url``.
+
+        ``items`` is passed to ``--playlist-items`` so callers can probe a
+        playlist without enumerating every entry.
+        """
+        cmd = self.YT_BASE + ["--flat-playlist", "-J"]
+        if items:
+            cmd += ["--playlist-items", items]
+        with stage_timer("enumerate"):
+            return json.loads(self._run_command(cmd + [pl_url], stage="enumerate"))
 
     def rip_playlist(
         self,
         pl_url: str,
         *,
-        subprocess_mod=subprocess,
         shutil_mod=shutil,
         fetch_cover=None,
         fetch_thumbnail=None,
         mp3_func=None,
+        entries: list | None = None,
+        job: RipJob | None = None,
+        sleep=time.sleep,
     ) -> str:
-        """Rip a playlist or single video URL into the staging directory."""
-        staging = self.data_dir / "staging"
-        staging.mkdir(parents=True, exist_ok=True)
-        with self.album_lock:
-            self.album_art_cache.clear()
+        """Rip a playlist or single video URL into the staging directory.
 
-        info = json.loads(
-            self._run_command(self.YT_BASE + ["--flat-playlist", "-J", pl_url])
-        )
-        items = info.get("entries")
+        When ``entries`` is given it replaces the enumeration of ``pl_url``,
+        which lets subscriptions rip only newly added items.
 
-        fetch_cover = fetch_cover or self.fetch_cover
-        fetch_thumbnail = fetch_thumbnail or self.fetch_thumbnail
+        Every entry is tracked as an item of ``job`` and retried with
+        jittered exponential backoff when its error looks transient.  A
+        failing item never aborts the others; the returned job status is
+        ``"done"``, ``"partial"`` or ``"failed"``.
+        """
+        job, staging = self._start_job(pl_url, job)
+        items = entries
+        if entries is None:
+            with self._enumerating(job):
+                items = self.enumerate_playlist(pl_url).get("entries")
         mp3_func = mp3_func or self.mp3_from_url
 
-        def rip_item(url: str) -> None:
-            artist, album, path = mp3_func(url, staging)
-            dest = staging / artist / album
-            dest.mkdir(parents=True, exist_ok=True)
-            shutil_mod.move(str(path), dest / path.name)
-
-        if items:
-            def to_url(it: object) -> str:
-                vid = it.get("id") if isinstance(it, dict) else str(it)
-                return f"https://youtu.be/{vid}"
+        def rip_once(item: ItemResult) -> None:
+            with self._work_dir() as work:
+                self._stage_ripped(item, mp3_func(item.url, work), staging, shutil_mod.move)
 
-            with concurrent.futures.ThreadPoolExecutor() as ex:
-                list(ex.map(lambda it: rip_item(to_url(it)), items))
-        else:
-            rip_item(pl_url)
+        def rip_item(index: int, item: ItemResult) -> None:
+            with self._ripping_item(job, index, item) as retry:
+                call_with_retry(lambda: rip_once(item), sleep=sleep, **retry)
 
-        print("Songs successfully transferred to staging directory")
-        return "done"
+        tracked = self._track_items(job, pl_url, items, entries)
+        if tracked:
+            # Downloads are gated by the adaptive limiter; the pool only has
+            # to be large enough for its ceiling.
+            workers = min(len(tracked), self.download_limiter.maximum)
+            with self._item_workers(tracked, workers), \
+                    concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+                concurrent.futures.wait(
+                    [ex.submit(rip_item, i, it) for i, it in enumerate(tracked)]
+                )
+        return self._finish_job(job)
 
     def staging_has_files(self) -> bool:
         staging = self.data_dir / "staging"
@@ -297,7 +929,21 @@ class RipperService:
         if not self.staging_has_files():
             return
         for p in list(staging.iterdir()):
-            dest_artist = self.nas_path / p.name
+            dest_artist = self.library_root / p.name
+            covers = {}
+            tracks = []
+            if p.is_dir():
+                for album in p.iterdir():
+                    if not album.is_dir():
+                        continue
+                    cover = self._embed_album_cover(album)
+                    if cover is not None:
+                        covers[album.name] = cover
+                    for track in album.glob(f"*{self.AUDIO_EXT}"):
+                        self._file_renditions(
+                            track, p.name, album.name, shutil_mod=shutil_mod, in_place=True
+                        )
+                        tracks.append(track)
             if dest_artist.exists():
                 for album in p.iterdir():
                     shutil_mod.move(str(album), dest_artist / album.name)
@@ -307,33 +953,87 @@ class RipperService:
                     pass
             else:
                 shutil_mod.move(str(p), dest_artist)
+            for track in tracks:
+                self._track_moved(track, dest_artist / track.parent.name / track.name)
+            for album, (data, mime) in covers.items():
+                self._write_folder_art(dest_artist / album, data, mime)
+        self.library_indexer.wake()
         try:
             staging.rmdir()
         except OSError:
             pass
 
-    def approve_selected(self, paths: list[str], *, shutil_mod=shutil) -> None:
+    def _track_moved(self, src: Path, dest: Path) -> None:
+        """Carry the fingerprint and audio hash of ``src`` over to ``dest`` after a move."""
+        self.fingerprints.rename(src, dest)
+        self.hashes.rename(src, dest)
+
+    def _file_renditions(
+        self,
+        track: Path,
+        artist: str,
+        album: str,
+        art: Optional[tuple[bytes, str]] = None,
+        *,
+        shutil_mod=shutil,
+        in_place: bool = False,
+    ) -> None:
+        """Embed ``art`` into the renditions of ``track`` and move them to their libraries.
+
+        With ``in_place`` renditions filed in the primary library stay next
+        to ``track``, for callers that move the whole album directory.
+        """
+        for profile, rendition in self._renditions(track):
+            if art is not None:
+                self._embed_cover(rendition, *art)
+            root = self._library_root(profile)
+            if in_place and root == self.library_root:
+                continue
+            dest_dir = root / artist / album
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            shutil_mod.move(str(rendition), dest_dir / rendition.name)
+
+    def approve_selected(self, paths: list[str], *, shutil_mod=shutil) -> list[Path]:
+        """Move the staged ``paths`` into the library and return where they went."""
         staging_root = self.data_dir / "staging"
+        approved: list[Path] = []
         if not paths:
-            return
+            return approved
+        albums: dict[Path, tuple[Path, Optional[AlbumCover], Optional[bytes]]] = {}
         for track in paths:
             src = Path(track)
             if not src.exists():
                 continue
-            dest_dir = self.nas_path / src.parents[1].name / src.parent.name
+            if src.parent not in albums:
+                cover = self.covers.get(src.parent)
+                dest_dir = self.library_root / src.parents[1].name / src.parent.name
+                albums[src.parent] = (dest_dir, cover, cover.read() if cover else None)
+            dest_dir, cover, data = albums[src.parent]
+            if cover is not None:
+                self._embed_cover(src, data, cover.mime)
+            self._file_renditions(
+                src,
+                src.parents[1].name,
+                src.parent.name,
+                (data, cover.mime) if cover is not None else None,
+                shutil_mod=shutil_mod,
+            )
             dest_dir.mkdir(parents=True, exist_ok=True)
             shutil_mod.move(str(src), dest_dir / src.name)
-            parent = src.parent
-            while parent != staging_root:
-                try:
-                    parent.rmdir()
-                except OSError:
-                    break
-                parent = parent.parent
+            self._track_moved(src, dest_dir / src.name)
+            approved.append(dest_dir / src.name)
+        for album_dir, (dest_dir, cover, data) in albums.items():
+            if cover is not None:
+                self._write_folder_art(dest_dir, data, cover.mime)
+                if not any(album_dir.glob(f"*{self.AUDIO_EXT}")):
+                    self.covers.discard(album_dir)
+        self._prune_empty_dirs(albums, staging_root)
+        self.library_indexer.wake()
         try:
             staging_root.rmdir()
         except OSError:
             pass
+        return approved
 
     # ------------------------------------------------------------------
     # Duplicate-aware approval helpers
@@ -352,6 +1052,48 @@ class RipperService:
                     matches.append(existing)
         return matches
 
+    def _acoustic_matches(self, path: Path) -> Optional[list[Path]]:
+        """Return library files that sound like ``path``; ``None`` if it cannot be fingerprinted.
+
+        Only ``path`` is decoded here; library files are fingerprinted by
+        the background indexer.
+        """
+        if not fingerprint.available():
+            return None
+        index = self.fingerprints
+        landmarks = index.get(path)
+        if landmarks is None:
+            return None
+        found = index.nearest(landmarks, self.fingerprint_threshold, within=self.library_root)
+        return [Path(p) for p, _ in found]
+
+    def _exact_duplicates(self, path: Path) -> list[Path]:
+        """Library files with the same audio payload as ``path``.
+
+        ``path`` itself is hashed now if needed; library files are hashed
+        by the background hasher.
+        """
+        try:
+            digest = self.hashes.hash(path)
+        except OSError:
+            return []
+        root = os.fspath(self.library_root) + os.sep
+        return [
+            p for p in self.hashes.matches(digest, exclude=path)
+            if os.fspath(p).startswith(root)
+        ]
+
+    def _duplicates(self, path: Path, dest_dir: Path) -> list[Path]:
+        """Acoustic matches of ``path`` anywhere in the library.
+
+        Falls back to similar file names in ``dest_dir`` without NumPy or
+        when ``path`` cannot be decoded.
+        """
+        matches = self._acoustic_matches(path)
+        if matches is None:
+            return self._find_matches(dest_dir, path.stem)
+        return matches
+
     def approve_with_checks(
         self,
         *,
@@ -369,13 +1111,17 @@ class RipperService:
             for album_dir in list(artist_dir.iterdir()):
                 if not album_dir.is_dir():
                     continue
-                dest_dir = self.nas_path / artist_dir.name / album_dir.name
+                dest_dir = self.library_root / artist_dir.name / album_dir.name
                 dest_dir.mkdir(parents=True, exist_ok=True)
+                cover = self.covers.get(album_dir)
+                data = cover.read() if cover is not None else None
                 for track_path in list(album_dir.glob(f"*{self.AUDIO_EXT}")):
                     dest_path = dest_dir / track_path.name
-                    matches = self._find_matches(dest_dir, track_path.stem)
+                    exact = self._exact_duplicates(track_path)
+                    matches = exact or self._duplicates(track_path, dest_dir)
                     if matches:
-                        print(f"Possible duplicates for {track_path.name}:")
+                        kind = "Identical audio" if exact else "Possible duplicates"
+                        print(f"{kind} for {track_path.name}:")
                         for m in matches:
                             print(f" - {m.name}")
                         resp = input_func("Overwrite with new file? [y/N] ").strip().lower()
@@ -386,7 +1132,21 @@ class RipperService:
                                 dest_path.unlink()
                             except OSError:
                                 pass
+                    if cover is not None:
+                        self._embed_cover(track_path, data, cover.mime)
+                    self._file_renditions(
+                        track_path,
+                        artist_dir.name,
+                        album_dir.name,
+                        (data, cover.mime) if cover is not None else None,
+                        shutil_mod=shutil_mod,
+                    )
                     shutil_mod.move(str(track_path), dest_path)
+                    self._track_moved(track_path, dest_path)
+                if cover is not None:
+                    self._write_folder_art(dest_dir, data, cover.mime)
+                    if not any(album_dir.glob(f"*{self.AUDIO_EXT}")):
+                        self.covers.discard(album_dir)
                 try:
                     album_dir.rmdir()
                 except OSError:
@@ -395,6 +1155,7 @@ class RipperService:
                 artist_dir.rmdir()
             except OSError:
                 pass
+        self.library_indexer.wake()
         try:
             staging_root.rmdir()
         except OSError:
@@ -405,170 +1166,405 @@ class RipperService:
         if not self.staging_has_files():
             return False
         shutil_mod.rmtree(staging)
+        self.covers.clear()
         return True
 
     def list_staged_tracks(self) -> list[Track]:
-        staging = self.data_dir / "staging"
-        if not staging.exists():
-            return []
-
-        tracks: list[Track] = []
-        for artist_dir in staging.iterdir():
-            if not artist_dir.is_dir():
-                continue
-            for album_dir in artist_dir.iterdir():
-                if not album_dir.is_dir():
-                    continue
-                for mp3 in album_dir.glob(f"*{self.AUDIO_EXT}"):
-                    name = mp3.stem
-                    if re.match(r"\d{2} ", name):
-                        title = name[3:]
-                    else:
-                        title = name
-                    cover_b64 = None
-                    try:
-                        from mutagen.mp4 import MP4, MP4Cover
-                        import base64
-
-                        tags = MP4(mp3)
-                        pics = tags.tags.get("covr") if tags.tags else []
-                        if pics:
-                            pic = pics[0]
-                            mime = (
-                                "image/png"
-                                if getattr(pic, "imageformat", MP4Cover.FORMAT_JPEG)
-                                == MP4Cover.FORMAT_PNG
-                                else "image/jpeg"
-                            )
-                            cover_b64 = "data:%s;base64,%s" % (
-                                mime,
-                                base64.b64encode(bytes(pic)).decode("ascii"),
-                            )
-                    except Exception:
-                        cover_b64 = None
-                    tracks.append(
-                        Track(
-                            job_id=0,
-                            artist=artist_dir.name,
-                            album=album_dir.name,
-                            title=title,
-                            filepath=str(mp3),
-                            cover=cover_b64,
-                        )
-                    )
+        tracks = list(self.iter_staged_tracks())
         tracks.sort(key=lambda t: (t.artist.lower(), t.album.lower()))
         return tracks
 
-    def read_tags(self, filepath: str) -> dict[str, str]:
-        path = Path(filepath)
-        try:
-            from mutagen.easymp4 import EasyMP4
-        except Exception:
-            EasyMP4 = None
-        if EasyMP4 is not None:
+    def _scan_albums(self, staging: Path) -> Iterator[tuple[str, str, Path, list[str], bool]]:
+        """Yield ``(artist, album, dir, track names, has sidecar)`` in display order.
+
+        Uses ``os.scandir`` so directory checks come from the dirent type
+        instead of a ``stat`` per entry.
+        """
+
+        def subdirs(path: str) -> list[os.DirEntry]:
             try:
-                audio = EasyMP4(path)
-                name = path.stem
-                title_from_file = name[3:] if re.match(r"\d{2} ", name) else name
-                return {
-                    "artist": audio.get("artist", [path.parents[1].name])[0],
-                    "album": audio.get("album", [path.parent.name])[0],
-                    "title": audio.get("title", [title_from_file])[0],
-                }
-            except Exception:
-                pass
+                with os.scandir(path) as it:
+                    dirs = [e for e in it if e.is_dir()]
+            except OSError:
+                return []
+            return sorted(dirs, key=lambda e: e.name.lower())
+
+        for artist in subdirs(os.fspath(staging)):
+            for album in subdirs(artist.path):
+                names: list[str] = []
+                sidecar = False
+                try:
+                    with os.scandir(album.path) as it:
+                        for entry in it:
+                            if entry.name.endswith(self.AUDIO_EXT) and entry.is_file():
+                                names.append(entry.name)
+                            elif entry.name in SIDECARS.values():
+                                sidecar = True
+                except OSError:
+                    continue
+                names.sort()
+                yield artist.name, album.name, Path(album.path), names, sidecar
+
+    def _staged_track(
+        self, artist: str, album: str, path: Path, album_cover: Optional[AlbumCover]
+    ) -> Track:
         name = path.stem
         title = name[3:] if re.match(r"\d{2} ", name) else name
-        return {
-            "artist": path.parents[1].name,
-            "album": path.parent.name,
-            "title": title,
-        }
+        info = self.tag_cache.get(path)
+        cover_url = None
+        if album_cover is not None:
+            cover_url = "/cover?filepath=%s&v=%s" % (quote(str(path)), album_cover.sha256[:12])
+        elif info.has_cover:
+            cover_url = "/cover?filepath=%s&v=%d" % (quote(str(path)), info.mtime_ns)
+        duplicates = self.hashes.duplicates(path)
+        return Track(
+            job_id=0,
+            artist=artist,
+            album=album,
+            title=title,
+            filepath=str(path),
+            cover=cover_url,
+            duration=info.duration,
+            duplicate=str(duplicates[0]) if duplicates else None,
+        )
 
-    def update_track(self, filepath: str, field: str, value: str) -> Path:
-        value = self.clean(value)
-        tags = self.read_tags(filepath)
-        tags[field] = value
+    def staged_track(self, filepath: str) -> Track:
+        """Return the staging listing entry of a single staged file."""
+        path = Path(filepath)
+        album_dir = path.parent
+        return self._staged_track(
+            album_dir.parent.name, album_dir.name, path, self.covers.get(album_dir)
+        )
+
+    def iter_staged_tracks(self) -> Iterator[Track]:
+        """Yield staged tracks ordered by artist and album while they are parsed.
+
+        Tags are read on a pool of ``scan_workers`` threads, which hides the
+        per-file latency of network storage, and at most a few tracks per
+        worker are parsed ahead of the consumer.
+        """
+        staging = self.data_dir / "staging"
+        workers = max(1, self.scan_workers)
+        pending: deque[concurrent.futures.Future] = deque()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="staging-scan"
+        ) as ex:
+            try:
+                for artist, album, album_dir, names, sidecar in self._scan_albums(staging):
+                    cover = self.covers.get(album_dir) if sidecar else None
+                    for name in names:
+                        pending.append(
+                            ex.submit(self._staged_track, artist, album, album_dir / name, cover)
+                        )
+                        while len(pending) >= workers * 4:
+                            yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _embedded_cover(self, path: Path) -> Optional[tuple[bytes, str]]:
+        """Return the first ``covr`` image of ``path`` and its MIME type."""
+        if path.suffix == ".opus":
+            return read_vorbis_cover(path)
         try:
-            from mutagen.easymp4 import EasyMP4
+            from mutagen.mp4 import MP4, MP4Cover
+
+            tags = MP4(path)
+            pics = tags.tags.get("covr") if tags.tags else []
+            if not pics:
+                return None
+            pic = pics[0]
+            mime = (
+                "image/png"
+                if getattr(pic, "imageformat", MP4Cover.FORMAT_JPEG) == MP4Cover.FORMAT_PNG
+                else "image/jpeg"
+            )
+            return bytes(pic), mime
         except Exception:
-            EasyMP4 = None
-        if EasyMP4 is not None:
-            try:
-                audio = EasyMP4(filepath)
-                audio["artist"] = [tags["artist"]]
-                audio["album"] = [tags["album"]]
-                audio["title"] = [tags["title"]]
-                audio.save()
-            except Exception:
-                pass
+            return None
+
+    def track_cover(self, filepath: str) -> Optional[tuple[bytes, str]]:
+        """Return the staged album cover for ``filepath`` or its embedded art."""
         path = Path(filepath)
         if not path.exists():
             raise TrackUpdateError(f"File not found: {filepath}")
-        staging_root = self.data_dir / "staging"
-        dest_dir = staging_root / tags["artist"] / tags["album"]
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        prefix = ""
-        if re.match(r"\d{2} ", path.stem):
-            prefix = path.stem[:3]
-        new_path = dest_dir / f"{prefix}{tags['title']}{self.AUDIO_EXT}"
-        if path.resolve() != new_path.resolve():
-            try:
-                path.rename(new_path)
-            except OSError as e:
-                raise TrackUpdateError(str(e))
-            parent = path.parent
-            while parent != staging_root:
+        cover = self.covers.get(path.parent)
+        if cover is not None:
+            return cover.read(), cover.mime
+        return self._embedded_cover(path)
+
+    def read_tags(self, filepath: str) -> dict[str, str]:
+        return self.tag_cache.get(filepath).tags()
+
+    def update_track(self, filepath: str, field: str, value: str) -> Path:
+        return self.update_tracks([filepath], {field: value})[0]
+
+    def _prune_empty_dirs(self, dirs, root: Path) -> None:
+        """Remove empty directories in ``dirs`` and their parents below ``root``."""
+        for parent in sorted(set(dirs), key=lambda d: len(d.parts), reverse=True):
+            while parent != root:
                 try:
                     parent.rmdir()
+                except FileNotFoundError:
+                    pass  # already renamed away as a whole directory
                 except OSError:
                     break
                 parent = parent.parent
-        return new_path
+
+    def _plan_dir_moves(self, plan) -> dict[Path, Path]:
+        """Find source directories that can be renamed as a whole.
+
+        A directory qualifies when every track in it is part of ``plan``,
+        they all move to the same new directory and keep their file names.
+        Merging into a directory that already holds a file of the same name
+        raises ``TrackUpdateError`` before anything has been moved.
+        """
+        by_dir: dict[Path, list[tuple[Path, Path]]] = {}
+        for path, _, new_path in plan:
+            by_dir.setdefault(path.parent, []).append((path, new_path))
+        moves: dict[Path, Path] = {}
+        for src_dir, items in by_dir.items():
+            dest_dir = items[0][1].parent
+            if dest_dir.resolve() == src_dir.resolve():
+                continue
+            if any(n.parent != dest_dir or n.name != p.name for p, n in items):
+                continue
+            if src_dir in dest_dir.parents or dest_dir in src_dir.parents:
+                continue
+            selected = {p.name for p, _ in items}
+            if any(f.name not in selected for f in src_dir.glob(f"*{self.AUDIO_EXT}")):
+                continue
+            if dest_dir.exists():
+                moving = selected | {r.name for p, _ in items for _, r in self._renditions(p)}
+                clash = sorted(moving & {e.name for e in dest_dir.iterdir()})
+                if clash:
+                    raise TrackUpdateError(f"{dest_dir.name} already contains {clash[0]}")
+            moves[src_dir] = dest_dir
+        return moves
+
+    def _move_dir(self, src_dir: Path, dest_dir: Path) -> None:
+        """Rename ``src_dir`` to ``dest_dir``, merging entry by entry if it exists."""
+        try:
+            if not dest_dir.exists():
+                dest_dir.parent.mkdir(parents=True, exist_ok=True)
+                src_dir.rename(dest_dir)
+                return
+            for entry in src_dir.iterdir():
+                target = dest_dir / entry.name
+                if not target.exists():
+                    entry.rename(target)
+        except OSError as e:
+            raise TrackUpdateError(str(e))
+
+    def update_tracks(
+        self,
+        filepaths: list[str],
+        changes: dict[str, str],
+        art: bytes | None = None,
+        art_mime: str = "image/jpeg",
+    ) -> list[Path]:
+        """Apply ``changes`` to every track with one tag write and one rename each.
+
+        The final tags and path of every track are computed before anything
+        is touched, so a missing file or two tracks colliding on the same
+        name abort the batch without partial edits.  Files are then written
+        and moved in parallel, emptied directories are pruned once and
+        ``art`` is applied once per resulting album.  When a whole album
+        directory moves unchanged it is renamed in a single operation.
+        Returns the new paths in the order of ``filepaths``.
+        """
+        changes = {field: self.clean(value) for field, value in changes.items()}
+        staging_root = self.data_dir / "staging"
+
+        plan: list[tuple[Path, dict[str, str], Path]] = []
+        targets: dict[Path, Path] = {}
+        sources = {Path(fp).resolve() for fp in filepaths}
+        for filepath in filepaths:
+            path = Path(filepath)
+            if not path.exists():
+                raise TrackUpdateError(f"File not found: {filepath}")
+            tags = {**self.read_tags(filepath), **changes}
+            prefix = path.stem[:3] if re.match(r"\d{2} ", path.stem) else ""
+            new_path = (
+                staging_root
+                / tags["artist"]
+                / tags["album"]
+                / f"{prefix}{tags['title']}{self.AUDIO_EXT}"
+            )
+            other = targets.setdefault(new_path.resolve(), path)
+            if other != path:
+                raise TrackUpdateError(
+                    f"{other.name} and {path.name} would both become {new_path.name}"
+                )
+            if new_path.resolve() in sources and new_path.resolve() != path.resolve():
+                # Renames run in parallel, so never move onto another selected track.
+                raise TrackUpdateError(f"{path.name} would replace {new_path.name}")
+            plan.append((path, tags, new_path))
+
+        try:
+            from mutagen.easymp4 import EasyMP4
+        except Exception:
+            EasyMP4 = None
+
+        def retag(path: Path, tags: dict[str, str]) -> None:
+            fields = {key: tags[key] for key in ("artist", "album", "title")}
+            try:
+                if path.suffix == ".opus":
+                    write_vorbis_tags(path, fields)
+                elif EasyMP4 is not None:
+                    audio = EasyMP4(path)
+                    for key, value in fields.items():
+                        audio[key] = [value]
+                    audio.save()
+            except Exception:
+                pass
+            self.tag_cache.invalidate(path)
+
+        def apply(step: tuple[Path, dict[str, str], Path]) -> Path:
+            path, tags, new_path = step
+            # Renditions share the primary file's name and follow its edits.
+            moves = [
+                (rendition, new_path.with_suffix(profile.ext))
+                for profile, rendition in self._renditions(path)
+            ]
+            moves.append((path, new_path))
+            for src, dst in moves:
+                if changes:
+                    retag(src, tags)
+                if src.resolve() != dst.resolve():
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    try:
+                        src.rename(dst)
+                    except OSError as e:
+                        raise TrackUpdateError(str(e))
+            return new_path
+
+        dir_moves = self._plan_dir_moves(plan)
+        for src_dir, dest_dir in dir_moves.items():
+            self._move_dir(src_dir, dest_dir)
+        steps = [
+            (new_path if path.parent in dir_moves else path, tags, new_path)
+            for path, tags, new_path in plan
+        ]
+
+        workers = min(8, len(steps)) or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+            new_paths = list(ex.map(apply, steps))
+        # Tag edits leave the audio payload alone, so digests follow the files.
+        for path, _, new_path in plan:
+            self.hashes.rename(path, new_path)
+
+        self._relocate_covers(plan)
+        self._prune_empty_dirs(
+            [path.parent for path, _, new_path in plan if path.parent != new_path.parent],
+            staging_root,
+        )
+        if art is not None:
+            albums = {p.parent: p for p in new_paths}
+            for track in albums.values():
+                self.update_album_art(str(track), art, art_mime)
+        return new_paths
 
     def update_album_art(self, filepath: str, data: bytes, mime: str = "image/jpeg") -> None:
+        """Set the staged cover of the album containing ``filepath``.
+
+        The image is kept as a sidecar of the album directory and only
+        embedded into the audio files when the album is approved.
+        """
         path = Path(filepath)
         if not path.exists():
             raise TrackUpdateError(f"File not found: {filepath}")
-        try:
-            from mutagen.mp4 import MP4, MP4Cover
-        except Exception:
-            return
-
         tags_info = self.read_tags(filepath)
         key = (tags_info["artist"], tags_info["album"])
+        data, mime = self.cover_processor.process(data, mime)
+        try:
+            self.covers.set(path.parent, data, mime)
+        except OSError as e:
+            raise TrackUpdateError(str(e))
+        with self.album_lock:
+            self.album_art_cache[key] = data
 
-        def write_art(mp3: Path) -> None:
-            try:
-                tags = MP4(mp3)
-            except Exception:
-                tags = MP4()
-            if hasattr(tags, "delall"):
-                try:
-                    tags.delall("covr")  # type: ignore[attr-defined]
-                except Exception:
-                    pass
-            tags["covr"] = [
-                MP4Cover(
-                    data,
-                    imageformat=
-                    MP4Cover.FORMAT_PNG if mime == "image/png" else MP4Cover.FORMAT_JPEG,
-                )
-            ]
+    def _embed_cover(self, path: Path, data: bytes, mime: str) -> None:
+        """Replace the ``covr`` atom of ``path`` with ``data``."""
+        if path.suffix == ".opus":
             try:
-                tags.save(mp3)
+                write_vorbis_cover(path, data, mime)
             except Exception as e:
                 raise TrackUpdateError(str(e))
+            finally:
+                self.tag_cache.invalidate(path)
+            return
+        try:
+            from mutagen.mp4 import MP4, MP4Cover
+        except Exception:
+            return
+        try:
+            tags = MP4(path)
+        except Exception:
+            tags = MP4()
+        if hasattr(tags, "delall"):
+            try:
+                tags.delall("covr")  # type: ignore[attr-defined]
+            except Exception:
+                pass
+        tags["covr"] = [
+            MP4Cover(
+                data,
+                imageformat=
+                MP4Cover.FORMAT_PNG if mime == "image/png" else MP4Cover.FORMAT_JPEG,
+            )
+        ]
+        try:
+            tags.save(path)
+        except Exception as e:
+            raise TrackUpdateError(str(e))
+        finally:
+            self.tag_cache.invalidate(path)
 
-        for mp3 in path.parent.glob(f"*{self.AUDIO_EXT}"):
-            write_art(mp3)
+    def _embed_album_cover(self, album_dir: Path) -> Optional[tuple[bytes, str]]:
+        """Embed the staged cover of ``album_dir`` into its tracks and drop it."""
+        cover = self.covers.get(album_dir)
+        if cover is None:
+            return None
+        data = cover.read()
+        tracks = []
+        for track in album_dir.glob(f"*{self.AUDIO_EXT}"):
+            tracks += [track, *(r for _, r in self._renditions(track))]
+        if tracks:
+            workers = min(8, len(tracks))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+                list(ex.map(lambda t: self._embed_cover(t, data, cover.mime), tracks))
+        self.covers.discard(album_dir)
+        return data, cover.mime
 
-        with self.album_lock:
-            self.album_art_cache[key] = data
+    def _write_folder_art(self, dest_dir: Path, data: bytes, mime: str) -> None:
+        if not self.folder_art or not dest_dir.is_dir():
+            return
+        try:
+            (dest_dir / FOLDER_ART.get(mime, "folder.jpg")).write_bytes(data)
+        except OSError:
+            pass
+
+    def _relocate_covers(self, plan) -> None:
+        """Make staged covers follow tracks that moved to another album directory."""
+        moves: dict[Path, set[Path]] = {}
+        for path, _, new_path in plan:
+            if path.parent != new_path.parent:
+                moves.setdefault(path.parent, set()).add(new_path.parent)
+        for src_dir, dest_dirs in moves.items():
+            for dest_dir in dest_dirs:
+                self.covers.copy(src_dir, dest_dir)
+            if not src_dir.exists():
+                self.covers.forget(src_dir)
+            elif not any(src_dir.glob(f"*{self.AUDIO_EXT}")):
+                self.covers.discard(src_dir)
 
     def find_matching_tracks(self, filepath: str) -> list[Path]:
-        """Return existing library tracks similar to ``filepath``."""
+        """Return existing library tracks that duplicate ``filepath``."""
         tags = self.read_tags(filepath)
-        dest_dir = self.nas_path / tags["artist"] / tags["album"]
-        return self._find_matches(dest_dir, Path(filepath).stem)
+        dest_dir = self.library_root / tags["artist"] / tags["album"]
+        path = Path(filepath)
+        return self._exact_duplicates(path) or self._duplicates(path, dest_dir)
 
@@ -0,0 +1,236 @@
+# src/songripper/services/subscriptions.py
+"""Playlist subscriptions that periodically rip newly added entries."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Optional
+
+
+@dataclass
+class Subscription:
+    """A playlist that is re-enumerated every ``interval`` seconds."""
+
+    url: str
+    interval: float
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    seen_ids: list[str] = field(default_factory=list)
+    # Cheap change marker built from the playlist probe (see ``_probe_etag``).
+    etag: Optional[str] = None
+    last_checked: float = 0.0
+    last_new: int = 0
+    last_error: Optional[str] = None
+
+    def is_due(self, now: float) -> bool:
+        return now - self.last_checked >= self.interval
+
+
+def _entry_id(entry: object) -> str:
+    return str(entry.get("id")) if isinstance(entry, dict) else str(entry)
+
+
+def _failure(entry: object, item) -> str:
+    """One line describing why ``entry`` (tracked as job ``item``) was not ripped."""
+    lines = (item.error or "").strip().splitlines() if item is not None else []
+    return f"{_entry_id(entry)}: {lines[-1] if lines else 'not ripped'}"
+
+
+def _probe_etag(info: dict) -> Optional[str]:
+    """Return a change marker for a playlist probe, or ``None`` if unknown.
+
+    yt-dlp does not expose HTTP ETags, but playlist pages usually report an
+    entry count and a modification date.  Together with the first entry id
+    they change whenever items are added, so an unchanged marker lets us
+    skip the full enumeration.
+    """
+
+    count = info.get("playlist_count")
+    modified = info.get("modified_date")
+    if count is None and modified is None:
+        return None
+    entries = info.get("entries") or []
+    first = _entry_id(entries[0]) if entries else ""
+    return f"{count}:{modified}:{first}"
+
+
+class SubscriptionManager:
+    """Persist subscriptions and sync them through a ``RipperService``."""
+
+    FILENAME = "subscriptions.json"
+
+    def __init__(self, service) -> None:
+        self.service = service
+        self.lock = threading.Lock()
+        # One lock per subscription id, held for the whole of ``sync``.
+        self._syncing: dict[str, threading.Lock] = {}
+
+    @property
+    def path(self) -> Path:
+        return self.service.data_dir / self.FILENAME
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _load(self) -> list[Subscription]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        return [Subscription(**item) for item in raw]
+
+    def _save(self, subs: list[Subscription]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps([asdict(s) for s in subs], indent=2), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def _update(self, sub: Subscription) -> None:
+        with self.lock:
+            subs = self._load()
+            for i, existing in enumerate(subs):
+                if existing.id == sub.id:
+                    subs[i] = sub
+                    self._save(subs)
+                    return
+
+    # ------------------------------------------------------------------
+    # Public operations
+    # ------------------------------------------------------------------
+    def load_all(self) -> list[Subscription]:
+        with self.lock:
+            return self._load()
+
+    def get(self, sub_id: str) -> Optional[Subscription]:
+        return next((s for s in self.load_all() if s.id == sub_id), None)
+
+    def add(self, url: str, interval: float, *, rip_existing: bool = False) -> Subscription:
+        """Register ``url``; existing entries are only ripped if requested."""
+
+        sub = Subscription(url=url, interval=interval)
+        if not rip_existing:
+            info = self.service.enumerate_playlist(url)
+            sub.seen_ids = [_entry_id(e) for e in info.get("entries") or []]
+            sub.etag = _probe_etag(info)
+            sub.last_checked = time.time()
+        with self.lock:
+            subs = self._load()
+            subs.append(sub)
+            self._save(subs)
+        return sub
+
+    def remove(self, sub_id: str) -> bool:
+        with self.lock:
+            subs = self._load()
+            kept = [s for s in subs if s.id != sub_id]
+            if len(kept) == len(subs):
+                return False
+            self._save(kept)
+            self._syncing.pop(sub_id, None)
+            return True
+
+    def sync(self, sub: Subscription, *, rip_func: Optional[Callable] = None) -> int:
+        """Rip entries of ``sub`` not seen before and return how many succeeded.
+
+        Only entries whose job item finished are marked as seen; failed ones
+        are retried on the next sync and reported in ``last_error``.  Syncs
+        of the same subscription run one at a time, each starting from the
+        stored state, so an entry is never ripped twice.  ``sub`` is updated
+        in place.
+        """
+
+        with self.lock:
+            sync_lock = self._syncing.setdefault(sub.id, threading.Lock())
+        with sync_lock:
+            stored = self.get(sub.id)
+            if stored is None:
+                return 0  # removed meanwhile
+            # An earlier sync may have ripped entries since ``sub`` was read.
+            for f in fields(Subscription):
+                setattr(sub, f.name, getattr(stored, f.name))
+            return self._sync(sub, rip_func or self.service.rip_playlist)
+
+    def _sync(self, sub: Subscription, rip_func: Callable) -> int:
+        sub.last_checked = time.time()
+        try:
+            if sub.etag is not None:
+                probe = self.service.enumerate_playlist(sub.url, items="1")
+                if _probe_etag(probe) == sub.etag:
+                    sub.last_new = 0
+                    sub.last_error = None
+                    return 0
+            info = self.service.enumerate_playlist(sub.url)
+            seen = set(sub.seen_ids)
+            new = [e for e in info.get("entries") or [] if _entry_id(e) not in seen]
+            ripped, failed = new, []
+            if new:
+                job = self.service.jobs.create(sub.url)
+                rip_func(sub.url, entries=new, job=job)
+                items = {item.url: item for item in job.items}
+                ripped = []
+                for entry in new:
+                    item = items.get(self.service._entry_url(entry))
+                    if item is not None and item.status == "done":
+                        ripped.append(entry)
+                    else:
+                        failed.append(_failure(entry, item))
+                sub.seen_ids.extend(_entry_id(e) for e in ripped)
+            if not failed:
+                # With failures the old marker is kept, so the next probe does
+                # not skip the playlist before the unseen entries are retried.
+                sub.etag = _probe_etag(info)
+            sub.last_new = len(ripped)
+            sub.last_error = (
+                f"{len(failed)} of {len(new)} new item(s) failed: " + "; ".join(failed)
+                if failed
+                else None
+            )
+            return len(ripped)
+        except Exception as exc:
+            sub.last_error = str(exc)
+            raise
+        finally:
+            self._update(sub)
+
+    def sync_due(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        for sub in self.load_all():
+            if sub.is_due(now):
+                try:
+                    self.sync(sub)
+                except Exception:
+                    # The error is recorded on the subscription; keep going.
+                    pass
+
+
+class SubscriptionScheduler:
+    """Background thread calling ``SubscriptionManager.sync_due`` periodically."""
+
+    def __init__(self, manager: SubscriptionManager, tick: float = 60.0) -> None:
+        self.manager = manager
+        self.tick = tick
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="subscription-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick):
+            self.manager.sync_due()
@@ -0,0 +1,129 @@
+# src/songripper/services/tagcache.py
+"""Bounded LRU cache of parsed track tags.
+
+Entries are keyed by path and validated against ``st_mtime_ns`` and
+``st_size`` on every lookup, so a file changed behind our back is parsed
+again.  Writers in ``RipperService`` also invalidate entries explicitly,
+since a rewrite within the same timestamp tick can keep the size.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class TrackInfo:
+    artist: str
+    album: str
+    title: str
+    has_cover: bool = False
+    duration: Optional[float] = None
+    mtime_ns: int = 0
+
+    def tags(self) -> dict[str, str]:
+        return {"artist": self.artist, "album": self.album, "title": self.title}
+
+
+def _first(tags, key: str, default: str) -> str:
+    values = tags.get(key) if tags is not None else None
+    return str(values[0]) if values else default
+
+
+def parse_track(path: Path, mtime_ns: int = 0) -> TrackInfo:
+    """Read tags, cover presence and duration of ``path`` with one parse.
+
+    Falls back to the staging layout (``artist/album/NN title.m4a``) when
+    mutagen is missing or the file cannot be parsed.
+    """
+    name = path.stem
+    title = name[3:] if re.match(r"\d{2} ", name) else name
+    parents = path.parents
+    artist = parents[1].name if len(parents) > 1 else ""
+    album = path.parent.name
+    try:
+        if path.suffix == ".opus":
+            return _parse_vorbis(path, artist, album, title, mtime_ns)
+        from mutagen.mp4 import MP4
+
+        audio = MP4(path)
+        tags = audio.tags
+        return TrackInfo(
+            artist=_first(tags, "\xa9ART", artist),
+            album=_first(tags, "\xa9alb", album),
+            title=_first(tags, "\xa9nam", title),
+            has_cover=bool(tags.get("covr")) if tags is not None else False,
+            duration=getattr(getattr(audio, "info", None), "length", None),
+            mtime_ns=mtime_ns,
+        )
+    except Exception:
+        return TrackInfo(artist, album, title, mtime_ns=mtime_ns)
+
+
+def _parse_vorbis(path: Path, artist: str, album: str, title: str, mtime_ns: int) -> TrackInfo:
+    from mutagen.oggopus import OggOpus
+
+    audio = OggOpus(path)
+    tags = audio.tags
+    return TrackInfo(
+        artist=_first(tags, "artist", artist),
+        album=_first(tags, "album", album),
+        title=_first(tags, "title", title),
+        has_cover=bool(tags.get("metadata_block_picture")) if tags is not None else False,
+        duration=getattr(getattr(audio, "info", None), "length", None),
+        mtime_ns=mtime_ns,
+    )
+
+
+class TagCache:
+    """LRU of ``TrackInfo`` keyed by path and validated by ``stat``."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[tuple[int, int], TrackInfo]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path | str) -> TrackInfo:
+        path = Path(path)
+        key = os.fspath(path)
+        try:
+            st = path.stat()
+        except OSError:
+            self.invalidate(key)
+            return parse_track(path)
+        sig = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        info = parse_track(path, st.st_mtime_ns)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = (sig, info)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return info
+
+    def invalidate(self, *paths: Path | str) -> None:
+        with self._lock:
+            for path in paths:
+                self._entries.pop(os.fspath(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,170 @@
+# src/songripper/services/tracing.py
+"""Per-job trace timelines made of timed spans.
+
+A ``Trace`` is activated for the current thread or asyncio task with
+``trace_context``.  ``span`` and the ``traced`` decorator record into the
+active trace and return a shared no-op context manager when none is
+active, so disabled tracing costs one context variable lookup per call.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+_NULL = nullcontext()
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "trace", default=None
+)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float  # seconds since the trace started
+    end: float
+    thread_id: int
+    thread_name: str
+    args: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """Spans recorded for one job, in completion order."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, args: dict) -> None:
+        thread = threading.current_thread()
+        span = Span(
+            name,
+            start - self.origin,
+            end - self.origin,
+            threading.get_ident(),
+            thread.name,
+            args,
+        )
+        with self.lock:
+            self.spans.append(span)
+
+    def sorted_spans(self) -> list[Span]:
+        with self.lock:
+            return sorted(self.spans, key=lambda s: (s.start, -s.end))
+
+    def waterfall(self) -> list[dict]:
+        """Return spans with start offset and width as percentages of the trace."""
+        spans = self.sorted_spans()
+        total = max((s.end for s in spans), default=0.0) or 1.0
+        return [
+            {
+                "name": s.name,
+                "thread": s.thread_name,
+                "start_ms": s.start * 1000,
+                "duration_ms": s.duration * 1000,
+                "offset_pct": s.start / total * 100,
+                "width_pct": max(s.duration / total * 100, 0.1),
+                "args": s.args,
+            }
+            for s in spans
+        ]
+
+    def to_chrome(self) -> dict:
+        """Return the trace in Chrome trace-event format (``chrome://tracing``)."""
+        pid = os.getpid()
+        spans = self.sorted_spans()
+        events: list[dict] = []
+        for tid, name in {s.thread_id: s.thread_name for s in spans}.items():
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            )
+        for s in spans:
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "songripper",
+                    "ph": "X",
+                    "ts": round((self.wall_origin + s.start) * 1e6),
+                    "dur": round(s.duration * 1e6),
+                    "pid": pid,
+                    "tid": s.thread_id,
+                    "args": s.args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class _SpanContext:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace: Trace, name: str, args: dict) -> None:
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_SpanContext":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.add(self.name, self.start, time.perf_counter(), self.args)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def trace_context(trace: Optional[Trace]) -> Iterator[None]:
+    """Record spans of this thread or task into ``trace`` (``None`` disables tracing)."""
+    token = _current.set(trace)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def span(name: str, **args):
+    trace = _current.get()
+    if trace is None:
+        return _NULL
+    return _SpanContext(trace, name, args)
+
+
+def traced(name: str, arg: Optional[str] = None) -> Callable:
+    """Decorate a method so each call is recorded as a span called ``name``.
+
+    ``arg`` names a parameter (the first after ``self`` if passed
+    positionally) whose value is stored with the span.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            trace = _current.get()
+            if trace is None:
+                return func(*a, **kw)
+            args = {}
+            if arg is not None:
+                value = kw.get(arg, a[1] if len(a) > 1 else None)
+                args[arg] = str(value)
+            with _SpanContext(trace, name, args):
+                return func(*a, **kw)
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,70 @@
 # src/songripper/settings.py
+import hashlib
 import os
 from pathlib import Path
-from . import PACKAGE_TIME
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "/data"))
 NAS_PATH  = Path(os.getenv("NAS_PATH",  "/music"))
-# Query string added to static assets for cache busting
-CACHE_BUSTER = os.getenv("CACHE_BUSTER", PACKAGE_TIME.replace(":", "").replace("-", "").replace("+", ""))
+
+
+def _static_digest() -> str:
+    digest = hashlib.sha256()
+    for path in sorted((Path(__file__).parent / "static").glob("*")):
+        if path.is_file() and path.suffix not in (".gz", ".br"):
+            digest.update(path.name.encode() + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+# Query string added to static assets for cache busting.  Versioned assets
+# are cached as immutable, so by default it changes with their content.
+CACHE_BUSTER = os.getenv("CACHE_BUSTER") or _static_digest()
+# Seconds between checks for due playlist subscriptions
+SUBSCRIPTION_TICK = float(os.getenv("SUBSCRIPTION_TICK", "60"))
+# Attempts per playlist item and backoff bounds (seconds) for transient errors
+RIP_RETRY_ATTEMPTS = int(os.getenv("RIP_RETRY_ATTEMPTS", "4"))
+RIP_RETRY_BASE_DELAY = float(os.getenv("RIP_RETRY_BASE_DELAY", "2"))
+RIP_RETRY_MAX_DELAY = float(os.getenv("RIP_RETRY_MAX_DELAY", "60"))
+# Bounds of the adaptive limit on parallel yt-dlp downloads
+RIP_CONCURRENCY_MIN = int(os.getenv("RIP_CONCURRENCY_MIN", "1"))
+RIP_CONCURRENCY_INITIAL = int(os.getenv("RIP_CONCURRENCY_INITIAL", "4"))
+RIP_CONCURRENCY_MAX = int(os.getenv("RIP_CONCURRENCY_MAX", "16"))
+# iTunes search endpoint used for album art lookups
+ITUNES_SEARCH_URL = os.getenv("ITUNES_SEARCH_URL", "https://itunes.apple.com/search")
+# Record a span timeline for every rip job ("0" disables tracing)
+TRACE_JOBS = os.getenv("TRACE_JOBS", "1") not in ("0", "false", "no")
+# Also write folder.jpg into each NAS album directory on approval
+COVER_FOLDER_ART = os.getenv("COVER_FOLDER_ART", "0") in ("1", "true", "yes")
+# Longest side in pixels and JPEG quality for normalised cover art (0 keeps originals)
+COVER_MAX_SIZE = int(os.getenv("COVER_MAX_SIZE", "600"))
+COVER_QUALITY = int(os.getenv("COVER_QUALITY", "90"))
+# Parsed tags kept in memory, validated by file mtime and size
+TAG_CACHE_SIZE = int(os.getenv("TAG_CACHE_SIZE", "4096"))
+# Threads reading tags when listing staging (sized for network storage latency)
+STAGING_SCAN_WORKERS = int(os.getenv("STAGING_SCAN_WORKERS", "16"))
+# Tracks in progress at once per job in the asyncio pipeline, and threads it
+# reserves for tagging and file moves
+RIP_ASYNC_MAX_TRACKS = int(os.getenv("RIP_ASYNC_MAX_TRACKS", "64"))
+RIPPER_IO_THREADS = int(os.getenv("RIPPER_IO_THREADS", "4"))
+# Smallest dynamic response in bytes that is gzip-compressed on the fly
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+# Size in bytes at which the JSON-lines error log rotates, and rotated files kept
+ERROR_LOG_MAX_BYTES = int(os.getenv("ERROR_LOG_MAX_BYTES", str(10 * 2**20)))
+ERROR_LOG_BACKUPS = int(os.getenv("ERROR_LOG_BACKUPS", "5"))
+# Split videos with chapters into one track per chapter, and parallel ffmpeg cuts
+RIP_SPLIT_CHAPTERS = os.getenv("RIP_SPLIT_CHAPTERS", "0") in ("1", "true", "yes")
+RIP_SPLIT_WORKERS = int(os.getenv("RIP_SPLIT_WORKERS", "4"))
+# Encodings produced by each rip as name[@bitrate][:library root], comma
+# separated (aac, alac, opus, m4a); the first is the one edited in staging
+OUTPUT_PROFILES = os.getenv("OUTPUT_PROFILES", "m4a")
+# Fraction of time-aligned landmarks two acoustic fingerprints must share to
+# count as the same recording, and seconds between library rescans
+FINGERPRINT_THRESHOLD = float(os.getenv("FINGERPRINT_THRESHOLD", "0.2"))
+FINGERPRINT_RESCAN = float(os.getenv("FINGERPRINT_RESCAN", "300"))
+# Background audio hashing for exact duplicates: read cap in MiB/s (0 for
+# no cap) and seconds between scans of staging and the library
+HASH_RATE_MB = float(os.getenv("HASH_RATE_MB", "8"))
+HASH_INTERVAL = float(os.getenv("HASH_INTERVAL", "600"))
+# Seconds between refreshes of the library browse/search index (approvals
+# refresh it straight away), and the page size of library listings
+LIBRARY_INDEX_INTERVAL = float(os.getenv("LIBRARY_INDEX_INTERVAL", "3600"))
+LIBRARY_PAGE_SIZE = int(os.getenv("LIBRARY_PAGE_SIZE", "50"))
@@ -38,6 +38,95 @@ document.addEventListener('htmx:afterSwap', function (evt) {
   }
 });
 
+// Rip progress: create the job first, follow /jobs/events, then let htmx post /rip.
+document.addEventListener('htmx:confirm', function (evt) {
+  const form = evt.target;
+  if (form.id !== 'rip-form' || !window.EventSource) return;
+  evt.preventDefault();
+  fetch('/jobs', {method: 'POST', body: new FormData(form)})
+    .then(res => res.json())
+    .then(job => {
+      form.querySelector('input[name=job_id]').value = job.id;
+      watchJob(job.id);
+    })
+    .catch(() => {})
+    .finally(() => evt.detail.issueRequest(true));
+});
+
+function ripFinished(form) {
+  const jobInput = form.querySelector('input[name=job_id]');
+  if (jobInput && jobInput.value) {
+    // Rows were added as tracks landed; only the job list needs updating.
+    jobInput.value = '';
+    document.body.dispatchEvent(new Event('refreshJobs'));
+  } else {
+    document.body.dispatchEvent(new Event('refreshStaging'));
+  }
+}
+
+function watchJob(jobId) {
+  const list = document.getElementById('rip-progress');
+  if (list) list.innerHTML = '';
+  const source = new EventSource(`/jobs/events?job_id=${jobId}`);
+  source.addEventListener('item', e => updateProgressItem(JSON.parse(e.data)));
+  source.addEventListener('stage', e => updateProgressItem(JSON.parse(e.data)));
+  source.addEventListener('progress', e => updateProgressItem(JSON.parse(e.data)));
+  source.addEventListener('track', e => addStagedRow(JSON.parse(e.data)));
+  source.addEventListener('job', () => source.close());
+}
+
+function progressItem(index) {
+  const list = document.getElementById('rip-progress');
+  if (!list) return null;
+  let li = list.querySelector(`li[data-item="${index}"]`);
+  if (!li) {
+    li = document.createElement('li');
+    li.dataset.item = index;
+    li.innerHTML = '<span class="url"></span><progress max="100" value="0"></progress>' +
+      '<span class="state"></span>';
+    list.appendChild(li);
+  }
+  return li;
+}
+
+function updateProgressItem(data) {
+  const li = progressItem(data.item);
+  if (!li) return;
+  const bar = li.querySelector('progress');
+  if (data.url) li.querySelector('.url').textContent = data.url;
+  if (data.status) {
+    li.dataset.status = data.status;
+    li.className = data.status;
+  }
+  if (data.stage) li.dataset.stage = data.stage;
+  let state = li.dataset.status === 'running' ? li.dataset.stage || 'running' : li.dataset.status;
+  if (data.percent !== undefined) {
+    bar.value = data.percent;
+    state = `${data.percent.toFixed(1)}%` +
+      (data.speed ? ` at ${data.speed}` : '') + (data.eta ? ` ETA ${data.eta}` : '');
+  }
+  if (data.status === 'done') bar.value = 100;
+  if (data.status === 'failed' && data.error) li.title = data.error;
+  li.querySelector('.state').textContent = state;
+}
+
+function addStagedRow(data) {
+  const body = document.querySelector('#staging-list .track-table tbody');
+  if (!body || !data.html) {
+    // Nothing listed yet, so there is no table to append to.
+    document.body.dispatchEvent(new Event('refreshStaging'));
+    return;
+  }
+  const rows = document.createElement('tbody');
+  rows.innerHTML = data.html;
+  Array.from(rows.children).forEach(row => {
+    body.appendChild(row);
+    htmx.process(row);
+  });
+  syncSelectAll();
+  updateApprovalButton();
+}
+
 
 function updateApprovalButton() {
   const btnAll = document.getElementById('approve-btn');
@@ -3,17 +3,30 @@
 
 from __future__ import annotations
 
-import subprocess
 import shutil
 import threading
 from pathlib import Path
-from typing import Optional
-
-from .services.ripper_service import RipperService, TrackUpdateError
+from typing import AsyncIterator, Iterator, Optional
+
+from .services.async_ripper import AsyncRipperService
+from .services.ripper_service import RipperError, RipperService, TrackUpdateError
+from .services.accounting import summarize as summarize_usage
+from .services.events import Event
+from .services.jobs import RipJob
+from .services.library import Page
+from .services.subscriptions import (
+    Subscription,
+    SubscriptionManager,
+    SubscriptionScheduler,
+)
 from .models import Track
+from .settings import SUBSCRIPTION_TICK
 
 # Default service used by module-level wrappers
 _service = RipperService()
+_async_service = AsyncRipperService(_service)
+_subscriptions = SubscriptionManager(_service)
+_scheduler = SubscriptionScheduler(_subscriptions, tick=SUBSCRIPTION_TICK)
 
 # Re-export constants for backward compatibility
 YT_BASE = RipperService.YT_BASE
@@ -22,8 +35,8 @@ ALBUM_ART_CACHE = _service.album_art_cache
 ALBUM_LOCK = _service.album_lock
 DATA_DIR = _service.data_dir
 NAS_PATH = _service.nas_path
-AUDIO_FORMAT = RipperService.AUDIO_FORMAT
-AUDIO_EXT = RipperService.AUDIO_EXT
+AUDIO_FORMAT = _service.AUDIO_FORMAT
+AUDIO_EXT = _service.AUDIO_EXT
 
 
 def _sync_service() -> None:
@@ -59,24 +72,61 @@ def mp3_from_url(
         url,
         staging_dir,
         lock,
-        subprocess_mod=subprocess,
         fetch_cover=fetch_cover,
         fetch_thumbnail=fetch_thumbnail,
     )
 
 
-def rip_playlist(pl_url: str) -> str:
+def rip_playlist(
+    pl_url: str, entries: Optional[list] = None, job: Optional[RipJob] = None
+) -> str:
     _sync_service()
     return _service.rip_playlist(
         pl_url,
-        subprocess_mod=subprocess,
         shutil_mod=shutil,
         fetch_cover=fetch_cover,
         fetch_thumbnail=fetch_thumbnail,
         mp3_func=mp3_from_url,
+        entries=entries,
+        job=job,
     )
 
 
+async def rip_playlist_async(
+    pl_url: str, entries: Optional[list] = None, job: Optional[RipJob] = None
+) -> str:
+    """Rip ``pl_url`` on the event loop with the asyncio pipeline."""
+    _sync_service()
+    return await _async_service.rip_playlist(pl_url, entries=entries, job=job)
+
+
+def create_job(pl_url: str) -> RipJob:
+    return _service.jobs.create(pl_url)
+
+
+def job_events(job_id: int, keepalive: float = 15.0) -> AsyncIterator[Optional[Event]]:
+    """Yield the progress events of a job until it finishes (``None`` is a keepalive)."""
+    return _service.events.subscribe(job_id, keepalive)
+
+
+def get_job(job_id: int) -> Optional[RipJob]:
+    return _service.jobs.get(job_id)
+
+
+def list_jobs() -> list[RipJob]:
+    return _service.jobs.list()
+
+
+def job_resources(job_id: int) -> Optional[dict]:
+    """Return CPU, wall time and memory used by the commands of a job."""
+    job = _service.jobs.get(job_id)
+    if job is None:
+        return None
+    with job.lock:
+        usage = list(job.usage)
+    return {"job_id": job.id, "playlist": job.playlist, **summarize_usage(usage)}
+
+
 def staging_has_files() -> bool:
     _sync_service()
     return _service.staging_has_files()
@@ -108,6 +158,17 @@ def list_staged_tracks() -> list[Track]:
     return _service.list_staged_tracks()
 
 
+def iter_staged_tracks() -> Iterator[Track]:
+    """Yield staged tracks as they are scanned (ordered by artist and album)."""
+    _sync_service()
+    return _service.iter_staged_tracks()
+
+
+def staged_track(filepath: str) -> Track:
+    _sync_service()
+    return _service.staged_track(filepath)
+
+
 def read_tags(filepath: str) -> dict[str, str]:
     _sync_service()
     return _service.read_tags(filepath)
@@ -118,6 +179,22 @@ def update_track(filepath: str, field: str, value: str) -> Path:
     return _service.update_track(filepath, field, value)
 
 
+def update_tracks(
+    filepaths: list[str],
+    changes: dict[str, str],
+    art: Optional[bytes] = None,
+    art_mime: str = "image/jpeg",
+) -> list[Path]:
+    """Apply tag ``changes`` (and optional album art) to several tracks at once."""
+    _sync_service()
+    return _service.update_tracks(filepaths, changes, art, art_mime)
+
+
+def track_cover(filepath: str) -> Optional[tuple[bytes, str]]:
+    _sync_service()
+    return _service.track_cover(filepath)
+
+
 def update_album_art(filepath: str, data: bytes, mime: str = "image/jpeg") -> None:
     _sync_service()
     _service.update_album_art(filepath, data, mime)
@@ -129,6 +206,106 @@ def update_ytdlp() -> str:
 
 
 def find_matching_tracks(filepath: str) -> list[str]:
-    """Return library tracks with names similar to ``filepath``."""
+    """Return library tracks that duplicate ``filepath``."""
     _sync_service()
     return [str(p) for p in _service.find_matching_tracks(filepath)]
+
+
+def list_subscriptions() -> list[Subscription]:
+    _sync_service()
+    return _subscriptions.load_all()
+
+
+def add_subscription(
+    url: str, interval: float, rip_existing: bool = False
+) -> Subscription:
+    """Subscribe to ``url`` and check it every ``interval`` seconds."""
+    _sync_service()
+    return _subscriptions.add(url, interval, rip_existing=rip_existing)
+
+
+def remove_subscription(sub_id: str) -> bool:
+    _sync_service()
+    return _subscriptions.remove(sub_id)
+
+
+def sync_subscription(sub_id: str) -> int:
+    """Rip new entries of a subscription now and return how many were found."""
+    _sync_service()
+    sub = _subscriptions.get(sub_id)
+    if sub is None:
+        raise KeyError(sub_id)
+    return _subscriptions.sync(sub, rip_func=rip_playlist)
+
+
+def start_scheduler() -> None:
+    _scheduler.start()
+
+
+def stop_scheduler() -> None:
+    _scheduler.stop()
+
+
+def start_hasher() -> None:
+    """Start hashing staged and library audio in the background."""
+    _sync_service()
+    _service.hasher.start()
+
+
+def stop_hasher() -> None:
+    _service.hasher.stop()
+
+
+def start_library_indexer() -> None:
+    """Start keeping the library browse/search index up to date."""
+    _sync_service()
+    _service.library_indexer.start()
+
+
+def stop_library_indexer() -> None:
+    _service.library_indexer.stop()
+
+
+def start_fingerprint_indexer() -> None:
+    """Start fingerprinting library audio in the background."""
+    _sync_service()
+    _service.fingerprint_indexer.start()
+
+
+def stop_fingerprint_indexer() -> None:
+    _service.fingerprint_indexer.stop()
+
+
+def library_artists(page: int = 1, per_page: int = 50) -> Page:
+    _sync_service()
+    return _service.library.artists(page, per_page)
+
+
+def library_albums(artist: str, page: int = 1, per_page: int = 50) -> Page:
+    _sync_service()
+    return _service.library.albums(artist, page, per_page)
+
+
+def library_tracks(artist: str, album: str, page: int = 1, per_page: int = 50) -> Page:
+    _sync_service()
+    return _service.library.tracks(artist, album, page, per_page)
+
+
+def search_library(query: str, field: str = "any", page: int = 1, per_page: int = 50) -> Page:
+    """Search the library index; ``field`` is artist, album, title (prefix) or any (words).
+
+    ``any`` searches tolerate typos: when nothing matches, misspelt words
+    are replaced by the closest library words.
+    """
+    _sync_service()
+    return _service.library.search(query, field, page, per_page)
+
+
+def refresh_library(full: bool = False) -> int:
+    _sync_service()
+    return _service.library.refresh(full=full)
+
+
+def download_concurrency() -> dict:
+    """Return the current download limit and its recent history."""
+    return _service.download_limiter.snapshot()
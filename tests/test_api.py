@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 import types
@@ -60,6 +61,7 @@ def test_approve_hx_error_returns_message(monkeypatch, tmp_path):
     resp = client.post("/approve", headers={"Hx-Request": "1"})
     assert resp.status_code == 500
     assert "oops" in resp.text
+    api.ERROR_LOG.flush()
     assert "oops" in log_path.read_text()
 
 
@@ -98,6 +100,7 @@ def test_approve_selected_hx_error_returns_message(monkeypatch, tmp_path):
     )
     assert resp.status_code == 500
     assert "oops" in resp.text
+    api.ERROR_LOG.flush()
     assert "Tracks: ['a" in log_path.read_text()
 
 
@@ -115,14 +118,15 @@ def test_rip_non_hx_error_returns_stack(monkeypatch, tmp_path):
     log_path = tmp_path / "errors.log"
     monkeypatch.setattr(api, "ERROR_LOG_PATH", log_path, raising=False)
 
-    def boom(url):
+    async def boom(url, job=None):
         raise RuntimeError("boom")
 
-    monkeypatch.setattr(worker, "rip_playlist", boom)
-    monkeypatch.setattr(api, "rip_playlist", boom)
+    monkeypatch.setattr(worker, "rip_playlist_async", boom)
+    monkeypatch.setattr(api, "rip_playlist_async", boom)
     with pytest.raises(api.HTTPException) as excinfo:
         client.post("/rip", data={"youtube_url": "http://x"})
     assert "RuntimeError: boom" in excinfo.value.detail
+    api.ERROR_LOG.flush()
     assert "RuntimeError: boom" in log_path.read_text()
 
 
@@ -130,11 +134,11 @@ def test_rip_hx_error_returns_stack(monkeypatch, tmp_path):
     log_path = tmp_path / "errors.log"
     monkeypatch.setattr(api, "ERROR_LOG_PATH", log_path, raising=False)
 
-    def boom(url):
+    async def boom(url, job=None):
         raise RuntimeError("boom")
 
-    monkeypatch.setattr(worker, "rip_playlist", boom)
-    monkeypatch.setattr(api, "rip_playlist", boom)
+    monkeypatch.setattr(worker, "rip_playlist_async", boom)
+    monkeypatch.setattr(api, "rip_playlist_async", boom)
     resp = client.post(
         "/rip",
         data={"youtube_url": "http://x"},
@@ -142,6 +146,7 @@ def test_rip_hx_error_returns_stack(monkeypatch, tmp_path):
     )
     assert resp.status_code == 500
     assert "RuntimeError: boom" in resp.text
+    api.ERROR_LOG.flush()
     assert "RuntimeError: boom" in log_path.read_text()
 
 
@@ -183,18 +188,10 @@ def test_rip_form_has_afterrequest_handler():
 def test_edit_multiple_updates_fields(monkeypatch):
     calls = []
 
-    def fake_update(fp, field, val):
-        calls.append((fp, field, val))
-        return f"{fp}:{field}"
-
-    monkeypatch.setattr(api.worker, "update_track", fake_update)
-
-    art_calls = []
+    def fake_update(fps, changes, art, mime):
+        calls.append((fps, changes, art, mime))
 
-    def fake_update_art(fp, data, mime):
-        art_calls.append((fp, data, mime))
-
-    monkeypatch.setattr(api.worker, "update_album_art", fake_update_art)
+    monkeypatch.setattr(api.worker, "update_tracks", fake_update)
 
     class DummyUpload:
         def __init__(self, data=b"img"):
@@ -222,10 +219,8 @@ def test_edit_multiple_updates_fields(monkeypatch):
     assert resp.status_code == 204
     assert resp.headers["HX-Trigger"] == "refreshStaging"
     assert calls == [
-        (f"file{worker.AUDIO_EXT}", "artist", "A"),
-        (f"file{worker.AUDIO_EXT}:artist", "album", "B"),
+        ([f"file{worker.AUDIO_EXT}"], {"artist": "A", "album": "B"}, b"img", "image/png")
     ]
-    assert art_calls == [(f"file{worker.AUDIO_EXT}:artist:album", b"img", "image/png")]
 
 
 def test_edit_handles_missing_file(monkeypatch):
@@ -255,10 +250,10 @@ def test_edit_returns_new_path_and_trigger(monkeypatch):
 
 
 def test_edit_multiple_handles_missing_file(monkeypatch):
-    def fake_update(fp, field, val):
+    def fake_update(fps, changes, art, mime):
         raise worker.TrackUpdateError("bad")
 
-    monkeypatch.setattr(api.worker, "update_track", fake_update)
+    monkeypatch.setattr(api.worker, "update_tracks", fake_update)
     data = [
         ("track", f"song{worker.AUDIO_EXT}"),
         ("artist_value", "A"),
@@ -360,3 +355,172 @@ def test_staging_template_has_check_button():
         html = fh.read()
     assert "hx-get=\"/check" in html
     assert "hx-target=\"#alerts\"" in html
+
+
+def test_rip_partial_failure_reports_items(monkeypatch, tmp_path):
+    log_path = tmp_path / "errors.log"
+    monkeypatch.setattr(api, "ERROR_LOG_PATH", log_path, raising=False)
+
+    async def partial(url, job=None):
+        ok = job.add_item("https://youtu.be/1")
+        ok.status, ok.path = "done", "/staging/a/b/1.m4a"
+        bad = job.add_item("https://youtu.be/2")
+        bad.status, bad.attempts, bad.error = "failed", 4, "HTTP Error 429"
+        return job.finish()
+
+    monkeypatch.setattr(api, "rip_playlist_async", partial)
+    resp = client.post("/rip", data={"youtube_url": "http://pl"}, headers={"Hx-Request": "1"})
+    assert resp.status_code == 200
+    assert resp.headers["HX-Retarget"] == "#alerts"
+    assert "1 of 2 track(s) ripped" in resp.text
+    api.ERROR_LOG.flush()
+    assert "FAILED https://youtu.be/2 after 4 attempt(s)" in log_path.read_text()
+
+
+def test_metrics_endpoint_exports_text_format():
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE songripper_stage_seconds histogram" in resp.text
+    assert "songripper_cover_cache_hit_ratio" in resp.text
+
+
+def test_cover_serves_staged_album_art(monkeypatch):
+    monkeypatch.setattr(api.worker, "track_cover", lambda fp: (b"art", "image/png"))
+    resp = client.get("/cover", params={"filepath": f"x{worker.AUDIO_EXT}"})
+    assert resp.body == b"art"
+    assert resp.media_type == "image/png"
+
+    monkeypatch.setattr(api.worker, "track_cover", lambda fp: None)
+    with pytest.raises(api.HTTPException):
+        client.get("/cover", params={"filepath": f"x{worker.AUDIO_EXT}"})
+
+
+def test_staging_streams_rendered_tracks(monkeypatch):
+    pytest.importorskip("jinja2")
+    from songripper.models import Track
+
+    consumed = []
+
+    def tracks():
+        for n in range(3):
+            consumed.append(n)
+            yield Track(
+                job_id=0, artist="A", album="B", title=f"T{n}",
+                filepath=f"/s/A/B/T{n}{worker.AUDIO_EXT}", duration=61.0,
+            )
+
+    monkeypatch.setattr(api.worker, "iter_staged_tracks", tracks)
+    resp = client.get("/staging")
+    assert consumed == []
+    html = resp.text
+    assert consumed == [0, 1, 2]
+    assert html.count("<tr>") == 4
+    assert "1:01" in html
+    assert 'id="edit-btn"' in html
+    assert "approve-btn\" type=\"submit\">" in html
+
+    monkeypatch.setattr(api.worker, "iter_staged_tracks", lambda: iter(()))
+    html = client.get("/staging").text
+    assert 'id="no-tracks"' in html
+    assert "approve-btn\" type=\"submit\" disabled>" in html
+
+
+def test_job_events_stream_progress_and_rendered_rows(monkeypatch, tmp_path):
+    pytest.importorskip("jinja2")
+    track = tmp_path / "staging" / "A" / "B" / f"01 Song{worker.AUDIO_EXT}"
+    track.parent.mkdir(parents=True)
+    track.write_bytes(b"")
+    monkeypatch.setattr(worker, "DATA_DIR", tmp_path)
+
+    job_id = client.post("/jobs", data={"youtube_url": "http://pl"})["id"]
+    events = worker._service.events
+    events.publish(job_id, "stage", {"item": 0, "stage": "download"})
+    events.publish(job_id, "progress", {"item": 0, "percent": 50.0, "eta": "00:01"})
+    events.publish(job_id, "track", {"item": 0, "path": str(track)})
+    events.publish(job_id, "job", {"status": "done"})
+
+    resp = client.get("/jobs/events", params={"job_id": job_id})
+    assert resp.media_type == "text/event-stream"
+    assert resp.headers["X-Accel-Buffering"] == "no"
+    body = resp.text
+    assert "event: stage\n" in body
+    assert '"percent": 50.0' in body
+    assert "event: track\n" in body and "Song</td>" in body
+    assert body.rstrip().endswith('data: {"status": "done"}')
+
+
+def test_rip_with_watched_job_skips_staging_refresh(monkeypatch):
+    used = []
+
+    async def fake_rip(url, job=None):
+        used.append(job.id)
+        return job.finish()
+
+    monkeypatch.setattr(api, "rip_playlist_async", fake_rip)
+    job_id = client.post("/jobs", data={"youtube_url": "http://x"})["id"]
+    resp = client.post(
+        "/rip", data={"youtube_url": "http://x", "job_id": str(job_id)}, headers={"Hx-Request": "1"}
+    )
+    assert resp.status_code == 204
+    assert used == [job_id]
+    assert "HX-Trigger" not in resp.headers
+
+    resp = client.post("/rip", data={"youtube_url": "http://x"}, headers={"Hx-Request": "1"})
+    assert resp.headers["HX-Trigger"] == "refreshStaging"
+
+
+def test_error_log_supports_tail_filters_and_ranges(monkeypatch, tmp_path):
+    log_path = tmp_path / "errors.log"
+    monkeypatch.setattr(api, "ERROR_LOG_PATH", log_path, raising=False)
+    for n in range(5):
+        api.log_error(f"failure {n}", route="/rip", job_id=n)
+    api.log_error("approve failed", route="/approve")
+    api.ERROR_LOG.flush()
+
+    tail = client.get("/logs/error", params={"tail": 2}).text.splitlines()
+    assert [json.loads(line)["message"] for line in tail] == ["failure 4", "approve failed"]
+    assert client.get("/logs/error", params={"tail": 0, "route": "/rip"}).text == ""
+    with pytest.raises(api.HTTPException) as excinfo:
+        client.get("/logs/error", params={"tail": -1, "route": "/rip"})
+    assert excinfo.value.status_code == 400
+    only = client.get("/logs/error", params={"route": "/rip", "job_id": 3}).text
+    assert json.loads(only)["message"] == "failure 3"
+
+    resp = client.get("/logs/error", headers={"Range": "bytes=0-9"})
+    assert resp.status_code == 206
+    assert resp.text == log_path.read_text()[:10]
+    assert resp.headers["Content-Range"].startswith("bytes 0-9/")
+    assert client.get("/logs/error", headers={"Range": "bytes=999999-"}).status_code == 416
+
+
+def test_library_endpoints_page_json_and_render_htmx(monkeypatch, tmp_path):
+    monkeypatch.setattr(worker, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(worker, "NAS_PATH", tmp_path / "nas")
+    for artist in ("Alpha", "Beta", "Gamma"):
+        album = tmp_path / "nas" / artist / "Album"
+        album.mkdir(parents=True)
+        (album / f"01 {artist} Song.m4a").write_bytes(b"audio")
+    worker.refresh_library()
+
+    resp = client.get("/library/artists", params={"per_page": 2})
+    assert (resp["total"], resp["pages"]) == (3, 2)
+    assert [a["artist"] for a in resp["items"]] == ["Alpha", "Beta"]
+    resp = client.get("/library/search", params={"q": "gam", "field": "artist"})
+    assert [t["title"] for t in resp["items"]] == ["Gamma Song"]
+    with pytest.raises(api.HTTPException):
+        client.get("/library/search", params={"q": "x", "field": "genre"})
+
+    captured = {}
+
+    def render(name, context, status_code=200):
+        captured["html"] = api.templates.env.get_template(name).render(context)
+        return api.HTMLResponse(captured["html"], status_code=status_code)
+
+    monkeypatch.setattr(api.templates, "TemplateResponse", render)
+    client.get("/library/artists", params={"per_page": 2}, headers={"Hx-Request": "1"})
+    assert "/library/albums?artist=Alpha" in captured["html"]
+    assert "/library/artists?per_page=2&amp;page=2" in captured["html"]
+    client.get("/library/tracks", params={"artist": "beta", "album": "album"},
+               headers={"Hx-Request": "1"})
+    assert "Beta Song" in captured["html"]
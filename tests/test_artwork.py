@@ -0,0 +1,31 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from songripper.services.artwork import CoverProcessor
+
+
+def test_cover_processor_crops_resizes_and_caches():
+    Image = pytest.importorskip("PIL.Image")
+    src = io.BytesIO()
+    Image.new("RGBA", (1280, 720), (200, 10, 10, 128)).save(src, "PNG")
+    processor = CoverProcessor(max_size=300, quality=80)
+
+    data, mime = processor.process(src.getvalue(), "image/png")
+    assert mime == "image/jpeg"
+    assert data.startswith(b"\xff\xd8")
+    assert Image.open(io.BytesIO(data)).size == (300, 300)
+    assert processor.process(src.getvalue(), "image/png")[0] is data
+
+    small = io.BytesIO()
+    Image.effect_noise((100, 100), 64).convert("RGB").save(small, "JPEG", quality=50)
+    assert processor.process(small.getvalue())[0] == small.getvalue()
+
+
+def test_cover_processor_passes_through_undecodable_data():
+    processor = CoverProcessor(max_size=300)
+    assert processor.process(b"\x89PNG not really") == (b"\x89PNG not really", "image/png")
+    assert CoverProcessor(max_size=0).process(b"img") == (b"img", "image/jpeg")
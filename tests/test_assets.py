@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import songripper.api as api
+from songripper.assets import DynamicGZipMiddleware, accepted_encodings, precompress
+
+
+def test_precompress_writes_smaller_variants_once(tmp_path):
+    (tmp_path / "main.js").write_text("console.log('x');\n" * 200)
+    (tmp_path / "tiny.css").write_text("a{}")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\0" * 400)
+
+    written = {p.name for p in precompress(tmp_path)}
+    assert "main.js.gz" in written
+    assert "tiny.css.gz" not in written  # would not be smaller
+    assert not (tmp_path / "logo.png.gz").exists()
+    assert gzip.decompress((tmp_path / "main.js.gz").read_bytes()) == (
+        tmp_path / "main.js"
+    ).read_bytes()
+    assert precompress(tmp_path) == []
+
+
+def test_accepted_encodings_honours_q_values():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+def test_cache_headers_for_versioned_assets():
+    assert api.cache_headers("/static/main.js", True) == {"Cache-Control": api.IMMUTABLE}
+    assert api.cache_headers("/cover", True) == {"Cache-Control": api.IMMUTABLE}
+    assert api.cache_headers("/static/main.js", False) == {"Cache-Control": "no-cache"}
+    assert api.cache_headers("/staging", True)["Cache-Control"].startswith("no-store")
+
+
+def _serve(app, path, headers=()):
+    """Run one GET through the ASGI ``app`` and return (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip"), *headers],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+def _route(status, body, headers=()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def _compressing_gzip(self, scope, receive, send):
+    """Stand-in for ``GZipMiddleware.__call__``: gzip bodies of ``minimum_size`` bytes or more."""
+    sent = []
+
+    async def capture(message):
+        sent.append(message)
+
+    await self.app(scope, receive, capture)
+    start, body = sent[0], b"".join(m.get("body", b"") for m in sent[1:])
+    if len(body) >= self.minimum_size:
+        body = gzip.compress(body)
+        start = {**start, "headers": [*start["headers"], (b"content-encoding", b"gzip")]}
+    await send(start)
+    await send({"type": "http.response.body", "body": body})
+
+
+def _gzip_app(monkeypatch, route, minimum_size):
+    # The base class really compresses, so a response that reaches it shows.
+    monkeypatch.setattr(DynamicGZipMiddleware.__mro__[1], "__call__", _compressing_gzip)
+    return DynamicGZipMiddleware(route, minimum_size=minimum_size)
+
+
+def test_large_responses_are_gzipped(monkeypatch):
+    app = _gzip_app(monkeypatch, _route(200, b"x" * 4096), minimum_size=api.GZIP_MIN_SIZE)
+    status, headers, body = _serve(app, "/jobs")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == b"x" * 4096
+
+
+def test_small_responses_are_not_gzipped(monkeypatch):
+    # The same order as api.py: cache headers outermost, gzip next to the route.
+    app = api.CacheHeadersMiddleware(
+        _gzip_app(monkeypatch, _route(200, b"[]"), minimum_size=api.GZIP_MIN_SIZE)
+    )
+    status, headers, body = _serve(app, "/jobs")
+    assert (status, body) == (200, b"[]")
+    assert b"content-encoding" not in headers
+    assert headers[b"cache-control"].startswith(b"no-store")
+
+
+def test_range_responses_are_not_gzipped(monkeypatch):
+    content_range = (b"content-range", b"bytes 0-4095/8192")
+    app = _gzip_app(monkeypatch, _route(206, b"x" * 4096, [content_range]), minimum_size=10)
+    status, headers, body = _serve(app, "/logs/error", [(b"range", b"bytes=0-4095")])
+    assert (status, body) == (206, b"x" * 4096)
+    assert b"content-encoding" not in headers
+
+
+def test_streams_and_static_files_are_not_gzipped(monkeypatch):
+    app = _gzip_app(monkeypatch, _route(200, b"x" * 4096), minimum_size=10)
+    for path in ("/jobs/events", "/static/main.js", "/cover"):
+        status, headers, body = _serve(app, path)
+        assert (status, body) == (200, b"x" * 4096)
+        assert b"content-encoding" not in headers
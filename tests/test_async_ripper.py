@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper.services.async_ripper import AsyncRipperService
+from songripper.services.concurrency import AIMDLimiter
+from songripper.services.ripper_service import RipperService
+
+FAKES = Path(__file__).resolve().parents[1] / "benchmarks" / "fakes"
+
+
+def test_async_rip_playlist_with_subprocesses(monkeypatch, tmp_path):
+    # Offline yt-dlp/ffmpeg stand-ins; filler audio cannot be tagged.
+    monkeypatch.setenv("PATH", f"{FAKES}{os.pathsep}{os.environ['PATH']}")
+    for name in ("FAKE_YTDLP_LATENCY", "FAKE_DOWNLOAD_LATENCY", "FAKE_FFMPEG_LATENCY"):
+        monkeypatch.setenv(name, "0.01")
+    monkeypatch.setenv("FAKE_OUTPUT_BYTES", "1000")
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.download_limiter = AIMDLimiter(2, 2, 2)
+    ripper = AsyncRipperService(service, max_tracks=8)
+
+    status = asyncio.run(ripper.rip_playlist("fake://playlist/6"))
+
+    job = service.jobs.list()[0]
+    assert status == "done", job.report()
+    assert len(job.succeeded) == 6
+    assert all(Path(item.path).stat().st_size == 1000 for item in job.items)
+    assert {u.stage for u in job.usage} == {"enumerate", "metadata", "download", "trim"}
+    assert all(u.exact and u.max_rss_kb for u in job.usage)
+    assert service.download_limiter.in_flight == 0
+
+    async def replay():
+        return [e async for e in service.events.subscribe(job.id)]
+
+    events = asyncio.run(replay())
+    progress = [e.data for e in events if e.kind == "progress"]
+    assert sorted(p["item"] for p in progress) == list(range(6))
+    assert all(p["percent"] == 100.0 and p["speed"] for p in progress)
+    assert {e.data["stage"] for e in events if e.kind == "stage"} == {
+        "metadata", "download", "trim", "tag"
+    }
+    assert len([e for e in events if e.kind == "track"]) == 6
+    assert (events[-1].kind, events[-1].data["status"]) == ("job", "done")
+
+
+def test_async_slot_waits_for_release():
+    limiter = AIMDLimiter(1, 1, 1)
+    order = []
+
+    async def worker(name):
+        with await limiter.slot_async():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(worker("a"), worker("b"))
+
+    asyncio.run(main())
+    assert order == ["a start", "a end", "b start", "b end"]
+
+
+def test_async_rip_splits_chapter_video_into_staged_tracks(monkeypatch, tmp_path):
+    monkeypatch.setenv("PATH", f"{FAKES}{os.pathsep}{os.environ['PATH']}")
+    for name in ("FAKE_YTDLP_LATENCY", "FAKE_DOWNLOAD_LATENCY", "FAKE_FFMPEG_LATENCY"):
+        monkeypatch.setenv(name, "0")
+    monkeypatch.setenv("FAKE_OUTPUT_BYTES", "300")
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.split_chapters = True
+    ripper = AsyncRipperService(service)
+
+    status = asyncio.run(
+        ripper.rip_playlist("fake://album", entries=[{"id": "c4"}, {"id": "v1"}])
+    )
+
+    job = service.jobs.list()[0]
+    assert status == "done", job.report()
+    album = tmp_path / "staging" / "Bench Artist 4" / "Bench Full Album 4"
+    assert job.items[0].tracks == [str(album / f"0{n} Chapter {n}.m4a") for n in range(1, 5)]
+    assert job.items[0].path == job.items[0].tracks[0]
+    assert len(job.items[1].tracks) == 1
+    assert "4 tracks from" in job.report()
+    assert not list((tmp_path / "staging").glob(".*"))
+    assert [u.stage for u in job.usage].count("split") == 4
+
+
+def test_async_rip_encodes_every_profile_once(monkeypatch, tmp_path):
+    from songripper.services.profiles import parse_profiles
+
+    monkeypatch.setenv("PATH", f"{FAKES}{os.pathsep}{os.environ['PATH']}")
+    for name in ("FAKE_YTDLP_LATENCY", "FAKE_DOWNLOAD_LATENCY", "FAKE_FFMPEG_LATENCY"):
+        monkeypatch.setenv(name, "0")
+    monkeypatch.setenv("FAKE_OUTPUT_BYTES", "300")
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+    monkeypatch.setitem(sys.modules, "mutagen.oggopus", None)
+
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.profiles = parse_profiles("alac,opus")
+    ripper = AsyncRipperService(service)
+
+    status = asyncio.run(ripper.rip_playlist("fake://album", entries=[{"id": "v3"}]))
+
+    job = service.jobs.list()[0]
+    assert status == "done", job.report()
+    track = Path(job.items[0].path)
+    assert track.suffix == ".m4a" and track.with_suffix(".opus").exists()
+    assert [u.stage for u in job.usage].count("encode") == 1
+    assert "trim" not in [u.stage for u in job.usage]
+    assert not list(track.parent.glob(".*"))
@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from songripper import cli
+from songripper.services.ripper_service import RipperService
+
+
+def _service(tmp_path, playlists, broken):
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    service.retry_attempts = 1
+    ripped = []
+
+    def enumerate_playlist(url, items=None):
+        return {"title": url, "entries": [{"id": v} for v in playlists.get(url, [])]}
+
+    def mp3_from_url(url, staging):
+        vid = url.rsplit("/", 1)[-1]
+        ripped.append(vid)
+        if vid in broken:
+            raise RuntimeError(f"{vid} unavailable")
+        path = staging / f"{vid}.m4a"
+        path.write_bytes(b"audio")
+        return "Artist", "Album", path
+
+    service.enumerate_playlist = enumerate_playlist
+    service.mp3_from_url = mp3_from_url
+    return service, ripped
+
+
+def test_read_urls_skips_blanks_comments_and_repeats():
+    lines = ["# migration\n", "https://a\n", "\n", "  https://b  \n", "https://a\n"]
+    assert cli.read_urls(lines) == ["https://a", "https://b"]
+
+
+def test_batch_reports_and_resumes_failed_items(monkeypatch, tmp_path, capsys):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://pl/list\nhttps://youtu.be/single\n")
+    report = tmp_path / "report.json"
+    broken = {"b"}
+    service, ripped = _service(tmp_path, {"https://pl/list": ["a", "b"]}, broken)
+
+    argv = [str(urls), "--report", str(report), "-j", "2"]
+    assert cli.main(argv, service=service) == 1
+    assert service.download_limiter.maximum == 2
+    entries = {e["url"]: e for e in json.loads(report.read_text())["urls"]}
+    playlist = entries["https://pl/list"]
+    assert playlist["status"] == "partial"
+    assert [(i["url"], i["status"]) for i in playlist["items"]] == [
+        ("https://youtu.be/a", "done"),
+        ("https://youtu.be/b", "failed"),
+    ]
+    assert "b unavailable" in playlist["items"][1]["error"]
+    assert entries["https://youtu.be/single"]["status"] == "done"
+    staged = tmp_path / "data" / "staging" / "Artist" / "Album"
+    assert playlist["tracks"] == [str(staged / "a.m4a")]
+    assert playlist["seconds"] >= 0
+
+    broken.clear()
+    ripped.clear()
+    assert cli.main(argv + ["--resume", "--approve"], service=service) == 0
+    assert ripped == ["b"]
+    data = json.loads(report.read_text())
+    assert data["mode"] == "approve" and data["finished"]
+    playlist = {e["url"]: e for e in data["urls"]}["https://pl/list"]
+    assert playlist["status"] == "done"
+    library = tmp_path / "nas" / "Artist" / "Album"
+    assert playlist["approved"] == [str(library / "a.m4a"), str(library / "b.m4a")]
+    assert sorted(p.name for p in library.iterdir()) == ["a.m4a", "b.m4a", "single.m4a"]
+    assert "Skipping 1 finished URL(s)" in capsys.readouterr().err
+
+
+def test_dry_run_lists_items_without_ripping(monkeypatch, tmp_path):
+    service, ripped = _service(tmp_path, {"https://pl/list": ["a", "b"]}, set())
+    report = tmp_path / "report.json"
+    monkeypatch.setattr(sys, "stdin", io.StringIO("https://pl/list\n"))
+    assert cli.main(["--dry-run", "--report", str(report)], service=service) == 0
+    (entry,) = json.loads(report.read_text())["urls"]
+    assert entry["status"] == "planned"
+    assert [i["url"] for i in entry["items"]] == ["https://youtu.be/a", "https://youtu.be/b"]
+    assert ripped == [] and not (tmp_path / "data" / "staging").exists()
+
+
+def test_concurrent_urls_with_the_same_track_name(tmp_path):
+    playlists = {"https://pl/one": ["a"], "https://pl/two": ["b"]}
+    service, _ = _service(tmp_path, playlists, set())
+    both_written = threading.Barrier(2, timeout=5)
+
+    def mp3_from_url(url, staging):
+        vid = url.rsplit("/", 1)[-1]
+        path = staging / "02 Bench Track 1.m4a"
+        path.write_bytes(vid.encode())
+        both_written.wait()
+        return vid, "Album", path
+
+    service.mp3_from_url = mp3_from_url
+    report = cli.Report(tmp_path / "report.json", "rip")
+    cli.run_batch(list(playlists), service, report, concurrency=2, log=io.StringIO())
+
+    assert report.summary() == {"done": 2}
+    staged = tmp_path / "data" / "staging"
+    for vid in ("a", "b"):
+        assert (staged / vid / "Album" / "02 Bench Track 1.m4a").read_bytes() == vid.encode()
+    assert list((tmp_path / "data" / "work").iterdir()) == []
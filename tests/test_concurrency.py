@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+import concurrent.futures
+import contextlib
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper.services.concurrency import AIMDLimiter
+from songripper.services import ripper_service
+from songripper.services.ripper_service import RipperError, RipperService
+
+
+class ThrottlingServer(ThreadingHTTPServer):
+    """Serve fake audio but answer 429 when too many requests overlap."""
+
+    daemon_threads = True
+
+    def __init__(self, allowed):
+        super().__init__(("127.0.0.1", 0), ThrottlingHandler)
+        self.allowed = allowed
+        self.active = 0
+        self.peak = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            over = server.active > server.allowed
+            if over:
+                server.throttled += 1
+        try:
+            if over:
+                self.send_response(429)
+                self.end_headers()
+                return
+            time.sleep(0.01)
+            body = b"x" * 4096
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def download(limiter, url):
+    with limiter.slot() as slot:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as res:
+                slot.nbytes = len(res.read())
+        except urllib.error.HTTPError as exc:
+            raise RipperError(f"HTTP Error {exc.code}: Too Many Requests")
+
+
+def test_limiter_backs_off_when_server_throttles():
+    server = ThrottlingServer(allowed=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/audio"
+    limiter = AIMDLimiter(initial=12, minimum=1, maximum=12)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=12) as ex:
+            futures = [ex.submit(download, limiter, url) for _ in range(120)]
+            concurrent.futures.wait(futures)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert server.throttled > 0
+    reasons = [h["reason"] for h in limiter.snapshot()["history"]]
+    assert "throttled" in reasons
+    assert limiter.limit < 12
+    assert limiter.in_flight == 0
+
+
+def test_limiter_increases_while_throughput_holds():
+    now = [0.0]
+    limiter = AIMDLimiter(initial=2, minimum=1, maximum=4, clock=lambda: now[0])
+    for _ in range(20):
+        with limiter.slot() as slot:
+            now[0] += 1.0
+            slot.nbytes = 1000
+    assert limiter.limit == 4
+
+    # A download ten times slower than the average counts as a spike.
+    with limiter.slot() as slot:
+        now[0] += 10.0
+        slot.nbytes = 1000
+    assert limiter.limit == 2
+    assert limiter.snapshot()["history"][-1]["reason"] == "slow"
+
+
+def test_limiter_ignores_throughput_of_unsized_downloads():
+    now = [0.0]
+    limiter = AIMDLimiter(initial=2, minimum=1, maximum=4, clock=lambda: now[0])
+    with limiter.slot() as slot:
+        now[0] += 1.0
+        slot.nbytes = 1000
+    # Without nbytes a long completion is not a throughput sample.
+    with limiter.slot():
+        now[0] += 60.0
+    assert limiter.snapshot()["throughput"] == 1000.0
+    assert limiter.limit == 2
+    assert "slow" not in [h["reason"] for h in limiter.snapshot()["history"]]
+
+
+def test_limiter_blocks_at_limit():
+    limiter = AIMDLimiter(initial=1, minimum=1, maximum=1)
+    first = limiter.slot()
+    assert limiter.try_slot() is None
+    limiter.release(first)
+    second = limiter.try_slot()
+    assert second is not None
+    limiter.release(second)
+
+
+def test_download_time_excludes_waiting_for_a_slot(monkeypatch, tmp_path):
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.download_limiter = AIMDLimiter(1, 1, 1)
+    order = []
+
+    @contextlib.contextmanager
+    def timer(stage):
+        order.append(f"{stage} timer in={service.download_limiter.in_flight}")
+        yield
+
+    monkeypatch.setattr(ripper_service, "stage_timer", timer)
+    monkeypatch.setattr(service, "_run_command", lambda cmd, stage: "")
+    (tmp_path / "a.source.webm").write_bytes(b"x" * 10)
+
+    service._fetch_source("https://youtu.be/a", tmp_path, "a.source")
+    assert order == ["download timer in=1"]
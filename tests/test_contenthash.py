@@ -0,0 +1,134 @@
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from songripper.services.contenthash import (
+    BackgroundHasher,
+    HashIndex,
+    Throttle,
+    content_hash,
+    payload_ranges,
+)
+from songripper.services.ripper_service import RipperService
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _mp4(audio: bytes, tags: bytes) -> bytes:
+    return _box(b"ftyp", b"M4A \0\0\0\0") + _box(b"moov", tags) + _box(b"mdat", audio)
+
+
+def _ogg_page(seq: int, packet: bytes) -> bytes:
+    lacing = bytes([255] * (len(packet) // 255) + [len(packet) % 255])
+    header = b"OggS" + bytes(2) + struct.pack("<qII", seq, 1, seq) + bytes(4)
+    return header + bytes([len(lacing)]) + lacing + packet
+
+
+def test_mp4_and_ogg_hashes_ignore_tags(tmp_path):
+    a, b, c = tmp_path / "a.m4a", tmp_path / "b.m4a", tmp_path / "c.m4a"
+    a.write_bytes(_mp4(b"audio" * 100, b"title=A"))
+    b.write_bytes(_mp4(b"audio" * 100, b"title=B, with a much longer cover" * 20))
+    c.write_bytes(_mp4(b"other" * 100, b"title=A"))
+    assert payload_ranges(a) == [(len(a.read_bytes()) - 500, 500)]
+    assert content_hash(a) == content_hash(b) != content_hash(c)
+
+    def ogg(tags: bytes) -> bytes:
+        return b"".join([
+            _ogg_page(0, b"OpusHead" + bytes(11)),
+            _ogg_page(1, b"OpusTags" + tags),
+            _ogg_page(2, b"frames" * 80),
+        ])
+
+    x, y = tmp_path / "x.opus", tmp_path / "y.opus"
+    x.write_bytes(ogg(b"short"))
+    y.write_bytes(ogg(b"a much longer comment header" * 30))
+    assert content_hash(x) == content_hash(y)
+
+    plain = tmp_path / "plain.bin"
+    plain.write_bytes(b"data")
+    assert payload_ranges(plain) == [(0, 4)]
+
+
+def test_throttle_spaces_reads():
+    slept = []
+    throttle = Throttle(1000, sleep=slept.append)
+    throttle.consume(500)
+    throttle.consume(500)
+    assert len(slept) == 1 and 0.4 < slept[0] <= 0.5
+    Throttle(0, sleep=slept.append).consume(10**9)
+    assert len(slept) == 1
+
+
+def test_index_caches_follows_renames_and_scans(tmp_path):
+    library = tmp_path / "lib"
+    library.mkdir()
+    one, two = library / "one.m4a", library / "two.m4a"
+    one.write_bytes(_mp4(b"x" * 64, b"1"))
+    two.write_bytes(_mp4(b"x" * 64, b"2"))
+    index = HashIndex(tmp_path / "hashes.sqlite3")
+    assert index.duplicates(one) == [] and not index.path.exists()
+
+    hasher = BackgroundHasher(lambda: index, lambda: [(library, ".m4a")])
+    assert hasher.scan() == 2
+    assert hasher.scan() == 0
+    assert index.duplicates(one) == [two]
+
+    moved = library / "moved.m4a"
+    two.rename(moved)
+    index.rename(two, moved)
+    assert index.duplicates(one) == [moved]
+    moved.unlink()
+    hasher.scan()
+    assert index.paths(library) == [str(one)]
+
+
+def test_approval_flags_identical_audio(tmp_path, capsys):
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    album = tmp_path / "nas" / "Artist" / "Album"
+    album.mkdir(parents=True)
+    (album / "Old Name.m4a").write_bytes(_mp4(b"song" * 50, b"old tags"))
+    staged = tmp_path / "data" / "staging" / "Artist" / "Album"
+    staged.mkdir(parents=True)
+    track = staged / "Completely Different.m4a"
+    track.write_bytes(_mp4(b"song" * 50, b"new tags"))
+
+    service.hasher.scan()
+    (listed,) = service.list_staged_tracks()
+    assert listed.duplicate == str(album / "Old Name.m4a")
+    assert service.find_matching_tracks(str(track)) == [album / "Old Name.m4a"]
+
+    service.approve_with_checks(input_func=lambda prompt: "n")
+    assert "Identical audio for Completely Different.m4a" in capsys.readouterr().out
+    assert track.exists()
+
+
+def test_hasher_waits_only_while_an_item_rips(tmp_path):
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    stuck = service.jobs.create("https://example.com/pl")
+    stuck.status = "running"  # e.g. left behind by a crashed worker
+    assert not service._ripping()
+
+    item = stuck.add_item("https://youtu.be/x")
+    with service._ripping_item(stuck, 0, item):
+        assert service._ripping()
+        raise RuntimeError("download failed")
+    assert item.status == "failed"
+    assert not service._ripping()
+
+
+def test_approve_all_keeps_digests_of_moved_tracks(tmp_path):
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    staged = tmp_path / "data" / "staging" / "Artist" / "Album"
+    staged.mkdir(parents=True)
+    (staged / "Song.m4a").write_bytes(_mp4(b"song" * 50, b"tags"))
+    service.hasher.scan()
+    digest = service.hashes.cached(staged / "Song.m4a")
+
+    service.approve_all()
+    approved = tmp_path / "nas" / "Artist" / "Album" / "Song.m4a"
+    assert approved.exists()
+    assert digest is not None
+    assert service.hashes.cached(approved) == digest
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper.services.errorlog import (
+    ErrorLog,
+    filter_lines,
+    parse_range,
+    read_bytes,
+    tail_lines,
+)
+
+
+def test_records_are_written_in_background_and_rotated(tmp_path):
+    path = tmp_path / "logs" / "errors.log"
+    log = ErrorLog(path, max_bytes=400, backups=2)
+    for n in range(12):
+        log.write(f"failure {n}\nTraceback ...", route="/rip", job_id=n % 3)
+    log.flush()
+
+    files = sorted(p.name for p in path.parent.iterdir())
+    assert files == ["errors.log", "errors.log.1", "errors.log.2"]
+    records = [json.loads(line) for line in path.with_name("errors.log.1").read_text().splitlines()]
+    assert records and {"ts", "route", "job_id", "message"} <= set(records[0])
+    assert records[0]["message"].endswith("Traceback ...")
+
+
+def test_tail_filter_and_ranges_stream_from_disk(tmp_path):
+    path = tmp_path / "errors.log"
+    log = ErrorLog(path, max_bytes=0)
+    for n in range(2000):
+        log.write(f"error {n}", route="/rip" if n % 2 else "/approve", job_id=n % 5)
+    log.flush()
+
+    last = [json.loads(line)["message"] for line in tail_lines(path, 3)]
+    assert last == ["error 1997", "error 1998", "error 1999"]
+    picked = [json.loads(line) for line in filter_lines(path, {"route": "/rip", "job_id": 2}, tail=2)]
+    assert [r["message"] for r in picked] == ["error 1987", "error 1997"]
+    for tail in (0, -1):
+        assert tail_lines(path, tail) == []
+        assert list(filter_lines(path, {"route": "/rip"}, tail=tail)) == []
+
+    size = path.stat().st_size
+    assert parse_range("bytes=0-9", size) == (0, 9)
+    assert parse_range("bytes=-10", size) == (size - 10, size - 1)
+    assert parse_range("bytes=5-", size) == (5, size - 1)
+    assert parse_range(f"bytes={size}-", size) is None
+    assert parse_range("lines=1-2", size) is None
+    data = path.read_bytes()
+    assert b"".join(read_bytes(path, 100, 70_000)) == data[100:70_001]
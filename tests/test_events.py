@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper.services.events import JobEvents, parse_progress
+
+
+def test_parse_progress_reads_ytdlp_newline_output():
+    assert parse_progress("[download]  45.2% of    3.81MiB at    1.23MiB/s ETA 00:02\n") == {
+        "percent": 45.2, "size": "3.81MiB", "speed": "1.23MiB/s", "eta": "00:02",
+    }
+    assert parse_progress("[download]   0.0% of ~  5.00MiB at  Unknown speed ETA Unknown") == {
+        "percent": 0.0, "size": "5.00MiB", "speed": None, "eta": None,
+    }
+    done = parse_progress("[download] 100% of    3.81MiB in 00:00:03 at 1.14MiB/s")
+    assert (done["percent"], done["speed"], done["eta"]) == (100.0, "1.14MiB/s", None)
+    assert parse_progress("[download] Destination: /tmp/x.webm") is None
+    assert parse_progress("[ExtractAudio] Destination: x.m4a") is None
+
+
+def test_subscriber_gets_backlog_then_live_events_until_job_ends():
+    events = JobEvents()
+    events.publish(1, "item", {"item": 0, "status": "running"})
+    for pct in (10.0, 20.0):
+        events.publish(1, "progress", {"item": 0, "percent": pct})
+
+    async def consume():
+        seen = []
+        async for event in events.subscribe(1, keepalive=0.01):
+            if event is None:
+                if not seen[-1:] == ["keepalive"]:
+                    seen.append("keepalive")
+                    # Publish from another thread, as the sync pipeline does.
+                    threading.Thread(
+                        target=lambda: [
+                            events.publish(1, "track", {"item": 0, "path": "x"}),
+                            events.publish(1, "job", {"status": "done"}),
+                        ]
+                    ).start()
+                continue
+            seen.append((event.kind, event.data.get("percent")))
+        return seen
+
+    seen = asyncio.run(consume())
+    # Only the latest progress of an item is replayed.
+    assert seen == [
+        ("item", None), ("progress", 20.0), "keepalive", ("track", None), ("job", None),
+    ]
+
+    # A late subscriber replays the finished job and stops.
+    async def late():
+        return [e.kind async for e in events.subscribe(1)]
+
+    assert asyncio.run(late()) == ["item", "progress", "track", "job"]
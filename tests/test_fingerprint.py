@@ -0,0 +1,119 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from songripper.services import fingerprint
+from songripper.services.fingerprint import FingerprintIndex, FingerprintIndexer
+from songripper.services.ripper_service import RipperService
+
+
+def _song(np, seed, seconds=20):
+    """Synthetic PCM: four partials with slow tremolo, chosen by ``seed``."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(fingerprint.SAMPLE_RATE * seconds) / fingerprint.SAMPLE_RATE
+    signal = sum(
+        np.sin(2 * np.pi * f * t) * (0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(0.1, 2) * t))
+        for f in rng.uniform(150, 2000, 4)
+    )
+    return signal / 4
+
+
+def _melody(np, seed, seconds=20):
+    """Synthetic PCM: notes of one scale and one timbre, in an order chosen by ``seed``."""
+    rng = np.random.default_rng(seed)
+    note = np.arange(fingerprint.SAMPLE_RATE // 4) / fingerprint.SAMPLE_RATE
+    scale = 220 * 2 ** (np.array([0, 2, 4, 5, 7, 9, 11, 12]) / 12)
+    notes = [
+        sum(np.sin(2 * np.pi * k * f * note) / k for k in range(1, 5)) * np.exp(-6 * note)
+        for f in rng.choice(scale, seconds * 4)
+    ]
+    return np.concatenate(notes) / 3
+
+
+def _pcm(np, signal):
+    return (np.clip(signal, -1, 1) * 20000).astype("<i2").tobytes()
+
+
+def test_fingerprint_ignores_volume_offset_and_noise():
+    np = pytest.importorskip("numpy")
+    song = _song(np, 1)
+    ref = fingerprint.fingerprint(_pcm(np, song))
+    variant = 0.5 * np.roll(song, 3000) + np.random.default_rng(0).normal(0, 0.005, song.size)
+
+    assert fingerprint.similarity(ref, fingerprint.fingerprint(_pcm(np, variant))) > 0.3
+    assert fingerprint.similarity(ref, fingerprint.fingerprint(_pcm(np, _song(np, 2)))) < 0.1
+    assert fingerprint.fingerprint(b"\0\0" * 100) is None
+
+
+def test_different_songs_with_the_same_timbre_do_not_match():
+    np = pytest.importorskip("numpy")
+    prints = [fingerprint.fingerprint(_pcm(np, _melody(np, seed))) for seed in range(6)]
+    variant = 0.7 * np.roll(_melody(np, 0), 1234)
+
+    assert fingerprint.similarity(prints[0], fingerprint.fingerprint(_pcm(np, variant))) > 0.3
+    for i, a in enumerate(prints):
+        for b in prints[i + 1:]:
+            assert fingerprint.similarity(a, b) < 0.1
+
+
+def test_index_decodes_each_file_once_and_persists(tmp_path):
+    np = pytest.importorskip("numpy")
+    decoded = []
+
+    def extract(path):
+        decoded.append(path.name)
+        return _pcm(np, _song(np, int(path.read_text())))
+
+    library = tmp_path / "lib"
+    (library / "A").mkdir(parents=True)
+    for name, seed in (("one.m4a", 1), ("two.m4a", 2)):
+        (library / "A" / name).write_text(str(seed))
+    staged = tmp_path / "staged.m4a"
+    staged.write_text("1")
+
+    index = FingerprintIndex(tmp_path / "fp.npz", extract)
+    assert index.refresh(library, ".m4a", interrupted=lambda: True) is False
+    assert len(index) == 0
+    indexer = FingerprintIndexer(lambda: index, lambda: (library, ".m4a"))
+    assert indexer.scan() is True
+    assert indexer.scan() is True
+    found = index.nearest(index.get(staged), 0.2, within=library)
+    assert [p for p, _ in found] == [str(library / "A" / "one.m4a")]
+    assert sorted(decoded) == ["one.m4a", "staged.m4a", "two.m4a"]
+
+    (library / "A" / "two.m4a").unlink()
+    index.refresh(library, ".m4a")
+    reloaded = FingerprintIndex(tmp_path / "fp.npz", extract)
+    assert len(reloaded) == 2
+    moved = library / "A" / "moved.m4a"
+    staged.rename(moved)
+    reloaded.rename(staged, moved)
+    assert reloaded.get(moved) is not None
+    assert len(decoded) == 3
+
+
+def test_duplicates_use_fingerprints_instead_of_names(monkeypatch, tmp_path):
+    np = pytest.importorskip("numpy")
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    monkeypatch.setattr(
+        service, "_fingerprint_excerpt", lambda p: _pcm(np, _song(np, int(p.read_text())))
+    )
+    album = tmp_path / "nas" / "Artist" / "Album"
+    album.mkdir(parents=True)
+    (album / "Song.m4a").write_text("1")
+    (album / "Song (Live).m4a").write_text("2")
+    staged = tmp_path / "data" / "staging" / "Artist" / "Album"
+    staged.mkdir(parents=True)
+    track = staged / "Song (Live!).m4a"
+    track.write_text("1")
+
+    service.fingerprint_indexer.scan()
+    assert (tmp_path / "data" / "fingerprints.npz").exists()
+    decoded = len(service.fingerprints)
+    assert service._duplicates(track, album) == [album / "Song.m4a"]
+    assert len(service.fingerprints) == decoded + 1  # only the staged track
+
+    monkeypatch.setattr(fingerprint, "available", lambda: False)
+    assert service._duplicates(track, album) == [album / "Song (Live).m4a"]
@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from songripper.services import library
+from songripper.services.library import LibraryIndex, LibraryIndexer
+from songripper.services.ripper_service import RipperService
+
+
+def _add(root, artist, album, *titles):
+    album_dir = root / artist / album
+    album_dir.mkdir(parents=True, exist_ok=True)
+    for n, title in enumerate(titles, 1):
+        (album_dir / f"{n:02d} {title}.m4a").write_bytes(b"audio")
+    return album_dir
+
+
+def _titles(page):
+    return [item["title"] for item in page.items]
+
+
+def test_browse_and_search_pages(tmp_path):
+    root = tmp_path / "nas"
+    _add(root, "Beyoncé", "Lemonade", "Formation", "Sorry", "Hold Up")
+    _add(root, "Björk", "Homogenic", "Jóga", "Bachelorette")
+    _add(root, "Björk", "Debut", "Human Behaviour")
+    (root / "notes.txt").write_text("skip me")
+    index = LibraryIndex(tmp_path / "library.sqlite3", root)
+    assert index.refresh() == 6
+
+    artists = index.artists(per_page=1)
+    assert (artists.total, artists.pages) == (2, 2)
+    assert artists.items == [{"artist": "Beyoncé", "albums": 1, "tracks": 3}]
+    assert index.artists(page=2, per_page=1).items[0]["artist"] == "Björk"
+    assert [a["album"] for a in index.albums("bjork").items] == ["Debut", "Homogenic"]
+    assert _titles(index.tracks("Beyoncé", "lemonade")) == ["Formation", "Sorry", "Hold Up"]
+
+    assert _titles(index.search("jo", "title")) == ["Jóga"]
+    assert index.search("B", "artist").total == 6
+    assert index.search("hom", "album").items[0]["album"] == "Homogenic"
+    assert _titles(index.search("bjork behav")) == ["Human Behaviour"]
+    assert index.search("   ").total == 0
+
+    index.fts = False  # LIKE fallback without FTS5
+    assert _titles(index.search("ehavi bjo")) == ["Human Behaviour"]
+
+
+def test_word_search_tolerates_typos(tmp_path):
+    root = tmp_path / "nas"
+    _add(root, "The Beatles", "Abbey Road", "Come Together", "Something")
+    _add(root, "Beach House", "Bloom", "Myth")
+    index = LibraryIndex(tmp_path / "library.sqlite3", root)
+    index.refresh()
+
+    for fts in (True, False):  # and the LIKE fallback without FTS5
+        index.fts = fts
+        assert sorted(_titles(index.search("beatels"))) == ["Come Together", "Something"]
+        assert _titles(index.search("beatels somthing")) == ["Something"]
+        assert _titles(index.search("beach myht")) == ["Myth"]
+        assert index.search("zzzz").total == 0
+        assert index.search("beatels", "artist").total == 0  # field searches are prefix-only
+
+
+def test_refresh_only_rereads_changed_directories(monkeypatch, tmp_path):
+    root = tmp_path / "nas"
+    album = _add(root, "Artist", "Album", "One", "Two")
+    _add(root, "Other", "Record", "Three")
+    index = LibraryIndex(tmp_path / "library.sqlite3", root)
+    index.refresh()
+
+    parsed = []
+    real = library.parse_track
+    monkeypatch.setattr(library, "parse_track", lambda p, m: parsed.append(p.name) or real(p, m))
+    assert index.refresh() == 0
+    (album / "03 Three.m4a").write_bytes(b"audio")
+    (album / "01 One.m4a").unlink()
+    os.utime(album, ns=(1, 1))  # a new mtime even on coarse filesystems
+    assert index.refresh() == 2
+    assert parsed == ["03 Three.m4a"]
+    assert index.artists().items[0] == {"artist": "Artist", "albums": 1, "tracks": 2}
+    assert _titles(index.search("one")) == []
+
+    (root / "Other" / "Record" / "01 Three.m4a").unlink()
+    (root / "Other" / "Record").rmdir()
+    (root / "Other").rmdir()
+    assert index.refresh() == 1
+    assert [a["artist"] for a in index.artists().items] == ["Artist"]
+    assert index.search("three", "title").total == 1
+
+    moved = album / "02 Renamed.m4a"
+    (album / "02 Two.m4a").rename(moved)
+    assert index.reindex([album / "02 Two.m4a", moved]) == 2
+    assert _titles(index.tracks("Artist", "Album")) == ["Renamed", "Three"]
+
+
+def test_approval_wakes_the_indexer(tmp_path):
+    service = RipperService(data_dir=tmp_path / "data", nas_path=tmp_path / "nas")
+    _add(tmp_path / "data" / "staging", "Artist", "Album", "Song")
+    assert service.library.root == tmp_path / "nas"
+
+    service.library_indexer = LibraryIndexer(lambda: service.library, interval=3600)
+    service.library_indexer.start()
+    try:
+        service.approve_all()
+        for _ in range(200):
+            if service.library.search("song", "title").total:
+                break
+            service.library_indexer._stop.wait(0.01)
+    finally:
+        service.library_indexer.stop()
+    assert _titles(service.library.tracks("Artist", "Album")) == ["Song"]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from songripper.services.metrics import MetricsRegistry, stage_timer, STAGE_ERRORS
+
+
+def test_histogram_and_counter_exposition():
+    reg = MetricsRegistry()
+    hist = reg.histogram("x_seconds", "Help text.", ["stage"], buckets=(0.1, 1))
+    counter = reg.counter("x_total", "Things.", ["result"])
+    reg.gauge_func("x_ratio", "Ratio.", lambda: 0.5)
+
+    hist.observe(0.05, "download")
+    hist.observe(0.5, "download")
+    hist.observe(5, "download")
+    counter.inc('we"ird')
+
+    text = reg.render()
+    assert "# TYPE x_seconds histogram" in text
+    assert 'x_seconds_bucket{stage="download",le="0.1"} 1' in text
+    assert 'x_seconds_bucket{stage="download",le="1"} 2' in text
+    assert 'x_seconds_bucket{stage="download",le="+Inf"} 3' in text
+    assert 'x_seconds_count{stage="download"} 3' in text
+    assert 'x_total{result="we\\"ird"} 1' in text
+    assert "x_ratio 0.5" in text
+
+
+def test_stage_timer_counts_errors():
+    before = STAGE_ERRORS.value("test-stage")
+    with pytest.raises(ValueError):
+        with stage_timer("test-stage"):
+            raise ValueError("boom")
+    assert STAGE_ERRORS.value("test-stage") == before + 1
@@ -2,14 +2,21 @@ import os
 import sys
 import json
 import types
-import subprocess
+from pathlib import Path
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 from songripper import worker
+from songripper.services import accounting
 from songripper.worker import mp3_from_url, AUDIO_EXT, AUDIO_FORMAT
 
 
+def fake_download(cmd):
+    """Write the file yt-dlp would for the ``-o`` template of ``cmd``, if any."""
+    if "-o" in cmd:
+        Path(cmd[cmd.index("-o") + 1].replace("%(ext)s", "webm")).write_bytes(b"audio")
+
+
 def test_mp3_from_url(tmp_path, monkeypatch):
     meta = {
         "artist": "Bad/Artist",
@@ -29,9 +36,10 @@ def test_mp3_from_url(tmp_path, monkeypatch):
     def fake_run(cmd, **kwargs):
         if "-J" in cmd:
             return FakeResult(json.dumps(meta))
+        fake_download(cmd)
         return FakeResult("")
 
-    monkeypatch.setattr(subprocess, "run", fake_run)
+    monkeypatch.setattr(accounting, "run_process", fake_run)
     monkeypatch.setattr(worker, "fetch_cover", lambda a, t: None)
 
     easy_paths = []
@@ -86,7 +94,7 @@ def test_mp3_from_url_uses_cached_cover(tmp_path, monkeypatch):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(subprocess, "run", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else FakeResult(""))
+    monkeypatch.setattr(accounting, "run_process", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else fake_download(cmd) or FakeResult(""))
 
     cover_calls = []
     def fake_fetch_cover(a, t):
@@ -141,7 +149,7 @@ def test_mp3_from_url_fallback_values(tmp_path, monkeypatch):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(subprocess, "run", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else FakeResult(""))
+    monkeypatch.setattr(accounting, "run_process", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else fake_download(cmd) or FakeResult(""))
     monkeypatch.setattr(worker, "fetch_cover", lambda *a, **k: None)
 
     class DummyEasyID3(dict):
@@ -190,7 +198,7 @@ def test_mp3_from_url_singles_rule(tmp_path, monkeypatch):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(subprocess, "run", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else FakeResult(""))
+    monkeypatch.setattr(accounting, "run_process", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else fake_download(cmd) or FakeResult(""))
     monkeypatch.setattr(worker, "fetch_cover", lambda *a, **k: None)
 
     class DummyEasyID3(dict):
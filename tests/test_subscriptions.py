@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper import worker
+from songripper.services import accounting
+from songripper.services.ripper_service import RipperService
+from songripper.services.subscriptions import SubscriptionManager
+
+
+class FakeResult:
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.returncode = 0
+        self.stderr = ""
+
+
+def make_service(tmp_path, monkeypatch, playlists):
+    """Return a service whose yt-dlp enumeration reads from ``playlists``."""
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        info = dict(playlists[cmd[-1]])
+        if "--playlist-items" in cmd:
+            info["entries"] = info["entries"][:1]
+        return FakeResult(json.dumps(info))
+
+    monkeypatch.setattr(accounting, "run_process", fake_run)
+    return RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas"), calls
+
+
+def fake_rip(ripped, failing=()):
+    """A ``rip_func`` recording its entries and reporting them as job items."""
+
+    def rip(url, entries, job):
+        ripped.append(entries)
+        for entry in entries:
+            item = job.add_item(RipperService._entry_url(entry))
+            if entry["id"] in failing:
+                item.status, item.error = "failed", "ERROR: Video unavailable"
+            else:
+                item.status = "done"
+        return job.finish()
+
+    return rip
+
+
+def test_subscription_rips_only_new_entries(tmp_path, monkeypatch):
+    playlists = {"http://pl": {"entries": [{"id": "1"}, {"id": "2"}]}}
+    service, _ = make_service(tmp_path, monkeypatch, playlists)
+    manager = SubscriptionManager(service)
+
+    sub = manager.add("http://pl", 3600)
+    assert sub.seen_ids == ["1", "2"]
+
+    playlists["http://pl"]["entries"].append({"id": "3"})
+    ripped = []
+    found = manager.sync(sub, rip_func=fake_rip(ripped))
+
+    assert found == 1
+    assert ripped == [[{"id": "3"}]]
+    stored = manager.get(sub.id)
+    assert stored.seen_ids == ["1", "2", "3"]
+    assert stored.last_new == 1
+
+
+def test_subscription_probe_skips_unchanged_playlist(tmp_path, monkeypatch):
+    playlists = {
+        "http://pl": {
+            "playlist_count": 2,
+            "modified_date": "20260101",
+            "entries": [{"id": "1"}, {"id": "2"}],
+        }
+    }
+    service, calls = make_service(tmp_path, monkeypatch, playlists)
+    manager = SubscriptionManager(service)
+    sub = manager.add("http://pl", 3600)
+    calls.clear()
+
+    ripped = []
+    assert manager.sync(sub, rip_func=fake_rip(ripped)) == 0
+
+    assert ripped == []
+    assert len(calls) == 1
+    assert "--playlist-items" in calls[0]
+
+
+def test_subscription_rip_existing_and_due(tmp_path, monkeypatch):
+    playlists = {"http://pl": {"entries": [{"id": "1"}]}}
+    service, _ = make_service(tmp_path, monkeypatch, playlists)
+    manager = SubscriptionManager(service)
+
+    sub = manager.add("http://pl", 60, rip_existing=True)
+    assert sub.is_due(now=sub.interval)
+
+    ripped = []
+    monkeypatch.setattr(service, "rip_playlist", fake_rip(ripped))
+    manager.sync_due()
+
+    assert ripped == [[{"id": "1"}]]
+    assert not manager.get(sub.id).is_due(now=manager.get(sub.id).last_checked + 1)
+
+
+def test_subscription_retries_failed_entries(tmp_path, monkeypatch):
+    playlists = {
+        "http://pl": {
+            "playlist_count": 1,
+            "modified_date": "20260101",
+            "entries": [{"id": "1"}],
+        }
+    }
+    service, _ = make_service(tmp_path, monkeypatch, playlists)
+    manager = SubscriptionManager(service)
+    sub = manager.add("http://pl", 3600)
+    old_etag = sub.etag
+
+    entries = playlists["http://pl"]["entries"]
+    entries += [{"id": "2"}, {"id": "3"}]
+    playlists["http://pl"]["playlist_count"] = 3
+    ripped = []
+    assert manager.sync(sub, rip_func=fake_rip(ripped, failing={"3"})) == 1
+
+    stored = manager.get(sub.id)
+    assert stored.seen_ids == ["1", "2"]
+    assert stored.last_error == "1 of 2 new item(s) failed: 3: ERROR: Video unavailable"
+    assert stored.etag == old_etag
+
+    assert manager.sync(stored, rip_func=fake_rip(ripped)) == 1
+    assert ripped[-1] == [{"id": "3"}]
+    stored = manager.get(sub.id)
+    assert stored.seen_ids == ["1", "2", "3"]
+    assert stored.last_error is None and stored.etag != old_etag
+
+
+def test_concurrent_syncs_rip_new_entries_once(tmp_path, monkeypatch):
+    playlists = {"http://pl": {"playlist_count": 1, "entries": [{"id": "1"}]}}
+    service, _ = make_service(tmp_path, monkeypatch, playlists)
+    manager = SubscriptionManager(service)
+    sub = manager.add("http://pl", 3600)
+    playlists["http://pl"]["entries"].append({"id": "2"})
+    playlists["http://pl"]["playlist_count"] = 2
+
+    ripped, started, release = [], threading.Event(), threading.Event()
+    rip = fake_rip(ripped)
+
+    def slow_rip(url, entries, job):
+        started.set()
+        release.wait(5)
+        return rip(url, entries, job)
+
+    # Both callers hold the same stale copy, as the scheduler and /subscriptions/sync would.
+    first = threading.Thread(target=manager.sync, args=(sub,), kwargs={"rip_func": slow_rip})
+    first.start()
+    started.wait(5)
+    stale = manager.get(sub.id)
+    second = threading.Thread(target=manager.sync, args=(stale,), kwargs={"rip_func": slow_rip})
+    second.start()
+    second.join(0.1)
+    assert second.is_alive()  # waiting for the first sync
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert ripped == [[{"id": "2"}]]
+    assert manager.get(sub.id).seen_ids == ["1", "2"]
+    assert stale.seen_ids == ["1", "2"]
+
+
+def test_remove_subscription(tmp_path, monkeypatch):
+    service, _ = make_service(tmp_path, monkeypatch, {"http://pl": {"entries": []}})
+    manager = SubscriptionManager(service)
+    sub = manager.add("http://pl", 60)
+
+    assert manager.remove(sub.id) is True
+    assert manager.remove(sub.id) is False
+    assert manager.load_all() == []
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from songripper import worker
+from songripper.services import accounting
+from songripper.services import tracing
+
+
+class FakeResult:
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.returncode = 0
+        self.stderr = ""
+
+
+def test_rip_job_records_stage_spans(monkeypatch, tmp_path):
+    worker.DATA_DIR = tmp_path
+    meta = {"artist": "A", "track": "T", "album": "B", "uploader": "U", "title": "T"}
+
+    def fake_run(cmd, **kwargs):
+        if "--flat-playlist" in cmd:
+            return FakeResult(json.dumps({"entries": [{"id": "1"}]}))
+        if "-J" in cmd:
+            return FakeResult(json.dumps(meta))
+        if "-o" in cmd:
+            out = cmd[cmd.index("-o") + 1].replace("%(ext)s", "webm")
+            open(out, "wb").close()
+        return FakeResult("")
+
+    monkeypatch.setattr(accounting, "run_process", fake_run)
+    monkeypatch.setattr(worker.shutil, "move", lambda *a, **k: None)
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+
+    job = worker.create_job("http://pl")
+    worker.rip_playlist("http://pl", job=job)
+
+    names = {s.name for s in job.trace.spans}
+    assert {"enumerate", "track", "metadata", "download", "trim", "move"} <= names
+    track = next(s for s in job.trace.spans if s.name == "track")
+    assert track.args == {"url": "https://youtu.be/1"}
+
+    chrome = job.trace.to_chrome()
+    events = [e for e in chrome["traceEvents"] if e["ph"] == "X"]
+    assert len(events) == len(job.trace.spans)
+    assert all(e["dur"] >= 0 and "tid" in e for e in events)
+    assert any(e["ph"] == "M" for e in chrome["traceEvents"])
+
+    rows = job.trace.waterfall()
+    starts = [r["start_ms"] for r in rows]
+    assert starts == sorted(starts)
+    assert all(0 <= r["offset_pct"] <= 100 for r in rows)
+
+
+def test_span_is_noop_without_active_trace():
+    assert tracing.current_trace() is None
+    assert tracing.span("x") is tracing.span("y")
+
+    trace = tracing.Trace()
+    with tracing.trace_context(trace):
+        with tracing.span("outer", a=1):
+            pass
+    assert [(s.name, s.args) for s in trace.spans] == [("outer", {"a": 1})]
+    assert tracing.current_trace() is None
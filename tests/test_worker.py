@@ -7,6 +7,7 @@ import time
 from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 from songripper import worker
+from songripper.services import accounting
 from songripper.worker import clean, fetch_cover, delete_staging
 import pytest
 
@@ -84,7 +85,7 @@ def test_rip_playlist_moves_files(monkeypatch, tmp_path):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(worker.subprocess, "run", lambda *a, **k: FakeResult(playlist_json))
+    monkeypatch.setattr(accounting, "run_process", lambda *a, **k: FakeResult(playlist_json))
 
     songs = iter([
         ("artist1", "album1", tmp_path / f"song1{worker.AUDIO_EXT}"),
@@ -127,7 +128,7 @@ def test_rip_playlist_accepts_video_url(monkeypatch, tmp_path):
             self.stderr = ""
 
     monkeypatch.setattr(
-        worker.subprocess, "run", lambda *a, **k: FakeResult(video_json)
+        accounting, "run_process", lambda *a, **k: FakeResult(video_json)
     )
 
     monkeypatch.setattr(
@@ -177,6 +178,12 @@ def test_list_staged_tracks(tmp_path):
     ]
 
 
+def fake_download(cmd):
+    """Write the file yt-dlp would for the ``-o`` template of ``cmd``, if any."""
+    if "-o" in cmd:
+        Path(cmd[cmd.index("-o") + 1].replace("%(ext)s", "webm")).write_bytes(b"audio")
+
+
 def test_mp3_from_url_embeds_thumbnail_when_no_itunes(monkeypatch, tmp_path):
     meta = {
         "artist": "Bad/Artist",
@@ -194,7 +201,7 @@ def test_mp3_from_url_embeds_thumbnail_when_no_itunes(monkeypatch, tmp_path):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(worker.subprocess, "run", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else FakeResult(""))
+    monkeypatch.setattr(accounting, "run_process", lambda cmd, **k: FakeResult(json.dumps(meta)) if "-J" in cmd else fake_download(cmd) or FakeResult(""))
     monkeypatch.setattr(worker, "fetch_cover", lambda a, t: None)
 
     thumb_calls = []
@@ -306,57 +313,68 @@ def test_update_track_moves_file_and_listing_updates(tmp_path):
     ]
 
 
-def test_update_album_art_writes_image(monkeypatch, tmp_path):
-    mp3 = tmp_path / f"song{worker.AUDIO_EXT}"
-    mp3.write_text("x")
-
-    id3_objects = []
-
-    class DummyMP4(dict):
-        def __init__(self, path=None):
-            self.path = path
-            id3_objects.append(self)
+def test_update_tracks_moves_batch_and_detects_collisions(tmp_path):
+    worker.DATA_DIR = tmp_path
+    album = tmp_path / "staging" / "Old" / "Album"
+    album.mkdir(parents=True)
+    tracks = [album / f"Song{n}{worker.AUDIO_EXT}" for n in (1, 2)]
+    for t in tracks:
+        t.write_text("x")
+
+    paths = worker.update_tracks([str(t) for t in tracks], {"artist": "New"})
+    new_album = tmp_path / "staging" / "New" / "Album"
+    assert paths == [new_album / t.name for t in tracks]
+    assert all(p.exists() for p in paths)
+    assert not (tmp_path / "staging" / "Old").exists()
 
-        def save(self, path=None):
-            self.saved = path
+    with pytest.raises(worker.TrackUpdateError):
+        worker.update_tracks([str(p) for p in paths], {"title": "Same"})
+    assert all(p.exists() for p in paths)
 
-    class DummyCover:
-        FORMAT_JPEG = 0
-        FORMAT_PNG = 1
 
-        def __init__(self, data, imageformat=None):
-            self.kw = {"data": data, "imageformat": imageformat}
+def test_update_tracks_renames_whole_album_directory(tmp_path):
+    worker.DATA_DIR = tmp_path
+    album = tmp_path / "staging" / "Old" / "Album"
+    album.mkdir(parents=True)
+    tracks = [album / f"0{n} Song{n}{worker.AUDIO_EXT}" for n in (1, 2, 3)]
+    for t in tracks:
+        t.write_text("x")
+    (album / "notes.txt").write_text("kept with the album")
+
+    paths = worker.update_tracks([str(t) for t in tracks], {"artist": "New"})
+    new_album = tmp_path / "staging" / "New" / "Album"
+    assert paths == [new_album / t.name for t in tracks]
+    # The directory moved as a unit, so untracked files came along.
+    assert (new_album / "notes.txt").exists()
+    assert not (tmp_path / "staging" / "Old").exists()
+
+    other = tmp_path / "staging" / "Other" / "Album"
+    other.mkdir(parents=True)
+    (other / f"01 Song1{worker.AUDIO_EXT}").write_text("y")
+    with pytest.raises(worker.TrackUpdateError):
+        worker.update_tracks([str(p) for p in paths], {"artist": "Other"})
+    assert all(p.exists() for p in paths)
 
-    monkeypatch.setitem(
-        sys.modules,
-        "mutagen.mp4",
-        types.SimpleNamespace(MP4=DummyMP4, MP4Cover=DummyCover),
+    (other / f"01 Song1{worker.AUDIO_EXT}").rename(other / f"04 Song4{worker.AUDIO_EXT}")
+    merged = worker.update_tracks([str(p) for p in paths], {"artist": "Other"})
+    assert sorted(p.name for p in other.iterdir()) == sorted(
+        [p.name for p in merged] + [f"04 Song4{worker.AUDIO_EXT}", "notes.txt"]
     )
+    assert not new_album.exists()
 
-    worker.update_album_art(str(mp3), b"img", "image/png")
-
-    assert isinstance(id3_objects[0]["covr"], list)
-    assert isinstance(id3_objects[0]["covr"][0], DummyCover)
-    assert id3_objects[0]["covr"][0].kw["data"] == b"img"
-    assert id3_objects[0]["covr"][0].kw["imageformat"] == DummyCover.FORMAT_PNG
-    assert id3_objects[0].saved == mp3
-
-
-def test_update_album_art_replaces_existing(monkeypatch, tmp_path):
-    mp3 = tmp_path / f"song{worker.AUDIO_EXT}"
-    mp3.write_text("x")
 
+def _dummy_mp4_module(monkeypatch, saved):
     class DummyMP4(dict):
         def __init__(self, path=None):
+            self.path = path
             self.deleted = False
-            self.saved = None
 
         def delall(self, key):
             if key == "covr":
                 self.deleted = True
 
         def save(self, path=None):
-            self.saved = path
+            saved.append((path, self))
 
     class DummyCover:
         FORMAT_JPEG = 0
@@ -365,66 +383,75 @@ def test_update_album_art_replaces_existing(monkeypatch, tmp_path):
         def __init__(self, data, imageformat=None):
             self.kw = {"data": data, "imageformat": imageformat}
 
-    id3_instance = DummyMP4()
     monkeypatch.setitem(
         sys.modules,
         "mutagen.mp4",
-        types.SimpleNamespace(MP4=lambda p=None: id3_instance, MP4Cover=DummyCover),
+        types.SimpleNamespace(MP4=DummyMP4, MP4Cover=DummyCover),
     )
-
-    worker.update_album_art(str(mp3), b"img", "image/png")
-
-    assert id3_instance.deleted
-    assert isinstance(id3_instance["covr"], list)
-    assert isinstance(id3_instance["covr"][0], DummyCover)
-    assert id3_instance.saved == mp3
+    return DummyCover
 
 
-def test_update_album_art_updates_all_album_tracks(monkeypatch, tmp_path):
-    album_dir = tmp_path / "Artist" / "Album"
+def test_update_album_art_stores_sidecar_without_touching_tracks(monkeypatch, tmp_path):
+    worker.DATA_DIR = tmp_path
+    album_dir = tmp_path / "staging" / "Artist" / "Album"
     album_dir.mkdir(parents=True)
     t1 = album_dir / f"t1{worker.AUDIO_EXT}"
-    t2 = album_dir / f"t2{worker.AUDIO_EXT}"
     t1.write_text("x")
-    t2.write_text("y")
-
-    id3_objects = []
-
-    class DummyMP4(dict):
-        def __init__(self, path=None):
-            self.path = path
+    (album_dir / f"t2{worker.AUDIO_EXT}").write_text("y")
+    saved = []
+    _dummy_mp4_module(monkeypatch, saved)
 
-        def save(self, path=None):
-            self.saved = path
+    worker.ALBUM_ART_CACHE.clear()
+    worker.update_album_art(str(t1), b"img", "image/png")
+    worker.update_album_art(str(t1), b"img2", "image/png")
 
-        def delall(self, key):
-            pass
+    assert saved == []
+    assert (album_dir / ".cover.png").read_bytes() == b"img2"
+    manifest = json.loads((tmp_path / "staging_covers.json").read_text())
+    assert manifest["Artist/Album"]["mime"] == "image/png"
+    with worker.ALBUM_LOCK:
+        assert worker.ALBUM_ART_CACHE[("Artist", "Album")] == b"img2"
+    tracks = worker.list_staged_tracks()
+    assert all(t.cover.startswith("/cover?filepath=") for t in tracks)
+    assert worker.track_cover(str(t1)) == (b"img2", "image/png")
 
-    class DummyCover:
-        FORMAT_JPEG = 0
-        FORMAT_PNG = 1
 
-        def __init__(self, data, imageformat=None):
-            self.kw = {"data": data, "imageformat": imageformat}
-            id3_objects.append((data, self))
+def test_approve_embeds_staged_cover_once_per_track(monkeypatch, tmp_path):
+    worker.DATA_DIR = tmp_path
+    worker.NAS_PATH = tmp_path / "nas"
+    album_dir = tmp_path / "staging" / "Artist" / "Album"
+    album_dir.mkdir(parents=True)
+    tracks = [album_dir / f"t{n}{worker.AUDIO_EXT}" for n in (1, 2)]
+    for t in tracks:
+        t.write_text("x")
+    saved = []
+    DummyCover = _dummy_mp4_module(monkeypatch, saved)
+    monkeypatch.setattr(worker._service, "folder_art", True)
+
+    worker.update_album_art(str(tracks[0]), b"\xff\xd8art", "image/jpeg")
+    worker.approve_selected([str(tracks[0])])
+    worker.approve_selected([str(tracks[1])])
+
+    assert [path for path, _ in saved] == tracks
+    assert all(tags.deleted for _, tags in saved)
+    assert all(tags["covr"][0].kw["data"] == b"\xff\xd8art" for _, tags in saved)
+    assert saved[0][1]["covr"][0].kw["imageformat"] == DummyCover.FORMAT_JPEG
+    nas_album = tmp_path / "nas" / "Artist" / "Album"
+    assert (nas_album / "folder.jpg").read_bytes() == b"\xff\xd8art"
+    assert not (tmp_path / "staging").exists()
 
-    def id3_factory(p=None):
-        obj = DummyMP4(p)
-        return obj
 
-    monkeypatch.setitem(
-        sys.modules,
-        "mutagen.mp4",
-        types.SimpleNamespace(MP4=id3_factory, MP4Cover=DummyCover),
-    )
-
-    worker.ALBUM_ART_CACHE.clear()
-    worker.update_album_art(str(t1), b"img", "image/png")
+def test_staged_cover_follows_renamed_album(tmp_path):
+    worker.DATA_DIR = tmp_path
+    album_dir = tmp_path / "staging" / "Artist" / "Album"
+    album_dir.mkdir(parents=True)
+    track = album_dir / f"01 Song{worker.AUDIO_EXT}"
+    track.write_text("x")
+    worker.update_album_art(str(track), b"\xff\xd8art")
 
-    assert len(id3_objects) == 2
-    assert all(obj[0] == b"img" for obj in id3_objects)
-    with worker.ALBUM_LOCK:
-        assert worker.ALBUM_ART_CACHE[("Artist", "Album")] == b"img"
+    new_path = worker.update_track(str(track), "album", "Renamed")
+    assert worker.track_cover(str(new_path)) == (b"\xff\xd8art", "image/jpeg")
+    assert not album_dir.exists()
 
 
 def test_update_album_art_missing_file_raises(tmp_path):
@@ -486,7 +513,7 @@ def test_rip_playlist_runs_in_parallel(monkeypatch, tmp_path):
             self.returncode = 0
             self.stderr = ""
 
-    monkeypatch.setattr(worker.subprocess, "run", lambda *a, **k: FakeResult(playlist_json))
+    monkeypatch.setattr(accounting, "run_process", lambda *a, **k: FakeResult(playlist_json))
 
     thread_ids = []
 
@@ -544,3 +571,329 @@ def test_approve_with_checks_skips_when_declined(tmp_path):
     assert new_file.exists()
     assert worker.staging_has_files() is True
 
+
+
+def test_rip_playlist_reports_partial_failures(monkeypatch, tmp_path):
+    worker.DATA_DIR = tmp_path
+
+    playlist_json = json.dumps({"entries": [{"id": "1"}, {"id": "2"}, {"id": "3"}]})
+
+    class FakeResult:
+        def __init__(self, stdout):
+            self.stdout = stdout
+            self.returncode = 0
+            self.stderr = ""
+
+    monkeypatch.setattr(accounting, "run_process", lambda *a, **k: FakeResult(playlist_json))
+    monkeypatch.setattr(worker._service, "retry_base_delay", 0)
+
+    attempts = {}
+
+    def fake_mp3_from_url(url, staging):
+        vid = url.split("/")[-1]
+        attempts[vid] = attempts.get(vid, 0) + 1
+        if vid == "2" and attempts[vid] == 1:
+            raise worker.RipperError("HTTP Error 429: Too Many Requests")
+        if vid == "3":
+            raise worker.RipperError("ERROR: [youtube] 3: Video unavailable")
+        return ("a", "b", tmp_path / f"{vid}{worker.AUDIO_EXT}")
+
+    monkeypatch.setattr(worker, "mp3_from_url", fake_mp3_from_url)
+    monkeypatch.setattr(worker.shutil, "move", lambda *a, **k: None)
+
+    job = worker.create_job("http://pl")
+    assert worker.rip_playlist("http://pl", job=job) == "partial"
+
+    by_url = {item.url.split("/")[-1]: item for item in job.items}
+    assert by_url["1"].status == "done"
+    assert by_url["2"].status == "done" and by_url["2"].attempts == 2
+    assert by_url["3"].status == "failed" and by_url["3"].attempts == 1
+    assert by_url["3"].retryable is False
+    assert "Video unavailable" in job.report()
+    assert worker.get_job(job.id) is job
+
+
+def test_retry_classification_and_backoff():
+    from songripper.services.retry import backoff_delay, call_with_retry, is_retryable
+
+    assert is_retryable(worker.RipperError("HTTP Error 429: Too Many Requests"))
+    assert is_retryable(ConnectionResetError("reset"))
+    assert not is_retryable(worker.RipperError("Private video. Sign in"))
+    assert backoff_delay(3, base=1, cap=5, rand=lambda: 1.0) == 5
+    assert backoff_delay(1, base=1, cap=5, rand=lambda: 0.5) == 1
+
+    sleeps = []
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise TimeoutError("timed out")
+
+    with pytest.raises(TimeoutError):
+        call_with_retry(flaky, attempts=3, sleep=sleeps.append)
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_run_command_records_child_usage_per_job():
+    from songripper.services.accounting import usage_context
+
+    service = worker._service
+    job = worker.create_job("http://pl")
+    script = "x = bytearray(20 * 1024 * 1024); sum(range(200000)); print('ok')"
+    with usage_context(job, "https://youtu.be/1"):
+        out = service._run_command([sys.executable, "-c", script], stage="download")
+
+    assert out.strip() == "ok"
+    [usage] = job.usage
+    assert usage.stage == "download"
+    assert usage.job_id == job.id
+    assert usage.track == "https://youtu.be/1"
+    assert usage.wall > 0
+    assert usage.user + usage.sys > 0
+    assert usage.exact is True
+
+    summary = worker.job_resources(job.id)
+    assert summary["totals"]["commands"] == 1
+    assert summary["by_stage"]["download"]["commands"] == 1
+
+
+def test_concurrent_commands_get_their_own_usage():
+    from songripper.services.accounting import CommandUsage, summarize, usage_context
+
+    service = worker._service
+    job = worker.create_job("http://pl")
+    big = "x = bytearray(200 * 1024 * 1024); import time; time.sleep(0.2)"
+    small = "import time; time.sleep(0.2)"
+
+    def run(script, track):
+        with usage_context(job, track):
+            service._run_command([sys.executable, "-c", script], stage="trim")
+
+    threads = [threading.Thread(target=run, args=(s, t)) for s, t in ((big, "big"), (small, "small"))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    usage = {u.track: u for u in job.usage}
+    assert usage["big"].exact and usage["small"].exact
+    # Linux starts a child's peak RSS at the spawning process's, so leave headroom.
+    assert usage["big"].max_rss_kb > 200 * 1024 > usage["small"].max_rss_kb
+
+    guessed = CommandUsage("ffmpeg", "trim", None, None, 1.0, 5.0, 0.0, None, exact=False)
+    summary = summarize(job.usage + [guessed])
+    assert summary["totals"]["commands"] == 2
+    assert summary["by_stage"]["trim"]["max_rss_kb"] == usage["big"].max_rss_kb
+    assert summary["inexact"]["commands"] == 1 and summary["inexact"]["user"] == 5.0
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="needs os.wait4")
+def test_reap_does_not_report_success_for_a_child_reaped_elsewhere():
+    import subprocess
+
+    failing = [sys.executable, "-c", "raise SystemExit(3)"]
+    proc = subprocess.Popen(failing)
+    proc.wait()
+    assert accounting.reap(proc) is None
+    assert proc.returncode == 3
+
+    proc = subprocess.Popen(failing)
+    os.waitpid(proc.pid, 0)  # e.g. an event loop's child watcher
+    with pytest.raises(ChildProcessError):
+        accounting.reap(proc)
+    assert proc.returncode is None
+
+
+def test_read_tags_parses_each_file_once_per_change(monkeypatch, tmp_path):
+    worker.DATA_DIR = tmp_path
+    album_dir = tmp_path / "staging" / "Artist" / "Album"
+    album_dir.mkdir(parents=True)
+    track = album_dir / f"01 Song{worker.AUDIO_EXT}"
+    track.write_text("x")
+    parsed = []
+
+    class DummyMP4:
+        def __init__(self, path):
+            parsed.append(path)
+            self.tags = {"\xa9ART": ["Tagged"], "covr": [b"img"]}
+            self.info = types.SimpleNamespace(length=125.0)
+
+    monkeypatch.setitem(sys.modules, "mutagen.mp4", types.SimpleNamespace(MP4=DummyMP4))
+
+    assert worker.read_tags(str(track))["artist"] == "Tagged"
+    assert worker.read_tags(str(track))["title"] == "Song"
+    [staged] = worker.list_staged_tracks()
+    assert staged.duration == 125.0
+    assert staged.cover.startswith("/cover?filepath=")
+    assert len(parsed) == 1
+
+    track.write_text("changed")
+    worker.read_tags(str(track))
+    assert len(parsed) == 2
+
+
+def test_iter_staged_tracks_scans_in_display_order(tmp_path):
+    worker.DATA_DIR = tmp_path
+    staging = tmp_path / "staging"
+    for artist, album, title in [
+        ("b artist", "Album", "02 Two"),
+        ("b artist", "Album", "01 One"),
+        ("A artist", "zed", "Song"),
+        ("A artist", "Alpha", "Song"),
+    ]:
+        (staging / artist / album).mkdir(parents=True, exist_ok=True)
+        (staging / artist / album / f"{title}{worker.AUDIO_EXT}").write_text("x")
+    (staging / "A artist" / "Alpha" / "notes.txt").write_text("ignored")
+    (staging / "stray.txt").write_text("ignored")
+
+    it = worker.iter_staged_tracks()
+    first = next(it)
+    assert (first.artist, first.album, first.title) == ("A artist", "Alpha", "Song")
+    rest = [(t.artist, t.album, t.title) for t in it]
+    assert rest == [("A artist", "zed", "Song"), ("b artist", "Album", "One"), ("b artist", "Album", "Two")]
+    assert [t.filepath for t in worker.list_staged_tracks()] == [first.filepath] + [
+        t.filepath for t in list(worker.iter_staged_tracks())[1:]
+    ]
+
+
+def test_chapter_video_is_split_once_with_stream_copy(monkeypatch, tmp_path):
+    from songripper.services.ripper_service import RipperService
+
+    fakes = Path(__file__).resolve().parents[1] / "benchmarks" / "fakes"
+    monkeypatch.setenv("PATH", f"{fakes}{os.pathsep}{os.environ['PATH']}")
+    for name in ("FAKE_YTDLP_LATENCY", "FAKE_DOWNLOAD_LATENCY", "FAKE_FFMPEG_LATENCY"):
+        monkeypatch.setenv(name, "0")
+    monkeypatch.setenv("FAKE_OUTPUT_BYTES", "500")
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.split_chapters = True
+    commands = []
+    run = service._run_command
+    monkeypatch.setattr(
+        service, "_run_command", lambda cmd, *a, **kw: commands.append(cmd) or run(cmd, *a, **kw)
+    )
+    covers = []
+    tracks = service.mp3_from_url(
+        "fake://video/c3",
+        tmp_path,
+        fetch_cover=lambda a, t: covers.append(t),
+        fetch_thumbnail=lambda u: None,
+    )
+
+    assert [p.name for _, _, p in tracks] == [
+        f"0{n} Chapter {n}{worker.AUDIO_EXT}" for n in (1, 2, 3)
+    ]
+    assert {(a, b) for a, b, _ in tracks} == {("Bench Artist 3", "Bench Full Album 3")}
+    assert all(p.stat().st_size == 500 for _, _, p in tracks)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(p.name for _, _, p in tracks)
+    splits = [c for c in commands if "-ss" in c]
+    assert len(splits) == 3 and all(c[c.index("-c") + 1] == "copy" for c in splits)
+    assert [c[c.index("-ss") + 1] for c in splits] == ["0.000", "60.000", "120.000"]
+    # One unconverted download, converted once outside the download slot.
+    (download,) = [c for c in commands if "-x" in c]
+    assert "--audio-format" not in download
+    assert len([c for c in commands if "-filter_complex" in c]) == 1
+    # Untaggable filler audio: no cover lookup.
+    assert covers == []
+
+    service.split_chapters = False
+    artist, album, path = service.mp3_from_url("fake://video/c2", tmp_path)
+    assert path.name == f"Bench Full Album 2{worker.AUDIO_EXT}"
+
+
+def test_chapter_plan_orders_chapters_and_fills_titles():
+    from songripper.services.ripper_service import RipperService
+
+    plan = RipperService()._chapter_plan(
+        {"chapters": [
+            {"start_time": 200, "title": "Outro"},
+            {"start_time": 0, "end_time": 100.5, "title": "Intro: Part/1"},
+            {"start_time": 100.5, "end_time": 200, "title": ""},
+        ]}
+    )
+    assert plan == [
+        ("Intro Part 1", "01 ", 0.0, 100.5),
+        ("Track 2", "02 ", 100.5, 200.0),
+        ("Outro", "03 ", 200.0, None),
+    ]
+
+
+def test_parse_profiles_reads_bitrates_and_libraries():
+    from songripper.services.profiles import PRESETS, parse_profiles
+
+    assert parse_profiles("") == [PRESETS["m4a"]]
+    alac, opus = parse_profiles("alac, opus@128k:/mobile")
+    assert (alac.codec, alac.ext, alac.library) == ("alac", ".m4a", None)
+    assert (opus.bitrate, opus.library) == ("128k", Path("/mobile"))
+    assert opus.encode_args() == ["-c:a", "libopus", "-b:a", "128k"]
+    with pytest.raises(ValueError):
+        parse_profiles("aac,alac")
+    with pytest.raises(ValueError):
+        parse_profiles("flac")
+
+
+def _profile_service(monkeypatch, tmp_path):
+    from songripper.services.profiles import parse_profiles
+    from songripper.services.ripper_service import RipperService
+
+    fakes = Path(__file__).resolve().parents[1] / "benchmarks" / "fakes"
+    monkeypatch.setenv("PATH", f"{fakes}{os.pathsep}{os.environ['PATH']}")
+    for name in ("FAKE_YTDLP_LATENCY", "FAKE_DOWNLOAD_LATENCY", "FAKE_FFMPEG_LATENCY"):
+        monkeypatch.setenv(name, "0")
+    monkeypatch.setenv("FAKE_OUTPUT_BYTES", "500")
+    monkeypatch.setitem(sys.modules, "mutagen.easymp4", None)
+    monkeypatch.setitem(sys.modules, "mutagen.oggopus", None)
+
+    service = RipperService(data_dir=tmp_path, nas_path=tmp_path / "nas")
+    service.profiles = parse_profiles(f"aac,opus:{tmp_path / 'mobile'}")
+    commands = []
+    run = service._run_command
+    monkeypatch.setattr(
+        service, "_run_command", lambda cmd, *a, **kw: commands.append(cmd) or run(cmd, *a, **kw)
+    )
+    return service, commands
+
+
+def test_profiles_are_encoded_from_one_download_and_decode(monkeypatch, tmp_path):
+    service, commands = _profile_service(monkeypatch, tmp_path)
+    artist, album, path = service.mp3_from_url(
+        "fake://video/v1", tmp_path, fetch_cover=lambda a, t: None, fetch_thumbnail=lambda u: None
+    )
+
+    assert path.name == "02 Bench Track 1.m4a" and service.AUDIO_EXT == ".m4a"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "02 Bench Track 1.m4a", "02 Bench Track 1.opus"
+    ]
+    download = [c for c in commands if "-x" in c]
+    assert len(download) == 1 and "--audio-format" not in download[0]
+    (encode,) = [c for c in commands if c[0] == "ffmpeg"]
+    assert "silenceremove" in encode[encode.index("-filter_complex") + 1]
+    assert encode[-1] == str(path.with_suffix(".opus"))
+    assert encode.count("-map") == 2 and "libopus" in encode and "aac" in encode
+
+    commands.clear()
+    service.split_chapters = True
+    tracks = service.mp3_from_url("fake://video/c2", tmp_path)
+    assert [p.name for _, _, p in tracks] == ["01 Chapter 1.m4a", "02 Chapter 2.m4a"]
+    assert len([c for c in commands if c[0] == "ffmpeg"]) == 1 + 2 * 2
+    assert (tmp_path / "02 Chapter 2.opus").exists()
+    assert not list(tmp_path.glob(".*"))
+
+
+def test_renditions_follow_edits_and_approval(monkeypatch, tmp_path):
+    service, _ = _profile_service(monkeypatch, tmp_path)
+    service.rip_playlist("fake://video/v1", entries=None)
+    staging = tmp_path / "staging"
+    (track,) = [t.filepath for t in service.list_staged_tracks()]
+
+    (new_path,) = service.update_tracks([track], {"title": "Renamed"})
+    assert new_path.with_suffix(".opus").exists()
+    assert not Path(track).with_suffix(".opus").exists()
+
+    service.approve_selected([str(new_path)])
+    rel = new_path.relative_to(staging)
+    assert (tmp_path / "nas" / rel).exists()
+    assert (tmp_path / "mobile" / rel.with_suffix(".opus")).exists()
+    assert not staging.exists()